@@ -0,0 +1,45 @@
+import argparse
+import sys
+
+from benchmarks.opcode_benchmark import OpcodeBenchmarkError
+from benchmarks.suite import BenchmarkSuite
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='CHIP-8 emulator benchmark suite')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run every benchmark and write the results as JSON')
+    run_parser.add_argument('--output', default='benchmark_results.json')
+
+    compare_parser = commands.add_parser('compare', help='flag regressions against a stored baseline')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=BenchmarkSuite.DEFAULT_THRESHOLD,
+                                help='relative drop that counts as a regression (default: %(default)s)')
+
+    arguments = parser.parse_args()
+    suite = BenchmarkSuite()
+
+    if arguments.command == 'run':
+        try:
+            document = suite.run(arguments.output)
+        except OpcodeBenchmarkError as error:
+            for handler_name, handler_error in sorted(error.errors.items()):
+                print(f'opcode.{handler_name:48} {handler_error}')
+            return 1
+        for name, value in sorted(document['metrics'].items()):
+            print(f'{name:55} {value:>14,.0f}')
+        print(f'Results written to {arguments.output}')
+        return 0
+
+    regressions = suite.compare(suite.load(arguments.baseline), suite.load(arguments.current), arguments.threshold)
+    for name, baseline_value, current_value, change in regressions:
+        print(f'REGRESSION {name}: {baseline_value:,.0f} -> {current_value:,.0f} ({change:+.1%})')
+    if not regressions:
+        print(f'No regressions beyond {arguments.threshold:.0%}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+import time
+
+from core.cpu.instructions import Cpu
+from core.cpu.decoder import Decoder
+from core.cpu.config.memory_starter import MemoryStarter
+from core.cpu.config.memory_config import Config
+from core.reader.file_reader import FileReader
+
+
+class DecodeBenchmark:
+    """
+    Compares instructions/sec of the string-keyed dispatch against the precomputed decode table on a ROM
+    """
+
+    def __init__(self, rom_path='roms/Tetris.ch8', num_cycles=200000):
+        self.rom_path = rom_path
+        self.num_cycles = num_cycles
+
+    def new_cpu(self):
+        chip8_cpu = Cpu()
+        memory_management = MemoryStarter(chip8_cpu)
+        file_buffer_list = FileReader.load_binary_to_buffer(FileReader.file_reader(self.rom_path))
+        memory_management.load_into_memory(file_buffer_list, Config.MEMORY_START_ADDRESS)
+        memory_management.load_into_memory(Config.FONT_SET, Config.FONT_SET_START_ADDRESS)
+        return chip8_cpu
+
+    @staticmethod
+    def run_string_dispatch(chip8_cpu, num_cycles):
+        """
+        Previous execution path: the opcode is formatted to a hex string, looked up on the nested instructions table
+        and the operands are extracted again on every instruction
+        """
+        memory = chip8_cpu.memory
+        instructions_table = chip8_cpu.instructions_table
+
+        for _ in range(num_cycles):
+            program_counter = chip8_cpu.pc
+            opcode = int(memory[program_counter]) << 8 | int(memory[program_counter + 1])
+            chip8_cpu.current_opcode = opcode
+            chip8_cpu.pc = program_counter + 2
+            handler = Decoder.lookup_handler(instructions_table, opcode)
+            handler(*Decoder.extract_operands(opcode))
+
+    @staticmethod
+    def run_decode_table(chip8_cpu, num_cycles):
+        chip8_cpu.run_cycles(num_cycles)
+
+    def measure(self, runner):
+        chip8_cpu = self.new_cpu()
+        start = time.perf_counter()
+        runner(chip8_cpu, self.num_cycles)
+        elapsed = time.perf_counter() - start
+        return self.num_cycles / elapsed
+
+    def run(self):
+        start = time.perf_counter()
+        Cpu()
+        startup = time.perf_counter() - start
+
+        string_dispatch_ips = self.measure(self.run_string_dispatch)
+        decode_table_ips = self.measure(self.run_decode_table)
+
+        print(f'ROM: {self.rom_path} ({self.num_cycles} instructions)')
+        print(f'Decode table build: {startup * 1000:.1f} ms')
+        print(f'String-keyed dispatch: {string_dispatch_ips:,.0f} instructions/sec')
+        print(f'Decode table dispatch: {decode_table_ips:,.0f} instructions/sec')
+        print(f'Speedup: {decode_table_ips / string_dispatch_ips:.2f}x')
+
+
+if __name__ == '__main__':
+    DecodeBenchmark().run()
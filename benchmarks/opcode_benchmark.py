@@ -0,0 +1,122 @@
+import random
+import sys
+import time
+
+from core.cpu.instructions import Cpu
+from core.cpu.config.memory_starter import MemoryStarter
+from core.cpu.config.memory_config import Config
+from core.state.save_state import SaveState
+
+
+class OpcodeBenchmarkError(Exception):
+    """
+    Raised by OpcodeBenchmark.run with the errors of every handler that failed, by handler name
+    """
+
+    def __init__(self, errors):
+        super().__init__('; '.join(f'{handler_name}: {error}' for handler_name, error in errors.items()))
+        self.errors = errors
+
+
+class OpcodeBenchmark:
+    """
+    Microbenchmarks every handler of Cpu.instructions_table with randomized operands.
+
+    Calls are timed in chunks of half the stack size, the stack being refilled to half depth before each chunk, so
+    2nnn and 00EE run as many times as any other handler without overflowing or emptying the stack.
+    """
+    # Register values a handler needs instead of uniformly random ones: Fx33 reads the last three decimal digits
+    REGISTER_VALUES = {
+        'load_bcd_on_memory': range(100, 256),
+    }
+
+    def __init__(self, num_calls=5000, repeats=5, seed=0):
+        self.num_calls = num_calls
+        self.repeats = repeats
+        self.random = random.Random(seed)
+
+    @staticmethod
+    def opcode_patterns(instructions_table):
+        """
+        (prefix, suffix, handler) of every entry of the hex-digit keyed instructions table
+        """
+        patterns = []
+        for key, entry in instructions_table.items():
+            if isinstance(entry, dict):
+                for suffix, handler in entry.items():
+                    patterns.append((key, suffix, handler))
+            else:
+                patterns.append((key, '', entry))
+        return patterns
+
+    def random_opcode(self, prefix, suffix):
+        middle = ''.join(self.random.choice('0123456789abcdef') for _ in range(4 - len(prefix) - len(suffix)))
+        return int(prefix + middle + suffix, 16)
+
+    def new_cpu(self):
+        chip8_cpu = Cpu()
+        MemoryStarter(chip8_cpu).load_into_memory(Config.FONT_SET, Config.FONT_SET_START_ADDRESS)
+        for register in range(16):
+            chip8_cpu.registers[register] = self.random.randrange(256)
+        chip8_cpu.keypad[self.random.randrange(16)] = 1
+        chip8_cpu.index = self.random.randrange(Config.MEMORY_START_ADDRESS, 0xF00)
+        return chip8_cpu
+
+    def measure_handler(self, chip8_cpu, initial_state, entries, registers=None):
+        stack_depth = chip8_cpu.STACK_SIZE // 2
+        chunks = [entries[start:start + stack_depth] for start in range(0, len(entries), stack_depth)]
+        clock = time.perf_counter
+        best = None
+        for _ in range(self.repeats):
+            initial_state.restore(chip8_cpu)
+            if registers is not None:
+                chip8_cpu.registers[:] = registers
+            stack = chip8_cpu.stack
+            elapsed = 0
+            for chunk in chunks:
+                stack.clear()
+                stack.extend([Config.MEMORY_START_ADDRESS] * stack_depth)
+                chip8_cpu.stack_pointer = stack_depth
+                start = clock()
+                for handler, operands in chunk:
+                    handler(*operands)
+                elapsed += clock() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def run(self):
+        """
+        Returns {handler_name: calls/sec}. Raises OpcodeBenchmarkError after measuring the others when any handler
+        fails, so a broken handler can't go unnoticed as a missing metric.
+        """
+        chip8_cpu = self.new_cpu()
+        initial_state = SaveState.capture(chip8_cpu)
+        results = {}
+        errors = {}
+
+        for prefix, suffix, handler in self.opcode_patterns(chip8_cpu.instructions_table):
+            opcodes = [self.random_opcode(prefix, suffix) for _ in range(self.num_calls)]
+            entries = [chip8_cpu.decode_table[opcode] for opcode in opcodes]
+            registers = None
+            if handler.__name__ in self.REGISTER_VALUES:
+                registers = [self.random.choice(self.REGISTER_VALUES[handler.__name__]) for _ in range(16)]
+            try:
+                elapsed = self.measure_handler(chip8_cpu, initial_state, entries, registers)
+            except Exception as error:
+                errors[handler.__name__] = f'{type(error).__name__}: {error}'
+                continue
+            results[handler.__name__] = self.num_calls / elapsed
+        if errors:
+            raise OpcodeBenchmarkError(errors)
+        return results
+
+
+if __name__ == '__main__':
+    try:
+        opcode_results = OpcodeBenchmark().run()
+    except OpcodeBenchmarkError as benchmark_error:
+        for failed_handler, handler_error in benchmark_error.errors.items():
+            print(f'{failed_handler:45} {handler_error}')
+        sys.exit(1)
+    for handler_name, calls_per_second in opcode_results.items():
+        print(f'{handler_name:45} {calls_per_second:>14,.0f} calls/sec')
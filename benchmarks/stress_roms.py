@@ -0,0 +1,95 @@
+class StressRoms:
+    """
+    Synthetic ROMs that hammer one part of the emulator each, built as raw CHIP-8 bytes starting at 0x200
+    """
+
+    @staticmethod
+    def assemble(opcodes):
+        return bytes(byte for opcode in opcodes for byte in (opcode >> 8, opcode & 0xFF))
+
+    @classmethod
+    def draw_heavy(cls):
+        """
+        Draws font sprites across the whole screen in an endless loop
+        """
+        return cls.assemble([
+            0x6000,  # 0x200: V0 = 0
+            0x6100,  # 0x202: V1 = 0
+            0xA050,  # 0x204: I = font sprite 0
+            0xD015,  # 0x206: draw 5 rows at (V0, V1)
+            0xD015,  # 0x208
+            0xD01F,  # 0x20A: draw 15 rows
+            0x7008,  # 0x20C: V0 += 8
+            0x7105,  # 0x20E: V1 += 5
+            0x1204,  # 0x210: loop
+        ])
+
+    @classmethod
+    def call_heavy(cls):
+        """
+        Calls a chain of nested subroutines in an endless loop
+        """
+        return cls.assemble([
+            0x2206,  # 0x200: call 0x206
+            0x1200,  # 0x202: loop
+            0x0000,  # 0x204: padding
+            0x220C,  # 0x206: call 0x20C
+            0x7001,  # 0x208: V0 += 1
+            0x00EE,  # 0x20A: return
+            0x2212,  # 0x20C: call 0x212
+            0x7101,  # 0x20E: V1 += 1
+            0x00EE,  # 0x210: return
+            0x7201,  # 0x212: V2 += 1
+            0x00EE,  # 0x214: return
+        ])
+
+    @classmethod
+    def arithmetic_heavy(cls):
+        """
+        Straight-line ALU work on the registers closed by a single jump
+        """
+        return cls.assemble([
+            0x6003,  # 0x200: V0 = 3
+            0x6107,  # 0x202: V1 = 7
+            0x7201,  # 0x204: V2 += 1
+            0x8304,  # 0x206: V3 += V0
+            0x8410,  # 0x208: V4 = V1
+            0x8411,  # 0x20A: V4 |= V1
+            0x8512,  # 0x20C: V5 &= V1
+            0x8613,  # 0x20E: V6 ^= V1
+            0x8105,  # 0x210: V1 -= V0
+            0x8706,  # 0x212: V7 >>= 1
+            0x880E,  # 0x214: V8 <<= 1
+            0xA300,  # 0x216: I = 0x300
+            0xF21E,  # 0x218: I += V2
+            0x1204,  # 0x21A: loop
+        ])
+
+    @classmethod
+    def hires_draw_heavy(cls):
+        """
+        SUPER-CHIP 128x64 mode drawing 16x16 sprites across the whole screen and scrolling it in an endless loop
+        """
+        return cls.assemble([
+            0x00FF,  # 0x200: high resolution mode
+            0x6000,  # 0x202: V0 = 0
+            0x6100,  # 0x204: V1 = 0
+            0xA0A0,  # 0x206: I = large font digits, read as one 16x16 sprite
+            0xD010,  # 0x208: draw 16x16 at (V0, V1)
+            0xD010,  # 0x20A
+            0x7010,  # 0x20C: V0 += 16
+            0x7110,  # 0x20E: V1 += 16
+            0x00C4,  # 0x210: scroll down 4 rows
+            0x00FB,  # 0x212: scroll right
+            0x00FC,  # 0x214: scroll left
+            0x1208,  # 0x216: loop
+        ])
+
+    @classmethod
+    def all_roms(cls):
+        return {
+            'draw_heavy': cls.draw_heavy(),
+            'hires_draw_heavy': cls.hires_draw_heavy(),
+            'call_heavy': cls.call_heavy(),
+            'arithmetic_heavy': cls.arithmetic_heavy(),
+        }
@@ -0,0 +1,70 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.opcode_benchmark import OpcodeBenchmark
+from benchmarks.throughput_benchmark import ThroughputBenchmark
+
+
+class BenchmarkSuite:
+    """
+    Runs every benchmark into one JSON document with machine metadata and compares documents against a baseline.
+    All metrics are rates, so higher is better.
+    """
+    DEFAULT_THRESHOLD = 0.10
+
+    @staticmethod
+    def machine_metadata():
+        try:
+            commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                    check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+            'python': sys.version.split()[0],
+            'implementation': platform.python_implementation(),
+            'numpy': np.__version__,
+            'commit': commit,
+        }
+
+    def run(self, output_path=None):
+        metrics = {}
+        for handler_name, calls_per_second in OpcodeBenchmark().run().items():
+            metrics[f'opcode.{handler_name}'] = calls_per_second
+        for name, value in ThroughputBenchmark().run().items():
+            metrics[f'rom.{name}'] = value
+
+        document = {'metadata': self.machine_metadata(), 'metrics': metrics}
+        if output_path is not None:
+            with open(output_path, 'w') as output_file:
+                json.dump(document, output_file, indent=2, sort_keys=True)
+        return document
+
+    @staticmethod
+    def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+        """
+        Returns (metric, baseline, current, change) for every metric that dropped by more than threshold
+        """
+        regressions = []
+        for name, baseline_value in sorted(baseline['metrics'].items()):
+            current_value = current['metrics'].get(name)
+            if current_value is None or baseline_value <= 0:
+                continue
+            change = current_value / baseline_value - 1
+            if change < -threshold:
+                regressions.append((name, baseline_value, current_value, change))
+        return regressions
+
+    @staticmethod
+    def load(path):
+        with open(path) as document_file:
+            return json.load(document_file)
@@ -0,0 +1,58 @@
+import time
+
+import numpy as np
+
+from core.main import Main
+from core.scheduler.scheduler import Scheduler
+from core.cpu.config.memory_config import Config
+from core.reader.file_reader import FileReader
+from benchmarks.stress_roms import StressRoms
+
+
+class ThroughputBenchmark:
+    """
+    End-to-end instructions/sec and frames/sec of every state backend and execution mode on the bundled ROM and the
+    stress ROMs
+    """
+
+    def __init__(self, num_cycles=100000, num_frames=600, rom_path='roms/Tetris.ch8'):
+        self.num_cycles = num_cycles
+        self.num_frames = num_frames
+        self.roms = {'tetris': FileReader.file_reader(rom_path)}
+        self.roms.update(StressRoms.all_roms())
+
+    @staticmethod
+    def new_runner(backend, mode, rom, present_frame=None):
+        runner = Main(mode, scheduler_mode=Scheduler.HEADLESS_MODE, present_frame=present_frame, backend=backend)
+        runner.memory_management.load_into_memory(np.frombuffer(rom, dtype=np.uint8), Config.MEMORY_START_ADDRESS)
+        runner.memory_management.load_into_memory(Config.FONT_SET, Config.FONT_SET_START_ADDRESS)
+        runner.memory_management.load_into_memory(Config.HIGH_FONT_SET, Config.HIGH_FONT_SET_START_ADDRESS)
+        return runner
+
+    def instructions_per_second(self, backend, mode, rom):
+        runner = self.new_runner(backend, mode, rom)
+        start = time.perf_counter()
+        executed = runner.run_cycles(self.num_cycles)
+        return executed / (time.perf_counter() - start)
+
+    def frames_per_second(self, backend, mode, rom):
+        """
+        Headless frames at the default clock rate, unpacking the display every frame as a renderer would
+        """
+        runner = self.new_runner(backend, mode, rom, present_frame=lambda chip8_cpu: chip8_cpu.video_display)
+        runner.scheduler.run(self.num_frames)
+        return runner.scheduler.frames_presented / runner.scheduler.elapsed
+
+    def run(self):
+        results = {}
+        for rom_name, rom in self.roms.items():
+            for backend in Main.BACKENDS:
+                for mode in Main.MODES:
+                    results[f'{rom_name}.{backend}.{mode}.ips'] = self.instructions_per_second(backend, mode, rom)
+                    results[f'{rom_name}.{backend}.{mode}.fps'] = self.frames_per_second(backend, mode, rom)
+        return results
+
+
+if __name__ == '__main__':
+    for name, value in ThroughputBenchmark().run().items():
+        print(f'{name:40} {value:>14,.0f}')
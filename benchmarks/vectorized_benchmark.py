@@ -0,0 +1,54 @@
+import time
+
+import numpy as np
+
+from core.cpu.instructions import Cpu
+from core.cpu.vectorized import VectorizedCpu
+from core.cpu.config.memory_starter import MemoryStarter
+from core.cpu.config.memory_config import Config
+from core.reader.file_reader import FileReader
+
+
+class VectorizedBenchmark:
+    """
+    Compares the per-machine cost of the scalar interpreter against the lockstep VectorizedCpu on a ROM
+    """
+
+    def __init__(self, rom_path='roms/Tetris.ch8', num_cycles=2000, batch_sizes=(1, 100, 1000, 10000)):
+        self.rom_path = rom_path
+        self.num_cycles = num_cycles
+        self.batch_sizes = batch_sizes
+        self.rom = FileReader.load_binary_to_buffer(FileReader.file_reader(rom_path))
+
+    def measure_scalar(self):
+        chip8_cpu = Cpu()
+        memory_management = MemoryStarter(chip8_cpu)
+        memory_management.load_into_memory(self.rom, Config.MEMORY_START_ADDRESS)
+        memory_management.load_into_memory(Config.FONT_SET, Config.FONT_SET_START_ADDRESS)
+        start = time.perf_counter()
+        chip8_cpu.run_cycles(self.num_cycles * 100)
+        return (time.perf_counter() - start) / (self.num_cycles * 100)
+
+    def measure_vectorized(self, num_machines):
+        vectorized_cpu = VectorizedCpu(num_machines, seed=0)
+        vectorized_cpu.load_into_memory(self.rom, Config.MEMORY_START_ADDRESS)
+        start = time.perf_counter()
+        vectorized_cpu.step(self.num_cycles)
+        elapsed = time.perf_counter() - start
+        return elapsed / (self.num_cycles * num_machines), vectorized_cpu.divergence_statistics()
+
+    def run(self):
+        scalar_cost = self.measure_scalar()
+        print(f'ROM: {self.rom_path}')
+        print(f'Scalar interpreter: {scalar_cost * 1e9:,.0f} ns per machine-instruction')
+
+        for num_machines in self.batch_sizes:
+            vectorized_cost, statistics = self.measure_vectorized(num_machines)
+            print(f'Vectorized x{num_machines}: {vectorized_cost * 1e9:,.0f} ns per machine-instruction '
+                  f'({scalar_cost / vectorized_cost:.2f}x), '
+                  f'{statistics["mean_classes_per_step"]:.2f} classes/step, '
+                  f'mean divergent steps {np.mean(statistics["divergent_steps"]):.0f}')
+
+
+if __name__ == '__main__':
+    VectorizedBenchmark().run()
@@ -0,0 +1,116 @@
+import sys
+
+from core.cpu.instructions import Cpu
+from core.cpu.decoder import Decoder
+from core.cpu.config.memory_config import Config
+
+
+class Disassembler:
+    """
+    Turns opcodes into mnemonics, resolving them with the same hex-digit keyed table the Cpu dispatches from
+    """
+    MNEMONICS = {
+        'clear_the_display': 'CLS',
+        'return_from_subroutine': 'RET',
+        'scroll_display_down': 'SCD {n}',
+        'scroll_display_right': 'SCR',
+        'scroll_display_left': 'SCL',
+        'exit_interpreter': 'EXIT',
+        'low_resolution_mode': 'LOW',
+        'high_resolution_mode': 'HIGH',
+        'jump_to_location': 'JP {nnn:#05x}',
+        'call_to_location': 'CALL {nnn:#05x}',
+        'skip_instr_register_x_equals_kk': 'SE V{x:X}, {kk:#04x}',
+        'skip_instr_register_x_not_equal_kk': 'SNE V{x:X}, {kk:#04x}',
+        'skip_instr_register_x_equal_y': 'SE V{x:X}, V{y:X}',
+        'load_value_into_register': 'LD V{x:X}, {kk:#04x}',
+        'load_value_into_register_add': 'ADD V{x:X}, {kk:#04x}',
+        'load_register_y_into_register_x': 'LD V{x:X}, V{y:X}',
+        'cmp_or_x_y_into_register_x': 'OR V{x:X}, V{y:X}',
+        'cmp_and_x_y_into_register_x': 'AND V{x:X}, V{y:X}',
+        'cmp_xor_x_y_into_register_x': 'XOR V{x:X}, V{y:X}',
+        'add_x_y_into_register_x': 'ADD V{x:X}, V{y:X}',
+        'sub_x_y_into_register_x': 'SUB V{x:X}, V{y:X}',
+        'div_x_into_register_x': 'SHR V{x:X}',
+        'sub_y_x_into_register_x': 'SUBN V{x:X}, V{y:X}',
+        'mul_x_into_register_x': 'SHL V{x:X}',
+        'skip_instr_register_x_not_equal_y': 'SNE V{x:X}, V{y:X}',
+        'store_addr_on_index': 'LD I, {nnn:#05x}',
+        'jump_to_location_nnn_plus_register_zero': 'JP V0, {nnn:#05x}',
+        'store_random_number_on_register_x': 'RND V{x:X}, {kk:#04x}',
+        'display_bytes_on_screen': 'DRW V{x:X}, V{y:X}, {n}',
+        'skip_instruction_if_key_pressed': 'SKP V{x:X}',
+        'not_skip_instruction_if_key_pressed': 'SKNP V{x:X}',
+        'delay_timer_on_register_x': 'LD V{x:X}, DT',
+        'wait_for_key_press': 'LD V{x:X}, K',
+        'register_x_on_delay_timer': 'LD DT, V{x:X}',
+        'sound_timer_on_register_x': 'LD ST, V{x:X}',
+        'add_register_x_and_index': 'ADD I, V{x:X}',
+        'stores_on_index_hex_sprite': 'LD F, V{x:X}',
+        'stores_on_index_large_hex_sprite': 'LD HF, V{x:X}',
+        'load_bcd_on_memory': 'LD B, V{x:X}',
+        'load_registers_onto_memory': 'LD [I], V{x:X}',
+        'load_memory_onto_register': 'LD V{x:X}, [I]',
+        'store_registers_on_rpl_flags': 'LD R, V{x:X}',
+        'load_rpl_flags_onto_registers': 'LD V{x:X}, R',
+    }
+
+    def __init__(self, chip8_cpu=None):
+        self.chip8_cpu = chip8_cpu if chip8_cpu is not None else Cpu()
+
+    def handler_name(self, opcode):
+        """
+        Name of the Cpu handler of the opcode, None when the opcode is not mapped
+        """
+        handler = Decoder.lookup_handler(self.chip8_cpu.instructions_table, opcode)
+        return None if handler is None else handler.__name__
+
+    def mnemonic(self, opcode):
+        handler_name = self.handler_name(opcode)
+        if handler_name not in self.MNEMONICS:
+            return f'DW {opcode:#06x}'
+        return self.MNEMONICS[handler_name].format(
+            x=(opcode & 0x0F00) >> 8, y=(opcode & 0x00F0) >> 4, n=opcode & 0x000F, kk=opcode & 0x00FF,
+            nnn=opcode & 0x0FFF)
+
+    def listing(self, rom_bytes, analysis=None, starting_address=Config.MEMORY_START_ADDRESS):
+        """
+        Text listing of the ROM. With an analysis only reachable code is disassembled, the rest is dumped as data
+        with subroutines, loop headers and sprites labelled.
+        """
+        code_addresses = None
+        labels = {}
+        if analysis is not None:
+            code_addresses = {address for address, _ in analysis['instructions']}
+            for subroutine in analysis['subroutines']:
+                labels[subroutine] = f'sub_{subroutine:03x}'
+            for loop in analysis['loops']:
+                labels.setdefault(loop['header'], f'loop_{loop["header"]:03x}')
+            for sprite in analysis['sprites']:
+                labels.setdefault(sprite['address'], f'sprite_{sprite["address"]:03x} ({sprite["height"]} rows)')
+
+        lines = []
+        offset = 0
+        while offset < len(rom_bytes):
+            address = starting_address + offset
+            if address in labels:
+                lines.append(f'{labels[address]}:')
+            if offset + 1 < len(rom_bytes) and (code_addresses is None or address in code_addresses):
+                opcode = rom_bytes[offset] << 8 | rom_bytes[offset + 1]
+                lines.append(f'  {address:#05x}  {opcode:04x}  {self.mnemonic(opcode)}')
+                offset += 2
+            else:
+                byte = rom_bytes[offset]
+                lines.append(f'  {address:#05x}  {byte:02x}    DB {byte:#04x}  ; {byte:08b}')
+                offset += 1
+        return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    from core.analysis.rom_analyzer import RomAnalyzer
+    from core.reader.file_reader import FileReader
+
+    rom_path = sys.argv[1] if len(sys.argv) > 1 else 'roms/Tetris.ch8'
+    rom = FileReader.file_reader(rom_path)
+    disassembler = Disassembler()
+    print(disassembler.listing(rom, RomAnalyzer(disassembler).cached_analysis(rom)))
@@ -0,0 +1,230 @@
+import json
+import sys
+
+from core.analysis.disassembler import Disassembler
+from core.cpu.config.memory_config import Config
+from core.reader.rom_library import RomLibrary
+
+
+class RomAnalyzer:
+    """
+    Static control flow analysis of a ROM by recursive traversal from the entry point.
+
+    Only instructions reachable through jumps, calls, returns and skips are decoded as code, so interleaved sprite and
+    table bytes are never mistaken for instructions. Bnnn jumps depend on V0 at run time, their targets can't be
+    followed and are reported instead.
+
+    The analysis is a JSON-compatible dict:
+        instructions: [address, opcode] of every reachable instruction
+        blocks: basic blocks as {start, end, successors}, end being the address of the last instruction
+        subroutines: call targets
+        loops: back edges of the control flow graph as {header, latch}
+        sprites: {address, height} of every sprite drawn from an address set by a preceding Annn in the same block
+        data_ranges: [start, end) ranges of ROM bytes that were never reached as code
+        indirect_jumps: addresses of the Bnnn instructions
+    """
+    # Bumped whenever the analysis output changes, so stale cached analyses are not reused
+    VERSION = 2
+
+    SKIP_HANDLERS = frozenset((
+        'skip_instr_register_x_equals_kk',
+        'skip_instr_register_x_not_equal_kk',
+        'skip_instr_register_x_equal_y',
+        'skip_instr_register_x_not_equal_y',
+        'skip_instruction_if_key_pressed',
+        'not_skip_instruction_if_key_pressed',
+    ))
+    INDEX_CLOBBERING_HANDLERS = frozenset((
+        'add_register_x_and_index',
+        'stores_on_index_hex_sprite',
+        'stores_on_index_large_hex_sprite',
+        'load_bcd_on_memory',
+        'load_registers_onto_memory',
+        'load_memory_onto_register',
+    ))
+
+    def __init__(self, disassembler=None, rom_library=None):
+        self.disassembler = disassembler if disassembler is not None else Disassembler()
+        self.rom_library = rom_library if rom_library is not None else RomLibrary()
+
+    def successors(self, address, opcode):
+        """
+        Addresses execution can continue at after the instruction. A call continues at both its target and its
+        return site, Bnnn and 00EE have no statically known successor and 00FD has none.
+        """
+        handler_name = self.disassembler.handler_name(opcode)
+        nnn = opcode & 0x0FFF
+        if handler_name == 'jump_to_location':
+            return [nnn]
+        if handler_name == 'call_to_location':
+            return [nnn, address + 2]
+        if handler_name in ('return_from_subroutine', 'jump_to_location_nnn_plus_register_zero', 'exit_interpreter',
+                            None):
+            return []
+        if handler_name in self.SKIP_HANDLERS:
+            return [address + 2, address + 4]
+        return [address + 2]
+
+    def analyze(self, rom_bytes, starting_address=Config.MEMORY_START_ADDRESS):
+        end_address = starting_address + len(rom_bytes)
+
+        def read_opcode(address):
+            offset = address - starting_address
+            return rom_bytes[offset] << 8 | rom_bytes[offset + 1]
+
+        instructions = {}
+        leaders = {starting_address}
+        subroutines = set()
+        indirect_jumps = []
+        pending = [starting_address]
+        while pending:
+            address = pending.pop()
+            if address in instructions or not starting_address <= address < end_address - 1:
+                continue
+            opcode = read_opcode(address)
+            instructions[address] = opcode
+            handler_name = self.disassembler.handler_name(opcode)
+            next_addresses = self.successors(address, opcode)
+
+            if handler_name == 'call_to_location':
+                subroutines.add(opcode & 0x0FFF)
+            elif handler_name == 'jump_to_location_nnn_plus_register_zero':
+                indirect_jumps.append(address)
+            if next_addresses != [address + 2]:
+                leaders.update(next_addresses)
+                leaders.add(address + 2)
+            pending.extend(next_addresses)
+
+        blocks = {}
+        for start in sorted(leaders & instructions.keys()):
+            address = start
+            while True:
+                next_addresses = self.successors(address, instructions[address])
+                if next_addresses != [address + 2] or address + 2 in leaders or address + 2 not in instructions:
+                    break
+                address += 2
+            blocks[start] = {
+                'start': start,
+                'end': address,
+                'successors': sorted(a for a in next_addresses if a in instructions),
+            }
+
+        return {
+            'version': self.VERSION,
+            'entry': starting_address,
+            'instructions': sorted(instructions.items()),
+            'blocks': [blocks[start] for start in sorted(blocks)],
+            'subroutines': sorted(subroutines & instructions.keys()),
+            'loops': self.back_edges(blocks, starting_address),
+            'sprites': self.sprites(blocks, instructions, starting_address),
+            'data_ranges': self.data_ranges(instructions, starting_address, end_address),
+            'indirect_jumps': sorted(indirect_jumps),
+        }
+
+    @staticmethod
+    def back_edges(blocks, entry):
+        """
+        Edges to a block still on the depth first search path, each one closing a loop
+        """
+        loops = []
+        visited = set()
+        on_path = set()
+        stack = [(entry, iter(blocks[entry]['successors']))] if entry in blocks else []
+        if stack:
+            visited.add(entry)
+            on_path.add(entry)
+        while stack:
+            start, successors = stack[-1]
+            successor = next(successors, None)
+            if successor is None:
+                stack.pop()
+                on_path.discard(start)
+            elif successor in on_path:
+                loops.append({'header': successor, 'latch': blocks[start]['end']})
+            elif successor not in visited and successor in blocks:
+                visited.add(successor)
+                on_path.add(successor)
+                stack.append((successor, iter(blocks[successor]['successors'])))
+        return sorted(loops, key=lambda loop: (loop['header'], loop['latch']))
+
+    def sprites(self, blocks, instructions, entry):
+        """
+        Sprites drawn by Dxyn, found by propagating the constant loaded into the index by Annn along the control flow
+        graph. The index is unknown after Fx1E, Fx29, Fx30 and Fx33/Fx55/Fx65, at a Bnnn target and when returning from
+        a call, and where different constants meet. The height of a sprite is the largest n it was drawn with, 16 for
+        the 16x16 sprites of Dxy0.
+        """
+        unknown = object()
+        index_in = {entry: None}
+        pending = [entry]
+        sprites = {}
+        while pending:
+            start = pending.pop()
+            index = index_in[start]
+            end = blocks[start]['end']
+            for address in range(start, end + 2, 2):
+                opcode = instructions[address]
+                handler_name = self.disassembler.handler_name(opcode)
+                if handler_name == 'store_addr_on_index':
+                    index = opcode & 0x0FFF
+                elif handler_name in self.INDEX_CLOBBERING_HANDLERS:
+                    index = None
+                elif handler_name == 'display_bytes_on_screen' and index is not None:
+                    sprites[index] = max(sprites.get(index, 0), opcode & 0x000F or 16)
+
+            is_call = self.disassembler.handler_name(instructions[end]) == 'call_to_location'
+            for successor in blocks[start]['successors']:
+                successor_index = None if is_call and successor == end + 2 else index
+                previous = index_in.get(successor, unknown)
+                if previous is unknown:
+                    index_in[successor] = successor_index
+                elif previous is not None and previous != successor_index:
+                    index_in[successor] = None
+                else:
+                    continue
+                pending.append(successor)
+
+        return [{'address': address, 'height': height} for address, height in sorted(sprites.items())]
+
+    @staticmethod
+    def data_ranges(instructions, starting_address, end_address):
+        code_bytes = set()
+        for address in instructions:
+            code_bytes.update((address, address + 1))
+
+        ranges = []
+        range_start = None
+        for address in range(starting_address, end_address + 1):
+            is_data = address < end_address and address not in code_bytes
+            if is_data and range_start is None:
+                range_start = address
+            elif not is_data and range_start is not None:
+                ranges.append([range_start, address])
+                range_start = None
+        return ranges
+
+    def cached_analysis(self, rom_bytes, starting_address=Config.MEMORY_START_ADDRESS):
+        """
+        Analysis of the ROM, read from the ROM library artifact cache when it was already analyzed
+        """
+        rom_bytes = bytes(rom_bytes)
+        data = self.rom_library.cached_artifact(
+            RomLibrary.rom_hash(rom_bytes), f'analysis-v{self.VERSION}-{starting_address:03x}.json',
+            lambda: json.dumps(self.analyze(rom_bytes, starting_address)).encode())
+        return json.loads(data)
+
+
+if __name__ == '__main__':
+    from core.reader.file_reader import FileReader
+
+    rom_path = sys.argv[1] if len(sys.argv) > 1 else 'roms/Tetris.ch8'
+    analysis = RomAnalyzer().cached_analysis(FileReader.file_reader(rom_path))
+    subroutines = ', '.join(f'{address:#05x}' for address in analysis['subroutines'])
+    loops = ', '.join(f'{loop["header"]:#05x}<-{loop["latch"]:#05x}' for loop in analysis['loops'])
+    sprites = ', '.join(f'{sprite["address"]:#05x}x{sprite["height"]}' for sprite in analysis['sprites'])
+    data_ranges = ', '.join(f'{start:#05x}-{end:#05x}' for start, end in analysis['data_ranges'])
+    print(f'{len(analysis["instructions"])} instructions in {len(analysis["blocks"])} blocks')
+    print(f'subroutines: {subroutines}')
+    print(f'loops: {loops}')
+    print(f'sprites: {sprites}')
+    print(f'data: {data_ranges}')
@@ -0,0 +1,206 @@
+import hashlib
+import threading
+import time
+import wave
+
+from core.lazy_import import lazy_import
+
+np = lazy_import('numpy')
+
+
+class AudioRingBuffer:
+    """
+    Preallocated single-producer single-consumer ring of int16 samples.
+
+    The producer only advances the written counter and the consumer only the consumed one, so neither side ever takes
+    a lock or waits: a write that does not fit is dropped whole and counted as an overrun, a read returns whatever is
+    available.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.samples = np.zeros(capacity, dtype=np.int16)
+        self.written = 0
+        self.consumed = 0
+        self.overruns = 0
+        self.dropped_samples = 0
+
+    @property
+    def available(self):
+        return self.written - self.consumed
+
+    def write(self, samples):
+        """
+        Appends the samples, returning False when they were dropped because the ring is full
+        """
+        count = len(samples)
+        if self.capacity - (self.written - self.consumed) < count:
+            self.overruns += 1
+            self.dropped_samples += count
+            return False
+        start = self.written % self.capacity
+        first = min(count, self.capacity - start)
+        self.samples[start:start + first] = samples[:first]
+        self.samples[:count - first] = samples[first:]
+        self.written += count
+        return True
+
+    def read(self, max_samples=None):
+        """
+        Copy of the available samples, at most max_samples of them
+        """
+        count = self.written - self.consumed
+        if max_samples is not None:
+            count = min(count, max_samples)
+        start = self.consumed % self.capacity
+        first = min(count, self.capacity - start)
+        samples = np.concatenate((self.samples[start:start + first], self.samples[:count - first]))
+        self.consumed += count
+        return samples
+
+
+class SoundTimerAudio:
+    """
+    Synthesizes the sound timer as square-wave PCM, usable as a Scheduler play_audio hook.
+
+    Every 60 Hz tick appends sample_rate / 60 samples to an AudioRingBuffer: a tone while the sound timer is above
+    zero, silence otherwise, with the wave phase carried across ticks so consecutive beeping ticks join without
+    clicks.
+
+    With a live_sink, a consumer thread drains the ring every drain_interval, or as soon as the ring is half full, to
+    the sink and to the optional 16 bit mono WAV file, so the emulation thread only fills one block per tick and never
+    waits on I/O. Blocks arriving while the ring is full are dropped and counted as overruns, and when the emulation
+    falls more than latency seconds behind the playback clock the missing samples are played as silence and counted
+    as an underrun.
+
+    Without a live sink nothing is played in real time, so there is no consumer thread: the emulation thread drains
+    the ring to the WAV file itself whenever the next block would not fit. No block is ever dropped and the WAV file
+    holds exactly the synthesized samples, the same on every replay however fast the run.
+    """
+    CHANNELS = 1
+    SAMPLE_WIDTH = 2
+    TIMER_FREQUENCY = 60
+
+    def __init__(self, file_path=None, live_sink=None, sample_rate=44100, frequency=440, amplitude=0.25,
+                 buffer_seconds=4.0, drain_interval=0.01, latency=0.05):
+        if sample_rate % self.TIMER_FREQUENCY:
+            raise ValueError(f'sample_rate must be a multiple of {self.TIMER_FREQUENCY} Hz')
+        self.file_path = file_path
+        self.live_sink = live_sink
+        self.sample_rate = sample_rate
+        self.frequency = frequency
+        self.amplitude = int(amplitude * 0x7FFF)
+        self.drain_interval = drain_interval
+        self.latency = latency
+        self.samples_per_tick = sample_rate // self.TIMER_FREQUENCY
+        self.ring = AudioRingBuffer(int(sample_rate * buffer_seconds))
+
+        self.sample_offsets = np.arange(self.samples_per_tick, dtype=np.int64)
+        self.silence = np.zeros(self.samples_per_tick, dtype=np.int16)
+        self.tone_block = np.empty(self.samples_per_tick, dtype=np.int16)
+        self.phase = 0
+        self.ticks = 0
+        self.tone_ticks = 0
+
+        self.underruns = 0
+        self.silence_padded = 0
+        self.samples_played = 0
+        self.samples_saved = 0
+        self.digest = hashlib.blake2b(digest_size=16)
+        self.wav_file = None
+        if file_path is not None:
+            self.wav_file = wave.open(file_path, 'wb')
+            self.wav_file.setnchannels(self.CHANNELS)
+            self.wav_file.setsampwidth(self.SAMPLE_WIDTH)
+            self.wav_file.setframerate(sample_rate)
+        self.closing = False
+        self.wakeup = threading.Event()
+        self.consumer = None
+        if live_sink is not None:
+            self.consumer = threading.Thread(target=self.drain, name='audio-consumer', daemon=True)
+            self.consumer.start()
+
+    def __call__(self, chip8_cpu):
+        if chip8_cpu.sound_timer > 0:
+            half_periods = (self.sample_offsets + self.phase) * (2 * self.frequency) // self.sample_rate
+            np.copyto(self.tone_block, np.where(half_periods & 1, -self.amplitude, self.amplitude))
+            self.phase += self.samples_per_tick
+            self.tone_ticks += 1
+            block = self.tone_block
+        else:
+            self.phase = 0
+            block = self.silence
+        self.digest.update(block)
+        self.ticks += 1
+        if self.consumer is None:
+            if self.ring.capacity - self.ring.available < len(block):
+                self.save(self.ring.read())
+            self.ring.write(block)
+            return
+        self.ring.write(block)
+        if self.ring.available > self.ring.capacity // 2 and not self.wakeup.is_set():
+            self.wakeup.set()
+
+    def drain(self):
+        clock = time.perf_counter
+        playback_start = None
+        while True:
+            self.wakeup.wait(self.drain_interval)
+            self.wakeup.clear()
+            closing = self.closing
+            samples = self.ring.read()
+            if len(samples):
+                self.save(samples)
+            if self.live_sink is not None and (len(samples) or playback_start is not None):
+                if playback_start is None:
+                    playback_start = clock()
+                due = int((clock() - playback_start - self.latency) * self.sample_rate) - self.samples_played
+                if not closing and due > len(samples):
+                    self.underruns += 1
+                    self.silence_padded += due - len(samples)
+                    samples = np.concatenate((samples, np.zeros(due - len(samples), dtype=np.int16)))
+                if len(samples):
+                    self.live_sink(samples)
+                    self.samples_played += len(samples)
+            if closing and not self.ring.available:
+                break
+
+    def save(self, samples):
+        data = samples.astype('<i2').tobytes()
+        self.samples_saved += len(samples)
+        if self.wav_file is not None:
+            self.wav_file.writeframes(data)
+
+    def close(self):
+        """
+        Drains the remaining samples and waits for the consumer, if any, to finish the WAV file
+        """
+        self.closing = True
+        if self.consumer is not None:
+            self.wakeup.set()
+            self.consumer.join()
+        elif self.ring.available:
+            self.save(self.ring.read())
+        if self.wav_file is not None:
+            self.wav_file.close()
+            self.wav_file = None
+
+    def statistics(self):
+        return {
+            'sample_rate': self.sample_rate,
+            'ticks': self.ticks,
+            'tone_ticks': self.tone_ticks,
+            'samples_written': self.ring.written,
+            'samples_saved': self.samples_saved,
+            'overruns': self.ring.overruns,
+            'dropped_samples': self.ring.dropped_samples,
+            'underruns': self.underruns,
+            'silence_padded': self.silence_padded,
+            'audio_hash': self.digest.hexdigest(),
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception_info):
+        self.close()
@@ -0,0 +1,250 @@
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import struct
+import sys
+import time
+import zlib
+from multiprocessing.connection import wait
+
+from core.capture.frame_capture import FrameCapture
+from core.input.movie import InputMovie, MoviePlayer
+from core.main import Main
+from core.reader.file_reader import FileReader
+from core.reader.rom_library import RomLibrary
+from core.scheduler.scheduler import Scheduler
+from core.state.save_state import SaveState
+
+
+class BatchJob:
+    """
+    One headless run of a ROM.
+
+    The input script is a list of [tick, keys] entries, each one setting the keys pressed from that timer tick on, keys
+    being keypad indexes 0x0-0xF. Alternatively movie_path replays an InputMovie, taking the seed, the clock rate and
+    the number of ticks from it. Every frame is checksummed with CRC-32 of the packed frame buffer, and also streamed to
+    a FrameCapture file when capture_path is set. trace_path writes an execution trace of the run and audio_path the
+    sound timer audio as a WAV file, whose hash and statistics are added to the result. serve_address ('unix:PATH' or
+    'tcp:PORT') publishes the frames to spectators through a FrameServer while the job runs. A job that can't even be
+    set up, its capture file, server or machine failing to open, is reported as an 'error' like a failing run.
+    """
+
+    def __init__(self, rom_path, num_cycles=100000, input_script=None, seed=0, mode=Main.INTERPRETER_MODE,
+                 backend=Main.NUMPY_BACKEND, instructions_per_second=700, timeout=30.0, movie_path=None,
+                 capture_path=None, trace_path=None, audio_path=None, serve_address=None):
+        self.rom_path = rom_path
+        self.num_cycles = num_cycles
+        self.input_script = input_script or []
+        self.movie_path = movie_path
+        self.capture_path = capture_path
+        self.trace_path = trace_path
+        self.audio_path = audio_path
+        self.serve_address = serve_address
+        self.seed = seed
+        self.mode = mode
+        self.backend = backend
+        self.instructions_per_second = instructions_per_second
+        self.timeout = timeout
+
+    @classmethod
+    def from_manifest_entry(cls, entry, defaults):
+        """
+        Manifest entries are a ROM path or an object with a path plus any BatchJob argument overriding the defaults
+        """
+        if isinstance(entry, str):
+            entry = {'path': entry}
+        arguments = dict(defaults, **{key: value for key, value in entry.items() if key != 'path'})
+        return cls(entry['path'], **arguments)
+
+    def run(self):
+        """
+        Runs the job in the current process. The timeout is checked once per timer tick, so a job only outlives it
+        when a single tick hangs, which the BatchRunner handles by killing the process.
+        """
+        if self.movie_path is not None:
+            movie = InputMovie.load(self.movie_path)
+            max_ticks = movie.num_ticks
+        else:
+            movie = InputMovie.from_input_script(self.input_script, seed=self.seed,
+                                                 instructions_per_second=self.instructions_per_second)
+            max_ticks = math.ceil(self.num_cycles * Scheduler.TIMER_FREQUENCY / self.instructions_per_second)
+
+        frame_checksums = []
+        frame_capture = None
+        frame_server = None
+
+        def present_frame(chip8_cpu):
+            frame_checksums.append(zlib.crc32(chip8_cpu.frame_buffer.to_bytes()))
+            if frame_capture is not None:
+                frame_capture(chip8_cpu)
+            if frame_server is not None:
+                frame_server(chip8_cpu)
+
+        runner = None
+        status = 'ok'
+        error = None
+        start = time.perf_counter()
+        try:
+            try:
+                if self.capture_path is not None:
+                    frame_capture = FrameCapture(self.capture_path)
+                if self.serve_address is not None:
+                    # asyncio is only imported by the jobs that are watched
+                    from core.stream.frame_server import FrameServer
+                    frame_server = FrameServer.from_address(self.serve_address).start()
+                runner = Main(self.mode, scheduler_mode=Scheduler.HEADLESS_MODE,
+                              instructions_per_second=movie.instructions_per_second, rom_path=self.rom_path,
+                              backend=self.backend, seed=movie.seed, poll_input=MoviePlayer(movie),
+                              present_frame=present_frame, trace_path=self.trace_path, audio_path=self.audio_path)
+                scheduler = runner.scheduler
+                start = time.perf_counter()
+                deadline = start + self.timeout
+                rom_hash = RomLibrary.rom_hash(FileReader.file_reader(self.rom_path))
+                if movie.rom_hash is not None and movie.rom_hash != rom_hash:
+                    raise ValueError(f'{self.movie_path} was recorded on another ROM ({movie.rom_hash})')
+                runner.load()
+                while scheduler.ticks < max_ticks:
+                    scheduler.tick()
+                    if time.perf_counter() > deadline:
+                        status = 'timeout'
+                        error = f'stopped after {self.timeout}s'
+                        break
+            except Exception as exception:
+                status = 'error'
+                error = f'{type(exception).__name__}: {exception}'
+            elapsed = time.perf_counter() - start
+        finally:
+            if runner is not None:
+                runner.close()
+            if frame_capture is not None:
+                frame_capture.close()
+            if frame_server is not None:
+                frame_server.close()
+
+        if runner is None:
+            return {'path': self.rom_path, 'status': status, 'error': error, 'seed': movie.seed}
+        chip8_cpu = runner.chip8_cpu
+        cycles = scheduler.instructions_executed + scheduler.instructions_skipped
+        result = {
+            'path': self.rom_path,
+            'status': status,
+            'error': error,
+            'seed': movie.seed,
+            'cycles': cycles,
+            'ticks': scheduler.ticks,
+            'frames': len(frame_checksums),
+            'elapsed': elapsed,
+            'ips': cycles / max(elapsed, 1e-9),
+            'state_hash': hashlib.blake2b(SaveState.capture(chip8_cpu).data, digest_size=16).hexdigest(),
+            'frames_hash': hashlib.blake2b(struct.pack(f'<{len(frame_checksums)}I', *frame_checksums),
+                                           digest_size=16).hexdigest(),
+            'frame_checksums': frame_checksums,
+        }
+        if runner.audio is not None:
+            result['audio'] = runner.audio.statistics()
+        if frame_server is not None:
+            result['stream'] = frame_server.statistics()
+        return result
+
+
+def run_job(job, connection):
+    try:
+        connection.send(job.run())
+    finally:
+        connection.close()
+
+
+class BatchRunner:
+    """
+    Runs BatchJobs headless across worker processes, at most one per available core at a time.
+
+    Every job gets its own forked process, so a job that crashes the interpreter or hangs inside a tick can't take
+    down or stall the others: it is reported as 'crashed', or killed and reported as 'timeout' once its timeout plus
+    KILL_GRACE seconds passed.
+    """
+    KILL_GRACE = 5.0
+
+    def __init__(self, jobs, num_workers=None):
+        self.jobs = list(jobs)
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.context = multiprocessing.get_context('fork' if sys.platform != 'win32' else 'spawn')
+
+    @classmethod
+    def from_path(cls, path, num_workers=None, **defaults):
+        """
+        Jobs for every ROM below a directory or listed in a JSON manifest file
+        """
+        if os.path.isdir(path):
+            rom_paths = []
+            for root, _, file_names in os.walk(path):
+                rom_paths.extend(os.path.join(root, file_name) for file_name in sorted(file_names)
+                                 if file_name.lower().endswith(RomLibrary.ROM_EXTENSIONS))
+            return cls([BatchJob(rom_path, **defaults) for rom_path in sorted(rom_paths)], num_workers)
+
+        with open(path) as manifest_file:
+            manifest = json.load(manifest_file)
+        if isinstance(manifest, dict):
+            defaults = dict(defaults, **manifest.get('defaults', {}))
+            manifest = manifest['roms']
+        return cls([BatchJob.from_manifest_entry(entry, defaults) for entry in manifest], num_workers)
+
+    def start_job(self, job_index):
+        receiver, sender = self.context.Pipe(duplex=False)
+        process = self.context.Process(target=run_job, args=(self.jobs[job_index], sender), daemon=True)
+        process.start()
+        sender.close()
+        return process, receiver
+
+    def failed_result(self, job, status, error):
+        return {'path': job.rom_path, 'status': status, 'error': error, 'seed': job.seed}
+
+    def run(self):
+        """
+        Runs every job and returns the report with the results in job order
+        """
+        results = [None] * len(self.jobs)
+        running = {}
+        pending = list(range(len(self.jobs)))[::-1]
+        start = time.perf_counter()
+
+        while pending or running:
+            while pending and len(running) < self.num_workers:
+                job_index = pending.pop()
+                process, receiver = self.start_job(job_index)
+                deadline = time.perf_counter() + self.jobs[job_index].timeout + self.KILL_GRACE
+                running[receiver] = (job_index, process, deadline)
+
+            next_deadline = min(deadline for _, _, deadline in running.values())
+            for receiver in wait(list(running), timeout=max(next_deadline - time.perf_counter(), 0)):
+                job_index, process, _ = running.pop(receiver)
+                job = self.jobs[job_index]
+                try:
+                    results[job_index] = receiver.recv()
+                except EOFError:
+                    process.join()
+                    results[job_index] = self.failed_result(job, 'crashed', f'exit code {process.exitcode}')
+                receiver.close()
+                process.join()
+
+            now = time.perf_counter()
+            for receiver, (job_index, process, deadline) in list(running.items()):
+                if now >= deadline:
+                    process.kill()
+                    process.join()
+                    receiver.close()
+                    del running[receiver]
+                    results[job_index] = self.failed_result(self.jobs[job_index], 'timeout', 'killed')
+
+        elapsed = time.perf_counter() - start
+        total_cycles = sum(result.get('cycles', 0) for result in results)
+        return {
+            'workers': self.num_workers,
+            'elapsed': elapsed,
+            'total_cycles': total_cycles,
+            'aggregate_ips': total_cycles / max(elapsed, 1e-9),
+            'statuses': {status: sum(result['status'] == status for result in results)
+                         for status in sorted({result['status'] for result in results})},
+            'results': results,
+        }
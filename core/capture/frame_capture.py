@@ -0,0 +1,276 @@
+import bisect
+import mmap
+import os
+import queue
+import struct
+import threading
+import zlib
+
+from core.cpu.framebuffer import FrameBuffer
+from core.state.delta_codec import DeltaCodec
+
+
+class FrameCapture:
+    """
+    Streams presented frames to a capture file, usable as a Scheduler present_frame hook.
+
+    A frame equal to the previous one only increments a repeat count. Every distinct frame is handed to a writer
+    thread, which encodes it as a zlib keyframe every keyframe_interval distinct frames, or else as a XOR/RLE delta
+    against the previous distinct frame, and writes it through a large file buffer. The emulation thread only packs
+    the frame and compares it with the previous one, it never encodes nor waits on I/O.
+
+    The resolution is taken from the frame buffer of every frame: a frame of another resolution than the previous one,
+    e.g. after 00FF, always starts a new keyframe, and every keyframe records the resolution of the frames up to the
+    next one.
+
+    File layout: FILE_HEADER, then one RECORD (kind, number of frames, payload length) plus payload per distinct
+    frame, keyframe payloads starting with their RESOLUTION, then the keyframe index as INDEX_ENTRY (first frame, file
+    offset, width, height) entries and the FOOTER pointing to it.
+    """
+    MAGIC = b'CH8V'
+    VERSION = 2
+    FILE_HEADER = struct.Struct('<4sBH')
+    RECORD = struct.Struct('<BII')
+    RESOLUTION = struct.Struct('<HH')
+    INDEX_ENTRY = struct.Struct('<IQHH')
+    FOOTER = struct.Struct('<QI4s')
+
+    KEYFRAME = 0
+    DELTA = 1
+
+    WRITE_BUFFER_SIZE = 1024 * 1024
+
+    def __init__(self, file_path, keyframe_interval=300):
+        self.file_path = file_path
+        self.keyframe_interval = keyframe_interval
+        self.last_frame = None
+        self.last_resolution = None
+        self.repeat = 0
+        self.frames_captured = 0
+        self.distinct_frames = 0
+        self.frames_written = 0
+        self.bytes_written = 0
+
+        self.pending = queue.SimpleQueue()
+        self.capture_file = open(file_path, 'wb', buffering=self.WRITE_BUFFER_SIZE)
+        self.capture_file.write(self.FILE_HEADER.pack(self.MAGIC, self.VERSION, keyframe_interval))
+        self.writer = threading.Thread(target=self.write_frames, name='frame-capture-writer', daemon=True)
+        self.writer.start()
+
+    def __call__(self, chip8_cpu):
+        self.capture(chip8_cpu.frame_buffer)
+
+    def capture(self, frame_buffer):
+        frame = frame_buffer.to_bytes()
+        resolution = (frame_buffer.width, frame_buffer.height)
+        self.frames_captured += 1
+        if frame == self.last_frame and resolution == self.last_resolution:
+            self.repeat += 1
+            return
+        if self.last_frame is not None:
+            self.pending.put((self.last_frame, self.last_resolution, self.repeat))
+        self.last_frame = frame
+        self.last_resolution = resolution
+        self.repeat = 1
+
+    def write_frames(self):
+        capture_file = self.capture_file
+        keyframe_index = []
+        previous = None
+        previous_resolution = None
+        position = self.FILE_HEADER.size
+
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            frame, resolution, repeat = item
+            if resolution != previous_resolution or self.distinct_frames % self.keyframe_interval == 0:
+                keyframe_index.append((self.frames_written, position, *resolution))
+                kind, payload = self.KEYFRAME, self.RESOLUTION.pack(*resolution) + zlib.compress(frame)
+            else:
+                kind, payload = self.DELTA, DeltaCodec.encode(frame, previous)
+            capture_file.write(self.RECORD.pack(kind, repeat, len(payload)))
+            capture_file.write(payload)
+            position += self.RECORD.size + len(payload)
+            previous = frame
+            previous_resolution = resolution
+            self.distinct_frames += 1
+            self.frames_written += repeat
+
+        index_position = position
+        for entry in keyframe_index:
+            capture_file.write(self.INDEX_ENTRY.pack(*entry))
+        capture_file.write(self.FOOTER.pack(index_position, len(keyframe_index), self.MAGIC))
+        self.bytes_written = capture_file.tell()
+        capture_file.close()
+
+    def close(self):
+        """
+        Writes the last frame and the index and waits for the writer to finish
+        """
+        if self.last_frame is not None:
+            self.pending.put((self.last_frame, self.last_resolution, self.repeat))
+            self.last_frame = None
+        self.pending.put(None)
+        self.writer.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception_info):
+        self.close()
+
+
+class CaptureReader:
+    """
+    Random access to the frames of a memory-mapped capture file.
+
+    Seeking to frame n decodes from the closest keyframe at or before it, so at most keyframe_interval distinct
+    frames are decoded whatever the length of the capture. Files missing their index, e.g. from a run that was
+    killed, are indexed by scanning the record headers. keyframes holds (first frame, file offset, width, height)
+    entries, the resolution of a frame being the one of its keyframe.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with open(file_path, 'rb') as capture_file:
+            self.data = mmap.mmap(capture_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.keyframe_interval = FrameCapture.FILE_HEADER.unpack_from(self.data)
+        if magic != FrameCapture.MAGIC or version != FrameCapture.VERSION:
+            raise ValueError(f'{file_path} is not a version {FrameCapture.VERSION} frame capture')
+        self.records_end = len(self.data)
+        self.keyframes = self.read_index()
+        if self.keyframes is None:
+            self.keyframes = self.scan()
+        self.keyframe_frames = [frame for frame, _, _, _ in self.keyframes]
+        self.num_frames = self.count_frames()
+
+    def read_index(self):
+        footer_position = len(self.data) - FrameCapture.FOOTER.size
+        if footer_position < FrameCapture.FILE_HEADER.size:
+            return None
+        index_position, num_entries, magic = FrameCapture.FOOTER.unpack_from(self.data, footer_position)
+        if magic != FrameCapture.MAGIC or index_position + num_entries * FrameCapture.INDEX_ENTRY.size != \
+                footer_position:
+            return None
+        self.records_end = index_position
+        return [FrameCapture.INDEX_ENTRY.unpack_from(self.data, index_position + entry * FrameCapture.INDEX_ENTRY.size)
+                for entry in range(num_entries)]
+
+    def records(self, position=FrameCapture.FILE_HEADER.size):
+        """
+        Yields (position, kind, repeat, payload) of every complete record from position on
+        """
+        while position + FrameCapture.RECORD.size <= self.records_end:
+            kind, repeat, length = FrameCapture.RECORD.unpack_from(self.data, position)
+            payload_position = position + FrameCapture.RECORD.size
+            if payload_position + length > self.records_end:
+                return
+            yield position, kind, repeat, self.data[payload_position:payload_position + length]
+            position = payload_position + length
+
+    def scan(self):
+        keyframes = []
+        frame_number = 0
+        for position, kind, repeat, payload in self.records():
+            if kind == FrameCapture.KEYFRAME:
+                keyframes.append((frame_number, position, *FrameCapture.RESOLUTION.unpack_from(payload)))
+            frame_number += repeat
+        return keyframes
+
+    def count_frames(self):
+        if not self.keyframes:
+            return 0
+        frame_number, position, _, _ = self.keyframes[-1]
+        for _, _, repeat, _ in self.records(position):
+            frame_number += repeat
+        return frame_number
+
+    def __len__(self):
+        return self.num_frames
+
+    def close(self):
+        self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception_info):
+        self.close()
+
+    def decode(self, frame, kind, payload):
+        if kind == FrameCapture.KEYFRAME:
+            return zlib.decompress(payload[FrameCapture.RESOLUTION.size:])
+        return DeltaCodec.decode(payload, frame)
+
+    def keyframe(self, frame_number):
+        if not 0 <= frame_number < self.num_frames:
+            raise IndexError(f'frame {frame_number} out of range, the capture has {self.num_frames} frames')
+        return self.keyframes[bisect.bisect_right(self.keyframe_frames, frame_number) - 1]
+
+    def resolution(self, frame_number):
+        """
+        (width, height) of frame frame_number
+        """
+        _, _, width, height = self.keyframe(frame_number)
+        return width, height
+
+    def max_resolution(self):
+        """
+        Largest (width, height) in the capture, every resolution change starting a keyframe
+        """
+        return max(((width, height) for _, _, width, height in self.keyframes), default=(64, 32))
+
+    def frame(self, frame_number):
+        """
+        Packed rows of frame frame_number, as FrameBuffer.to_bytes() returned them
+        """
+        first_frame, position, _, _ = self.keyframe(frame_number)
+        frame = None
+        for _, kind, repeat, payload in self.records(position):
+            frame = self.decode(frame, kind, payload)
+            first_frame += repeat
+            if first_frame > frame_number:
+                return frame
+
+    def frame_buffer(self, frame_number):
+        frame_buffer = FrameBuffer(*self.resolution(frame_number))
+        frame_buffer.load_bytes(self.frame(frame_number))
+        return frame_buffer
+
+    def distinct_frames(self):
+        """
+        Yields (packed rows, (width, height), number of frames shown) of every distinct frame in order, decoding each
+        once
+        """
+        frame = None
+        resolution = None
+        for _, kind, repeat, payload in self.records():
+            if kind == FrameCapture.KEYFRAME:
+                resolution = FrameCapture.RESOLUTION.unpack_from(payload)
+            frame = self.decode(frame, kind, payload)
+            yield frame, resolution, repeat
+
+    def __iter__(self):
+        for frame, _, repeat in self.distinct_frames():
+            for _ in range(repeat):
+                yield frame
+
+    def statistics(self):
+        distinct_frames = raw_size = 0
+        frame_size = 0
+        for _, kind, repeat, payload in self.records():
+            if kind == FrameCapture.KEYFRAME:
+                width, height = FrameCapture.RESOLUTION.unpack_from(payload)
+                frame_size = width * height // 8
+            distinct_frames += 1
+            raw_size += repeat * frame_size
+        return {
+            'frames': self.num_frames,
+            'distinct_frames': distinct_frames,
+            'keyframes': len(self.keyframes),
+            'file_size': os.path.getsize(self.file_path),
+            'raw_size': raw_size,
+        }
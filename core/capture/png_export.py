@@ -0,0 +1,100 @@
+import os
+import struct
+import sys
+import zlib
+
+import numpy as np
+
+from core.capture.frame_capture import CaptureReader
+
+
+class PngExporter:
+    """
+    Writes captured frames as 1 bit grayscale PNG files or as one animated PNG, with the standard library only.
+
+    Packed frame rows already have the PNG 1 bit layout (leftmost pixel on the most significant bit), so a frame is
+    only unpacked when it is scaled up. In animated PNGs repeated frames become a longer frame delay, and as all frames
+    share one canvas sized for the largest resolution of the capture, low resolution frames are scaled up to fill it
+    the way a SUPER-CHIP display shows them.
+    """
+    SIGNATURE = b'\x89PNG\r\n\x1a\n'
+    FRAME_RATE = 60
+
+    def __init__(self, reader, scale=4):
+        self.reader = reader
+        self.scale = scale
+
+    @staticmethod
+    def chunk(chunk_type, data):
+        return b''.join((struct.pack('>I', len(data)), chunk_type, data,
+                         struct.pack('>I', zlib.crc32(chunk_type + data))))
+
+    @staticmethod
+    def scanlines(frame, resolution, scale):
+        """
+        zlib-compressed rows of the frame scaled up scale times, each one behind its filter type byte
+        """
+        rows = np.frombuffer(frame, dtype=np.uint8).reshape(resolution[1], -1)
+        if scale > 1:
+            pixels = np.unpackbits(rows, axis=1).repeat(scale, axis=0).repeat(scale, axis=1)
+            rows = np.packbits(pixels, axis=1)
+        filtered = np.hstack((np.zeros((len(rows), 1), dtype=np.uint8), rows))
+        return zlib.compress(filtered.tobytes(), 9)
+
+    def header(self, width, height):
+        return self.SIGNATURE + self.chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 1, 0, 0, 0, 0))
+
+    def png(self, frame, resolution):
+        width, height = resolution
+        return b''.join((self.header(width * self.scale, height * self.scale),
+                         self.chunk(b'IDAT', self.scanlines(frame, resolution, self.scale)), self.chunk(b'IEND', b'')))
+
+    def export_sequence(self, directory, start=0, stop=None):
+        """
+        Writes frames [start, stop) as directory/frame_000000.png and following, returning the number written
+        """
+        os.makedirs(directory, exist_ok=True)
+        stop = len(self.reader) if stop is None else min(stop, len(self.reader))
+        for frame_number in range(start, stop):
+            with open(os.path.join(directory, f'frame_{frame_number:06d}.png'), 'wb') as png_file:
+                png_file.write(self.png(self.reader.frame(frame_number), self.reader.resolution(frame_number)))
+        return max(stop - start, 0)
+
+    def export_animation(self, file_path, num_plays=0):
+        """
+        Writes the whole capture as an animated PNG looping num_plays times, 0 looping forever
+        """
+        frames = list(self.reader.distinct_frames())
+        canvas_width, canvas_height = self.reader.max_resolution()
+        width, height = canvas_width * self.scale, canvas_height * self.scale
+        chunks = [self.header(width, height), self.chunk(b'acTL', struct.pack('>II', len(frames), num_plays))]
+        sequence_number = 0
+        for frame_index, (frame, resolution, repeat) in enumerate(frames):
+            delay = (repeat, self.FRAME_RATE)
+            if repeat > 0xFFFF:
+                delay = (min(round(repeat / self.FRAME_RATE), 0xFFFF), 1)
+            chunks.append(self.chunk(b'fcTL', struct.pack('>IIIIIHHBB', sequence_number, width, height, 0, 0, *delay,
+                                                          0, 0)))
+            sequence_number += 1
+            scanlines = self.scanlines(frame, resolution, self.scale * canvas_width // resolution[0])
+            if frame_index == 0:
+                chunks.append(self.chunk(b'IDAT', scanlines))
+            else:
+                chunks.append(self.chunk(b'fdAT', struct.pack('>I', sequence_number) + scanlines))
+                sequence_number += 1
+        chunks.append(self.chunk(b'IEND', b''))
+        with open(file_path, 'wb') as png_file:
+            png_file.write(b''.join(chunks))
+        return len(frames)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print('usage: python -m core.capture.png_export CAPTURE OUTPUT.png|OUTPUT_DIRECTORY [scale]')
+        sys.exit(2)
+    with CaptureReader(sys.argv[1]) as capture_reader:
+        exporter = PngExporter(capture_reader, int(sys.argv[3]) if len(sys.argv) > 3 else 4)
+        if sys.argv[2].lower().endswith('.png'):
+            print(f'{exporter.export_animation(sys.argv[2])} distinct frames written to {sys.argv[2]}')
+        else:
+            print(f'{exporter.export_sequence(sys.argv[2])} frames written to {sys.argv[2]}')
@@ -0,0 +1,55 @@
+import argparse
+import os
+import sys
+import tempfile
+
+from core.main import Main
+from core.scheduler.scheduler import Scheduler
+
+# Beeps for half a second every second: V[A] = 30, sound timer = V[A], then waits 60 ticks on the delay timer
+BEEP_ROM_PATH = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, 'roms', 'beep.ch8')
+
+
+def audio_statistics(mode, backend, num_ticks, rom_path=BEEP_ROM_PATH):
+    """
+    Sound statistics of rom_path run headless for num_ticks on the given execution mode and state backend
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        runner = Main(mode=mode, scheduler_mode=Scheduler.HEADLESS_MODE, rom_path=rom_path, backend=backend,
+                      audio_path=os.path.join(directory, 'audio.wav'))
+        runner.run(num_ticks)
+        return runner.audio.statistics()
+
+
+def check_audio(num_ticks, rom_path=BEEP_ROM_PATH):
+    """
+    Runs rom_path on every mode and backend, returning the problems found: a run that never beeped, or that
+    synthesized different samples than the first one
+    """
+    problems = []
+    expected_hash = None
+    for mode in Main.MODES:
+        for backend in Main.BACKENDS:
+            statistics = audio_statistics(mode, backend, num_ticks, rom_path)
+            print(f'{mode:12} {backend:8} {statistics["tone_ticks"]:>6} tone ticks of {statistics["ticks"]}, '
+                  f'audio {statistics["audio_hash"]}')
+            if not statistics['tone_ticks']:
+                problems.append(f'{mode} {backend}: no tone in {statistics["ticks"]} ticks')
+            if expected_hash is None:
+                expected_hash = statistics['audio_hash']
+            elif statistics['audio_hash'] != expected_hash:
+                problems.append(f'{mode} {backend}: audio {statistics["audio_hash"]} instead of {expected_hash}')
+    return problems
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog='python -m core.conformance.audio',
+                                     description='Check that a beeping ROM sounds the same on every engine')
+    parser.add_argument('--rom', default=BEEP_ROM_PATH, help='ROM that sets the sound timer (default: roms/beep.ch8)')
+    parser.add_argument('--ticks', type=int, default=300, help='60 Hz ticks to run (default: %(default)s)')
+    arguments = parser.parse_args()
+
+    audio_problems = check_audio(arguments.ticks, arguments.rom)
+    for problem in audio_problems:
+        print(problem)
+    sys.exit(1 if audio_problems else 0)
@@ -0,0 +1,191 @@
+import functools
+import random
+
+from core.cpu.config.memory_config import Config
+from core.cpu.config.memory_starter import MemoryStarter
+
+
+class ConformanceCase:
+    """
+    A short program and the machine state it starts from: registers, index, timers, keypad, RPL flags, random state
+    and DATA_SIZE bytes of data at DATA_ADDRESS, over the startup image. The program is loaded at the usual start
+    address and run for num_steps instructions.
+    """
+    DATA_ADDRESS = 0x400
+    DATA_SIZE = 0x100
+    FIELDS = ('profile', 'program', 'num_steps', 'registers', 'index', 'delay_timer', 'sound_timer', 'keypad',
+              'rpl_flags', 'random_state', 'data', 'high_resolution')
+
+    def __init__(self, profile, program, num_steps, registers=bytes(16), index=DATA_ADDRESS, delay_timer=0,
+                 sound_timer=0, keypad=bytes(16), rpl_flags=bytes(Config.NUM_RPL_FLAGS), random_state=1,
+                 data=bytes(DATA_SIZE), high_resolution=False):
+        self.profile = profile
+        self.program = tuple(program)
+        self.num_steps = num_steps
+        self.registers = bytes(registers)
+        self.index = index
+        self.delay_timer = delay_timer
+        self.sound_timer = sound_timer
+        self.keypad = bytes(keypad)
+        self.rpl_flags = bytes(rpl_flags)
+        self.random_state = random_state
+        self.data = bytes(data)
+        self.high_resolution = high_resolution
+
+    def replace(self, **changes):
+        fields = {field: getattr(self, field) for field in self.FIELDS}
+        fields.update(changes)
+        return ConformanceCase(**fields)
+
+    def memory_image(self):
+        image = bytearray(MemoryStarter.build_startup_image())
+        program = b''.join(opcode.to_bytes(2, 'big') for opcode in self.program)
+        image[Config.MEMORY_START_ADDRESS:Config.MEMORY_START_ADDRESS + len(program)] = program
+        image[self.DATA_ADDRESS:self.DATA_ADDRESS + self.DATA_SIZE] = self.data
+        return bytes(image)
+
+    def to_dict(self):
+        case = {field: getattr(self, field) for field in self.FIELDS}
+        case['program'] = [f'{opcode:04x}' for opcode in self.program]
+        for field in ('registers', 'keypad', 'rpl_flags', 'data'):
+            case[field] = case[field].hex()
+        return case
+
+    @classmethod
+    def from_dict(cls, case):
+        case = dict(case)
+        case['program'] = [int(opcode, 16) for opcode in case['program']]
+        for field in ('registers', 'keypad', 'rpl_flags', 'data'):
+            case[field] = bytes.fromhex(case[field])
+        return cls(**case)
+
+
+class CaseGenerator:
+    """
+    Deterministic source of ConformanceCases, case number i of a seed being the same in every process.
+
+    Even numbers are random cases: uniformly drawn instructions with random operands over a random state. Odd numbers
+    are structured around one instruction pattern in turn: the state and the operands are drawn from EDGE_VALUES,
+    with x == y and VF operands favoured, and the pattern is interleaved with loads feeding it. Jump and call targets
+    stay inside the program and index loads inside the data, so most cases run their num_steps.
+    """
+    CHIP8_PATTERNS = ('00E0', '00EE', '1nnn', '2nnn', '3xkk', '4xkk', '5xy0', '6xkk', '7xkk', '8xy0', '8xy1', '8xy2',
+                      '8xy3', '8xy4', '8xy5', '8xy6', '8xy7', '8xyE', '9xy0', 'Annn', 'Bnnn', 'Cxkk', 'Dxyn', 'Ex9E',
+                      'ExA1', 'Fx07', 'Fx0A', 'Fx15', 'Fx18', 'Fx1E', 'Fx29', 'Fx33', 'Fx55', 'Fx65')
+    SCHIP_PATTERNS = ('00Cn', '00FB', '00FC', '00FD', '00FE', '00FF', 'Dxy0', 'Fx30', 'Fx75', 'Fx85')
+    PROFILES = ('chip8', 'schip')
+    EDGE_VALUES = (0x00, 0x01, 0x02, 0x09, 0x0F, 0x10, 0x63, 0x64, 0x7F, 0x80, 0x81, 0xC7, 0xFE, 0xFF)
+    MAX_PROGRAM_LENGTH = 24
+    MAX_STEPS = 48
+
+    def __init__(self, seed=0, profile='chip8'):
+        if profile not in self.PROFILES:
+            raise ValueError(f'Unknown conformance profile {profile!r}, expected one of {self.PROFILES}')
+        self.seed = seed
+        self.profile = profile
+        self.patterns = self.CHIP8_PATTERNS + (self.SCHIP_PATTERNS if profile == 'schip' else ())
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def pattern_mask(pattern):
+        """
+        (mask, value) of the fixed hex digits of a pattern like '8xy4'
+        """
+        mask = value = 0
+        for digit in pattern:
+            fixed = digit in '0123456789ABCDEF'
+            mask = mask << 4 | (0xF if fixed else 0)
+            value = value << 4 | (int(digit, 16) if fixed else 0)
+        return mask, value
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def opcode_pattern(opcode):
+        """
+        Most specific pattern matching the opcode, None for opcodes outside of both profiles
+        """
+        patterns = sorted(CaseGenerator.CHIP8_PATTERNS + CaseGenerator.SCHIP_PATTERNS,
+                          key=lambda pattern: -sum(digit in '0123456789ABCDEF' for digit in pattern))
+        for pattern in patterns:
+            mask, value = CaseGenerator.pattern_mask(pattern)
+            if opcode & mask == value:
+                return pattern
+        return None
+
+    @staticmethod
+    def assemble(pattern, x=0, y=0, n=0, kk=0, nnn=0):
+        opcode = CaseGenerator.pattern_mask(pattern)[1]
+        if pattern.endswith('nnn'):
+            return opcode | nnn
+        if pattern[1] == 'x':
+            opcode |= x << 8
+        if pattern[2] == 'y':
+            opcode |= y << 4
+        if pattern.endswith('kk'):
+            opcode |= kk
+        elif pattern[3] == 'n':
+            opcode |= n
+        return opcode
+
+    def case(self, case_number):
+        rng = random.Random(f'{self.seed}:{self.profile}:{case_number}')
+        if case_number % 2 == 0:
+            return self.random_case(rng)
+        return self.structured_case(rng, self.patterns[case_number // 2 % len(self.patterns)])
+
+    def instruction(self, rng, pattern, program_length, value):
+        x, y = rng.randrange(16), rng.randrange(16)
+        nnn = Config.MEMORY_START_ADDRESS + 2 * rng.randrange(program_length)
+        if pattern == 'Annn':
+            nnn = ConformanceCase.DATA_ADDRESS + rng.randrange(ConformanceCase.DATA_SIZE - 32)
+        elif pattern in ('Fx75', 'Fx85'):
+            x = rng.randrange(Config.NUM_RPL_FLAGS)
+        n = rng.randrange(1, 16)
+        return self.assemble(pattern, x=x, y=y, n=n, kk=value(), nnn=nnn)
+
+    def initial_state(self, rng, value):
+        return {
+            'registers': bytes(value() for _ in range(16)),
+            'index': ConformanceCase.DATA_ADDRESS + rng.randrange(ConformanceCase.DATA_SIZE - 32),
+            'delay_timer': value(),
+            'sound_timer': value(),
+            'keypad': bytes(rng.random() < 0.2 for _ in range(16)),
+            'rpl_flags': bytes(value() for _ in range(Config.NUM_RPL_FLAGS)),
+            'random_state': rng.getrandbits(32) or 1,
+            'data': rng.randbytes(ConformanceCase.DATA_SIZE),
+            'high_resolution': self.profile == 'schip' and rng.random() < 0.5,
+        }
+
+    def random_case(self, rng):
+        def value():
+            return rng.getrandbits(8)
+
+        program_length = rng.randint(1, self.MAX_PROGRAM_LENGTH)
+        program = [self.instruction(rng, rng.choice(self.patterns), program_length, value)
+                   for _ in range(program_length)]
+        return ConformanceCase(self.profile, program, rng.randint(1, self.MAX_STEPS), **self.initial_state(rng, value))
+
+    def structured_case(self, rng, pattern):
+        def value():
+            return rng.choice(self.EDGE_VALUES)
+
+        program_length = rng.randint(2, self.MAX_PROGRAM_LENGTH)
+        program = []
+        while len(program) < program_length:
+            if rng.random() < 0.5:
+                opcode = self.instruction(rng, pattern, program_length, value)
+                if pattern[1:3] == 'xy':
+                    choice = rng.random()
+                    x, y = (opcode >> 8) & 0xF, (opcode >> 4) & 0xF
+                    if choice < 0.25:
+                        y = x
+                    elif choice < 0.5:
+                        x = 0xF
+                    elif choice < 0.75:
+                        y = 0xF
+                    opcode = opcode & 0xF00F | x << 8 | y << 4
+                program.append(opcode)
+            else:
+                program.append(self.assemble('6xkk', x=rng.randrange(16), kk=value()))
+        return ConformanceCase(self.profile, program, rng.randint(program_length, self.MAX_STEPS),
+                               **self.initial_state(rng, value))
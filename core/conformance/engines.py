@@ -0,0 +1,213 @@
+from core.lazy_import import lazy_import
+from core.cpu.config.memory_config import Config
+from core.cpu.framebuffer import FrameBuffer
+from core.cpu.instructions import Cpu, NativeCpu
+from core.cpu.reference import ReferenceCpu
+from core.cpu.translator import BlockTranslator
+
+np = lazy_import('numpy')
+
+# Names of the entries of a machine state tuple, in order
+STATE_FIELDS = ('pc', 'index', 'stack', 'registers', 'delay_timer', 'sound_timer', 'random_state', 'rpl_flags',
+                'resolution', 'display', 'memory')
+
+
+class ReferenceEngine:
+    """
+    The ReferenceCpu behind the interface of the engines: load(case), advance() returning the instructions executed
+    and state() returning the STATE_FIELDS tuple
+    """
+    name = 'reference'
+    profiles = ('chip8', 'schip')
+    lockstep = False
+
+    def __init__(self):
+        self.cpu = None
+        self.advancing = 1
+
+    def load(self, case):
+        cpu = self.cpu = ReferenceCpu()
+        cpu.memory[:] = case.memory_image()
+        cpu.registers[:] = case.registers
+        cpu.keypad[:] = case.keypad
+        cpu.rpl_flags[:] = case.rpl_flags
+        cpu.index = case.index
+        cpu.delay_timer = case.delay_timer
+        cpu.sound_timer = case.sound_timer
+        cpu.random_state = case.random_state
+        if case.high_resolution:
+            cpu.set_resolution(Config.HIGH_RESOLUTION)
+
+    def advance(self):
+        self.cpu.step()
+        return 1
+
+    def opcode(self):
+        """
+        Opcode the next advance() starts with
+        """
+        memory = self.cpu.memory
+        pc = self.cpu.pc
+        return memory[pc] << 8 | memory[pc + 1] if pc < Config.MEMORY_SIZE - 1 else None
+
+    def state(self):
+        cpu = self.cpu
+        return (cpu.pc, cpu.index, tuple(cpu.stack), bytes(cpu.registers), cpu.delay_timer, cpu.sound_timer,
+                cpu.random_state, bytes(cpu.rpl_flags), (cpu.width, cpu.height), cpu.display_bytes(),
+                bytes(cpu.memory))
+
+
+class InterpreterEngine:
+    """
+    Steps a Cpu one fetch() and execute() at a time. The cpu, with its decode table, is built once and reset from the
+    case on every load.
+    """
+    name = 'interpreter'
+    profiles = ('chip8', 'schip')
+    lockstep = False
+    cpu_class = Cpu
+
+    def __init__(self):
+        self.cpu = self.cpu_class(seed=0)
+        self.advancing = 1
+
+    def load(self, case):
+        cpu = self.cpu
+        memoryview(cpu.memory)[:] = case.memory_image()
+        memoryview(cpu.registers)[:] = case.registers
+        memoryview(cpu.keypad)[:] = case.keypad
+        memoryview(cpu.rpl_flags)[:] = case.rpl_flags
+        cpu.stack.clear()
+        cpu.stack_pointer = 0
+        cpu.frame_buffer = FrameBuffer(*(Config.HIGH_RESOLUTION if case.high_resolution else Config.LOW_RESOLUTION))
+        cpu.current_opcode = 0
+        cpu.pc = Config.MEMORY_START_ADDRESS
+        cpu.index = case.index
+        cpu.delay_timer = case.delay_timer
+        cpu.sound_timer = case.sound_timer
+        cpu.random_state = case.random_state
+
+    def advance(self):
+        self.cpu.execute(self.cpu.fetch())
+        return 1
+
+    def opcode(self):
+        memory = self.cpu.memory
+        pc = self.cpu.pc
+        return int(memory[pc]) << 8 | int(memory[pc + 1]) if pc < Config.MEMORY_SIZE - 1 else None
+
+    def state(self):
+        cpu = self.cpu
+        frame_buffer = cpu.frame_buffer
+        return (int(cpu.pc), int(cpu.index), tuple(int(address) for address in cpu.stack), bytes(cpu.registers),
+                int(cpu.delay_timer), int(cpu.sound_timer), int(cpu.random_state), bytes(cpu.rpl_flags),
+                (frame_buffer.width, frame_buffer.height), frame_buffer.to_bytes(), bytes(cpu.memory))
+
+
+class DecodeTableEngine(InterpreterEngine):
+    """
+    Steps a Cpu through run_cycles, the decode table loop the scheduler runs
+    """
+    name = 'decode-table'
+
+    def advance(self):
+        return self.cpu.run_cycles(1)
+
+
+class NativeEngine(DecodeTableEngine):
+    name = 'native'
+    cpu_class = NativeCpu
+
+
+class TranslatorEngine(InterpreterEngine):
+    """
+    Runs a BlockTranslator one whole block per advance(), so its states are compared at block boundaries only.
+    single_instruction_blocks() makes every block one instruction long, to find the instruction a block diverged on.
+    """
+    name = 'translator'
+    blocks = True
+
+    def __init__(self):
+        super().__init__()
+        self.translator = BlockTranslator(self.cpu)
+
+    def single_instruction_blocks(self, enabled):
+        self.translator.MAX_BLOCK_LENGTH = 1 if enabled else BlockTranslator.MAX_BLOCK_LENGTH
+        self.translator.flush()
+
+    def load(self, case):
+        super().load(case)
+        self.translator.flush()
+
+    def advance(self):
+        block = self.translator.block_cache.get(self.cpu.pc)
+        if block is None:
+            block = self.translator.translate(self.cpu.pc)
+        self.advancing = block.num_instructions
+        return block()
+
+
+class NativeTranslatorEngine(TranslatorEngine):
+    name = 'native-translator'
+    cpu_class = NativeCpu
+
+
+class VectorizedEngine:
+    """
+    Runs a whole batch of cases on one VectorizedCpu, machine i starting from case i, all of them stepping together.
+    Plain CHIP-8 only, and the RPL flags it doesn't have are reported as loaded.
+    """
+    name = 'vectorized'
+    profiles = ('chip8',)
+    lockstep = True
+
+    def __init__(self):
+        self.vectorized = None
+        self.rpl_flags = []
+        self.display = None
+
+    def load_batch(self, cases):
+        from core.cpu.vectorized import VectorizedCpu
+
+        if self.vectorized is None or self.vectorized.num_machines != len(cases):
+            self.vectorized = VectorizedCpu(len(cases))
+        vectorized = self.vectorized
+        vectorized.memory[:] = np.frombuffer(b''.join(case.memory_image() for case in cases),
+                                             dtype=np.uint8).reshape(len(cases), -1)
+        vectorized.registers[:] = [list(case.registers) for case in cases]
+        vectorized.keypad[:] = [list(case.keypad) for case in cases]
+        vectorized.stack[:] = 0
+        vectorized.video_display[:] = 0
+        vectorized.pc[:] = Config.MEMORY_START_ADDRESS
+        vectorized.index[:] = [case.index for case in cases]
+        vectorized.stack_pointer[:] = 0
+        vectorized.delay_timer[:] = [case.delay_timer for case in cases]
+        vectorized.sound_timer[:] = [case.sound_timer for case in cases]
+        vectorized.random_state[:] = [case.random_state for case in cases]
+        vectorized.trapped[:] = False
+        self.rpl_flags = [case.rpl_flags for case in cases]
+        self.display = None
+
+    def step(self):
+        self.vectorized.step(1)
+        self.display = None
+
+    def trapped(self, machine):
+        return bool(self.vectorized.trapped[machine])
+
+    def state(self, machine):
+        vectorized = self.vectorized
+        if self.display is None:
+            self.display = np.packbits(vectorized.video_display, axis=2)
+        stack_pointer = int(vectorized.stack_pointer[machine])
+        return (int(vectorized.pc[machine]), int(vectorized.index[machine]),
+                tuple(int(address) for address in vectorized.stack[machine, :stack_pointer]),
+                vectorized.registers[machine].tobytes(), int(vectorized.delay_timer[machine]),
+                int(vectorized.sound_timer[machine]), int(vectorized.random_state[machine]), self.rpl_flags[machine],
+                (vectorized.DISPLAY_WIDTH, vectorized.DISPLAY_HEIGHT), self.display[machine].tobytes(),
+                vectorized.memory[machine].tobytes())
+
+
+ENGINES = {engine.name: engine for engine in (InterpreterEngine, DecodeTableEngine, NativeEngine, TranslatorEngine,
+                                              NativeTranslatorEngine, VectorizedEngine)}
+ORACLES = {'reference': ReferenceEngine, 'interpreter': InterpreterEngine}
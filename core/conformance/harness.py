@@ -0,0 +1,402 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from core.conformance.case_generator import CaseGenerator, ConformanceCase
+from core.conformance.engines import ENGINES, ORACLES, STATE_FIELDS
+from core.cpu.config.memory_config import Config
+from core.cpu.decoder import UnknownOpcodeError
+
+
+class Trace:
+    """
+    What the oracle did on a case: its state before the first step and after every step, the opcode each step
+    started with, and why it stopped early, if it did: on an unknown opcode, which the engines must raise too, or on
+    undefined behavior, past which nothing is compared
+    """
+    __slots__ = ('states', 'opcodes', 'outcome')
+
+    def __init__(self, states, opcodes, outcome):
+        self.states = states
+        self.opcodes = opcodes
+        self.outcome = outcome
+
+
+class ConformanceHarness:
+    """
+    Differential tester running generated cases on the engines and comparing their whole state with the oracle after
+    every step: pc, index, stack, registers, timers, random state, RPL flags, resolution, display and memory.
+
+    The oracle runs each case once and its trace is checked against every engine. Scalar engines are reset from the
+    case instead of rebuilt, the translator is compared at its block boundaries, and the vectorized engine runs a
+    whole batch of cases as one lockstep machine each. Batches are spread over worker processes. The first divergence
+    of every engine and opcode pattern is then minimized: the steps are cut at the divergence, instructions are
+    removed while it persists, and the state fields are reset one by one.
+    """
+    UNKNOWN_OPCODE = 'unknown opcode'
+    UNDEFINED = 'undefined'
+    BATCH_SIZE = 1000
+
+    def __init__(self, engines=tuple(ENGINES), oracle='reference', profile='chip8', seed=0):
+        self.settings = (tuple(engines), oracle, profile, seed)
+        self.oracle = ORACLES[oracle]()
+        self.generator = CaseGenerator(seed, profile)
+        self.engines = {name: ENGINES[name]() for name in engines if profile in ENGINES[name].profiles}
+
+    def trace(self, case):
+        oracle = self.oracle
+        oracle.load(case)
+        states = [oracle.state()]
+        opcodes = []
+        outcome = None
+        for _ in range(case.num_steps):
+            opcodes.append(oracle.opcode())
+            try:
+                oracle.advance()
+            except UnknownOpcodeError:
+                outcome = self.UNKNOWN_OPCODE
+                break
+            except Exception:
+                # UndefinedBehavior, or whatever the interpreter raises when it is the oracle
+                outcome = self.UNDEFINED
+                break
+            states.append(oracle.state())
+        return Trace(states, opcodes, outcome)
+
+    @staticmethod
+    def state_differences(expected, actual):
+        """
+        JSON friendly description of the fields that differ, as expected and actual values
+        """
+        differences = {}
+        for field, expected_value, actual_value in zip(STATE_FIELDS, expected, actual):
+            if expected_value == actual_value:
+                continue
+            if field in ('display', 'memory') and len(expected_value) == len(actual_value):
+                offsets = [offset for offset in range(len(expected_value))
+                           if expected_value[offset] != actual_value[offset]]
+                differences[field] = {f'{offset:#05x}': [expected_value[offset], actual_value[offset]]
+                                      for offset in offsets[:8]}
+            elif field in ('registers', 'rpl_flags'):
+                differences[field] = {f'{"V" if field == "registers" else "R"}{number:X}': [expected, actual]
+                                      for number, (expected, actual) in enumerate(zip(expected_value, actual_value))
+                                      if expected != actual}
+            elif field in ('display', 'memory'):
+                differences[field] = f'{len(expected_value)} bytes expected, got {len(actual_value)}'
+            else:
+                differences[field] = [expected_value, actual_value]
+        return differences
+
+    def divergence(self, engine, case, trace, step, differences=None, error=None):
+        opcode = trace.opcodes[step - 1] if step - 1 < len(trace.opcodes) else None
+        return {
+            'engine': engine.name,
+            'case': case,
+            'step': step,
+            'opcode': opcode,
+            'pattern': None if opcode is None else CaseGenerator.opcode_pattern(opcode),
+            'differences': differences,
+            'error': error,
+        }
+
+    def check_case(self, engine, case, trace):
+        """
+        Runs the case on a scalar engine, returning the first divergence from the trace or None
+        """
+        states = trace.states
+        last = len(states) - 1
+        limit = last + 1 if trace.outcome == self.UNKNOWN_OPCODE else last
+        engine.load(case)
+        executed = 0
+        while executed < limit:
+            try:
+                executed += engine.advance()
+            except UnknownOpcodeError as exception:
+                executed += engine.advancing
+                if trace.outcome == self.UNKNOWN_OPCODE and executed == last + 1:
+                    # The pc was already moved past the opcode that raised
+                    state = engine.state()
+                    differences = self.state_differences(states[last], (state[0] - 2,) + state[1:])
+                    return self.divergence(engine, case, trace, executed, differences) if differences else None
+                if executed > last and trace.outcome != self.UNKNOWN_OPCODE:
+                    return None
+                return self.divergence(engine, case, trace, executed, error=f'UnknownOpcodeError: {exception}')
+            except Exception as exception:
+                executed += engine.advancing
+                # Past the end of the trace, or past undefined behavior, anything goes
+                if executed > last and trace.outcome != self.UNKNOWN_OPCODE:
+                    return None
+                return self.divergence(engine, case, trace, executed, error=f'{type(exception).__name__}: {exception}')
+            if executed > last:
+                if trace.outcome == self.UNKNOWN_OPCODE:
+                    return self.divergence(engine, case, trace, last + 1, error='ran an unknown opcode')
+                return None
+            differences = self.state_differences(states[executed], engine.state())
+            if differences:
+                return self.divergence(engine, case, trace, executed, differences)
+        return None
+
+    def localize(self, engine, case, trace, divergence):
+        """
+        Runs the case again on a block engine with single instruction blocks, which pins a divergence found at the
+        end of a translated block down to one instruction and compares the steps a block ran past. Keeps the block
+        divergence when that run doesn't diverge.
+        """
+        if not getattr(engine, 'blocks', False):
+            return divergence
+        engine.single_instruction_blocks(True)
+        try:
+            return self.check_case(engine, case, trace) or divergence
+        finally:
+            engine.single_instruction_blocks(False)
+
+    def check_lockstep(self, engine, cases, traces):
+        """
+        Runs the cases together on a lockstep engine, returning the first divergence or None of each one
+        """
+        engine.load_batch(cases)
+        results = [None] * len(cases)
+        limits = [len(trace.states) - 1 + (trace.outcome == self.UNKNOWN_OPCODE) for trace in traces]
+        active = [machine for machine in range(len(cases)) if limits[machine] > 0]
+        step = 0
+        while active:
+            engine.step()
+            step += 1
+            still_active = []
+            for machine in active:
+                case, trace = cases[machine], traces[machine]
+                last = len(trace.states) - 1
+                if step > last:
+                    if not engine.trapped(machine):
+                        results[machine] = self.divergence(engine, case, trace, step, error='ran an unknown opcode')
+                        continue
+                    differences = self.state_differences(trace.states[last], engine.state(machine))
+                elif engine.trapped(machine):
+                    results[machine] = self.divergence(engine, case, trace, step, error='trapped')
+                    continue
+                else:
+                    differences = self.state_differences(trace.states[step], engine.state(machine))
+                if differences:
+                    results[machine] = self.divergence(engine, case, trace, step, differences)
+                elif step < limits[machine]:
+                    still_active.append(machine)
+            active = still_active
+        return results
+
+    def check(self, engine, case):
+        trace = self.trace(case)
+        if engine.lockstep:
+            return self.check_lockstep(engine, [case], [trace])[0]
+        return self.localize(engine, case, trace, self.check_case(engine, case, trace))
+
+    def check_batch(self, case_numbers):
+        cases = [self.generator.case(case_number) for case_number in case_numbers]
+        traces = [self.trace(case) for case in cases]
+        divergences = []
+        for engine in self.engines.values():
+            if engine.lockstep:
+                results = self.check_lockstep(engine, cases, traces)
+            else:
+                results = [self.check_case(engine, case, trace) for case, trace in zip(cases, traces)]
+                results = [result if result is None else self.localize(engine, case, trace, result)
+                           for case, trace, result in zip(cases, traces, results)]
+            for case_number, result in zip(case_numbers, results):
+                if result is not None:
+                    result['case_number'] = case_number
+                    divergences.append(result)
+        return {
+            'cases': len(cases),
+            'steps': sum(len(trace.states) - 1 for trace in traces),
+            'outcomes': {outcome: sum(trace.outcome == outcome for trace in traces)
+                         for outcome in (self.UNKNOWN_OPCODE, self.UNDEFINED)},
+            'divergences': divergences,
+        }
+
+    SIMPLE_STATE = (
+        ('high_resolution', False),
+        ('data', bytes(ConformanceCase.DATA_SIZE)),
+        ('keypad', bytes(16)),
+        ('rpl_flags', bytes(Config.NUM_RPL_FLAGS)),
+        ('delay_timer', 0),
+        ('sound_timer', 0),
+        ('random_state', 1),
+        ('index', ConformanceCase.DATA_ADDRESS),
+    )
+
+    def minimize(self, engine_name, case):
+        """
+        Smallest case found that still diverges on the same opcode pattern, with its divergence
+        """
+        engine = self.engines[engine_name]
+        divergence = self.check(engine, case)
+        pattern = divergence['pattern']
+
+        def diverges(candidate):
+            candidate_divergence = self.check(engine, candidate)
+            return candidate_divergence is not None and candidate_divergence['pattern'] == pattern
+
+        case = case.replace(num_steps=divergence['step'])
+        program = list(case.program)
+        chunk = len(program) // 2
+        while chunk:
+            start = 0
+            while start < len(program):
+                candidate_program = program[:start] + program[start + chunk:]
+                candidate = case.replace(program=candidate_program)
+                if candidate_program and diverges(candidate):
+                    program, case = candidate_program, candidate
+                else:
+                    start += chunk
+            chunk //= 2
+
+        for field, simple_value in self.SIMPLE_STATE:
+            candidate = case.replace(**{field: simple_value})
+            if getattr(case, field) != simple_value and diverges(candidate):
+                case = candidate
+        for register in range(16):
+            registers = bytearray(case.registers)
+            if registers[register]:
+                registers[register] = 0
+                candidate = case.replace(registers=registers)
+                if diverges(candidate):
+                    case = candidate
+
+        case = case.replace(num_steps=self.check(engine, case)['step'])
+        return case, self.check(engine, case)
+
+    def run(self, num_cases, num_workers=1, first_case=0):
+        """
+        Checks cases first_case to first_case + num_cases on every engine, returning the report with the
+        divergences grouped by engine and opcode pattern, the first one of each group minimized
+        """
+        case_numbers = range(first_case, first_case + num_cases)
+        batches = [list(case_numbers[start:start + self.BATCH_SIZE])
+                   for start in range(0, num_cases, self.BATCH_SIZE)]
+        start = time.perf_counter()
+        if num_workers == 1:
+            results = [self.check_batch(batch) for batch in batches]
+        else:
+            context = multiprocessing.get_context('fork' if sys.platform != 'win32' else 'spawn')
+            with context.Pool(num_workers) as pool:
+                results = pool.starmap(check_batch, [(self.settings, batch) for batch in batches])
+        elapsed = time.perf_counter() - start
+
+        groups = {}
+        for result in results:
+            for divergence in result['divergences']:
+                key = (divergence['engine'], divergence['pattern'])
+                group = groups.setdefault(key, {'engine': key[0], 'pattern': key[1], 'cases': 0, 'first': divergence})
+                group['cases'] += 1
+                if divergence['case_number'] < group['first']['case_number']:
+                    group['first'] = divergence
+        for group in groups.values():
+            group['minimized'], group['divergence'] = self.minimize(group['engine'], group.pop('first')['case'])
+
+        steps = sum(result['steps'] for result in results)
+        return {
+            'profile': self.generator.profile,
+            'seed': self.generator.seed,
+            'engines': list(self.engines),
+            'cases': num_cases,
+            'steps': steps,
+            'outcomes': {outcome: sum(result['outcomes'][outcome] for result in results)
+                         for outcome in (self.UNKNOWN_OPCODE, self.UNDEFINED)},
+            'elapsed': elapsed,
+            'steps_per_second': steps * len(self.engines) / max(elapsed, 1e-9),
+            'divergent_cases': {name: sum(group['cases'] for group in groups.values() if group['engine'] == name)
+                                for name in self.engines},
+            'groups': sorted(groups.values(), key=lambda group: (group['engine'], group['pattern'] or '')),
+        }
+
+
+harnesses = {}
+
+
+def check_batch(settings, case_numbers):
+    """
+    Worker process entry point, each worker building its harness once per settings
+    """
+    harness = harnesses.get(settings)
+    if harness is None:
+        harness = harnesses[settings] = ConformanceHarness(*settings)
+    return harness.check_batch(case_numbers)
+
+
+def describe(divergence, disassembler):
+    case = divergence['case']
+    lines = [f'  {0x200 + 2 * number:#05x}  {opcode:04x}  {disassembler.mnemonic(opcode)}'
+             for number, opcode in enumerate(case.program)]
+    if divergence['error'] is not None:
+        lines.append(f'  step {divergence["step"]}: {divergence["error"]}')
+    else:
+        for field, difference in divergence['differences'].items():
+            lines.append(f'  step {divergence["step"]}: {field} expected/actual {difference}')
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    from core.analysis.disassembler import Disassembler
+
+    parser = argparse.ArgumentParser(prog='python -m core.conformance.harness',
+                                     description='Check the engines against the reference interpreter')
+    parser.add_argument('--cases', type=int, default=10000, help='cases per profile (default: %(default)s)')
+    parser.add_argument('--first-case', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--engines', default=','.join(ENGINES),
+                        help='comma separated engines (default: %(default)s)')
+    parser.add_argument('--oracle', choices=tuple(ORACLES), default='reference',
+                        help='reference to check the semantics, interpreter to check the fast engines against it')
+    parser.add_argument('--profile', choices=CaseGenerator.PROFILES, action='append',
+                        help='instruction set of the cases, repeatable (default: both)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--case', metavar='FILE', help='check a single case saved as JSON instead of generating')
+    parser.add_argument('--output', help='write the report, minimized cases included, as JSON')
+    arguments = parser.parse_args()
+
+    engine_names = [name for name in arguments.engines.split(',') if name]
+    unknown_engines = set(engine_names) - set(ENGINES)
+    if unknown_engines:
+        parser.error(f'unknown engines {sorted(unknown_engines)}, expected some of {list(ENGINES)}')
+    disassembler = Disassembler()
+
+    if arguments.case is not None:
+        with open(arguments.case) as case_file:
+            case = ConformanceCase.from_dict(json.load(case_file))
+        harness = ConformanceHarness(engine_names, arguments.oracle, case.profile)
+        divergent = False
+        for name, engine in harness.engines.items():
+            divergence = harness.check(engine, case)
+            print(f'{name}: {"ok" if divergence is None else "diverges"}')
+            if divergence is not None:
+                divergent = True
+                print(describe(divergence, disassembler))
+        sys.exit(1 if divergent else 0)
+
+    reports = []
+    for profile in arguments.profile or CaseGenerator.PROFILES:
+        harness = ConformanceHarness(engine_names, arguments.oracle, profile, arguments.seed)
+        if not harness.engines:
+            continue
+        report = harness.run(arguments.cases, arguments.workers, arguments.first_case)
+        reports.append(report)
+        print(f'{profile}: {report["cases"]} cases, {report["steps"]} steps on {len(report["engines"])} engines in '
+              f'{report["elapsed"]:.2f}s ({report["steps_per_second"]:,.0f} steps/s), '
+              f'{report["outcomes"][harness.UNDEFINED]} stopped on undefined behavior')
+        for name, divergent_cases in report['divergent_cases'].items():
+            print(f'  {name:20} {divergent_cases:>8} divergent cases')
+        for group in report['groups']:
+            print(f'{group["engine"]} {group["pattern"]}: {group["cases"]} cases, minimized to '
+                  f'{len(group["minimized"].program)} instructions')
+            print(describe(group['divergence'], disassembler))
+
+    if arguments.output is not None:
+        for report in reports:
+            for group in report['groups']:
+                group['minimized'] = group['minimized'].to_dict()
+                group['divergence'] = dict(group['divergence'], case=None)
+        with open(arguments.output, 'w') as report_file:
+            json.dump(reports, report_file, indent=2)
+    sys.exit(1 if any(report['groups'] for report in reports) else 0)
@@ -1,10 +1,38 @@
+from core.cpu.config.memory_config import Config
+from core.cpu.instrumentation import DecodeTableInstrument
 
 
 class MemoryStarter:
+    """
+    Writes values into the cpu memory through its buffer, whatever the state backend.
+
+    The startup image, both font sets at their addresses over blank memory, is built once per process and then
+    copied into each cpu with a single buffer write.
+    """
+    startup_image = None
 
     def __init__(self, chip8_cpu):
         self.chip8_cpu = chip8_cpu
 
     def load_into_memory(self, list_values, starting_address):
-        ending_address = len(list_values) + starting_address
-        self.chip8_cpu.memory[starting_address:ending_address] = list_values
+        values = bytes(list_values)
+        ending_address = len(values) + starting_address
+        memoryview(self.chip8_cpu.memory)[starting_address:ending_address] = values
+        DecodeTableInstrument.notify_state_loaded(self.chip8_cpu)
+
+    @staticmethod
+    def build_startup_image():
+        image = bytearray(Config.MEMORY_SIZE)
+        image[Config.FONT_SET_START_ADDRESS:Config.FONT_SET_START_ADDRESS + len(Config.FONT_SET)] = Config.FONT_SET
+        image[Config.HIGH_FONT_SET_START_ADDRESS:Config.HIGH_FONT_SET_START_ADDRESS + len(Config.HIGH_FONT_SET)] = \
+            Config.HIGH_FONT_SET
+        return bytes(image)
+
+    def load_startup_image(self):
+        """
+        Resets the whole memory to the startup image
+        """
+        if MemoryStarter.startup_image is None:
+            MemoryStarter.startup_image = self.build_startup_image()
+        memoryview(self.chip8_cpu.memory)[:] = MemoryStarter.startup_image
+        DecodeTableInstrument.notify_state_loaded(self.chip8_cpu)
@@ -0,0 +1,202 @@
+from core.cpu.idle import CpuIdle
+from core.cpu.instrumentation import DecodeTableInstrument
+
+
+class DebugBreak(CpuIdle):
+    """
+    Raised by debugger handlers to stop the running batch, caught by the engines like CpuIdle so the hot loops stay
+    free of any debugger check
+    """
+
+
+class Debugger(DecodeTableInstrument):
+    """
+    Breakpoints, conditional breakpoints and memory watchpoints over the interpreter dispatch.
+
+    As a DecodeTableInstrument it swaps cpu.decode_table, but only the entries of the opcodes that can hit: the opcode
+    found at each breakpoint address, and the opcodes of the handlers accessing memory through the index (Dxyn and
+    Fx65 read, Fx33 and Fx55 write) when a watchpoint of that kind is set. Every other opcode runs the plain handler
+    at full interpreter speed. Breakpoints are bound to the opcode at their address when they are installed, so they
+    have to be set again after the program overwrites that address.
+
+    A breakpoint stops before its instruction executes, a watchpoint right after the access. Execution is driven
+    through the scheduler's tick steps, so a tick interrupted by a break is resumed where it stopped and timers and
+    frames advance exactly as in an undebugged run. Translated blocks don't keep the pc per instruction, so the
+    debugger always runs the interpreter and flushes the translator when installing its table.
+    """
+    # Handler name: (accesses memory for writing, number of bytes accessed from the index for its operands)
+    MEMORY_ACCESSES = {
+        'display_bytes_on_screen': (False, lambda x, y, n: n or 32),
+        'load_memory_onto_register': (False, lambda x: x + 1),
+        'load_registers_onto_memory': (True, lambda x: x + 1),
+        'load_bcd_on_memory': (True, lambda x: 3),
+    }
+
+    def __init__(self, chip8_cpu, scheduler, translator=None):
+        super().__init__(chip8_cpu, translator)
+        self.scheduler = scheduler
+        self.breakpoints = {}
+        self.watchpoints = []
+        self.stop_reason = None
+        self.resume_pc = None
+        self.tick_cycles = None
+        self.tick_executed = 0
+
+    def add_breakpoint(self, address, condition=None):
+        """
+        Stops before the instruction at address, only when condition(chip8_cpu) is true if a condition is given
+        """
+        self.breakpoints[address] = condition
+        self.install()
+
+    def remove_breakpoint(self, address):
+        self.breakpoints.pop(address, None)
+        self.install()
+
+    def add_watchpoint(self, start, end, read=False, write=True):
+        """
+        Stops after any instruction reading or writing a byte of [start, end) through the index
+        """
+        watchpoint = (start, end, read, write)
+        self.watchpoints.append(watchpoint)
+        self.install()
+        return watchpoint
+
+    def remove_watchpoint(self, watchpoint):
+        self.watchpoints.remove(watchpoint)
+        self.install()
+
+    @staticmethod
+    def register_equals(register, value):
+        """
+        Breakpoint condition true while V[register] == value
+        """
+        return lambda chip8_cpu: int(chip8_cpu.registers[register]) == value
+
+    def breaking(self, handler):
+        chip8_cpu = self.chip8_cpu
+        breakpoints = self.breakpoints
+
+        def breakpoint_handler(*operands):
+            address = chip8_cpu.pc - 2
+            if address in breakpoints and address != self.resume_pc:
+                condition = breakpoints[address]
+                if condition is None or condition(chip8_cpu):
+                    chip8_cpu.pc = address
+                    self.stop_reason = {'reason': 'breakpoint', 'pc': address}
+                    raise DebugBreak
+            self.resume_pc = None
+            handler(*operands)
+
+        breakpoint_handler.__name__ = handler.__name__
+        return breakpoint_handler
+
+    def watching(self, handler, is_write, access_length):
+        chip8_cpu = self.chip8_cpu
+        watchpoints = self.watchpoints
+        kind = 'write' if is_write else 'read'
+
+        def watched_handler(*operands):
+            address = chip8_cpu.pc - 2
+            start = int(chip8_cpu.index)
+            end = start + access_length(*operands)
+            before = bytes(chip8_cpu.memory[start:end])
+            handler(*operands)
+            for watch_start, watch_end, read, write in watchpoints:
+                if start < watch_end and watch_start < end and (write if is_write else read):
+                    self.stop_reason = {'reason': 'watchpoint', 'kind': kind, 'pc': address, 'start': start,
+                                        'end': end, 'before': before, 'after': bytes(chip8_cpu.memory[start:end])}
+                    raise DebugBreak
+
+        watched_handler.__name__ = handler.__name__
+        return watched_handler
+
+    def install(self):
+        """
+        Attaches, or rebuilds the swapped table when attached already, for the current breakpoints and watchpoints
+        """
+        if self.attached:
+            self.rebuild()
+        else:
+            self.attach()
+
+    def instrument(self, decode_table):
+        """
+        Copy of the table below with only the affected opcodes wrapped
+        """
+        decode_table = list(decode_table)
+        memory = self.chip8_cpu.memory
+
+        watched_kinds = set()
+        for _, _, read, write in self.watchpoints:
+            if read:
+                watched_kinds.add(False)
+            if write:
+                watched_kinds.add(True)
+        if watched_kinds:
+            wrappers = {}
+            for opcode, (handler, operands) in enumerate(decode_table):
+                is_write, access_length = self.MEMORY_ACCESSES.get(handler.__name__, (None, None))
+                if is_write in watched_kinds:
+                    if handler not in wrappers:
+                        wrappers[handler] = self.watching(handler, is_write, access_length)
+                    decode_table[opcode] = (wrappers[handler], operands)
+
+        breakpoint_opcodes = {int(memory[address]) << 8 | int(memory[address + 1]) for address in self.breakpoints}
+        for opcode in breakpoint_opcodes:
+            handler, operands = decode_table[opcode]
+            decode_table[opcode] = (self.breaking(handler), operands)
+        return decode_table
+
+    def run(self, max_instructions=None, until_frame=None):
+        """
+        Runs tick by tick until a breakpoint or watchpoint hits, max_instructions were executed or until_frame frames
+        were emulated, returning the stop reason
+        """
+        chip8_cpu = self.chip8_cpu
+        scheduler = self.scheduler
+        if not self.attached:
+            self.install()
+        if chip8_cpu.pc in self.breakpoints:
+            self.resume_pc = chip8_cpu.pc
+        executed_total = 0
+
+        while True:
+            if until_frame is not None and scheduler.frames >= until_frame:
+                return {'reason': 'frame', 'frame': scheduler.frames, 'pc': chip8_cpu.pc}
+            if max_instructions is not None and executed_total >= max_instructions:
+                return {'reason': 'step', 'pc': chip8_cpu.pc}
+            if self.tick_cycles is None:
+                self.tick_cycles = scheduler.start_tick()
+                self.tick_executed = 0
+
+            remaining = self.tick_cycles - self.tick_executed
+            if max_instructions is not None:
+                remaining = min(remaining, max_instructions - executed_total)
+            if remaining > 0:
+                self.stop_reason = None
+                executed = chip8_cpu.run_cycles(remaining)
+                if self.stop_reason is not None and self.stop_reason['reason'] == 'breakpoint':
+                    executed -= 1
+                self.tick_executed += executed
+                executed_total += executed
+                if self.stop_reason is not None:
+                    return self.stop_reason
+                if executed == remaining:
+                    continue
+
+            scheduler.account_instructions(self.tick_executed, self.tick_cycles)
+            scheduler.finish_tick()
+            self.tick_cycles = None
+
+    def step(self, num_instructions=1):
+        return self.run(max_instructions=num_instructions)
+
+    def resume(self, max_instructions=None):
+        """
+        Continues until a breakpoint or watchpoint hits
+        """
+        return self.run(max_instructions=max_instructions)
+
+    def run_to_frame(self, frame):
+        return self.run(until_frame=frame)
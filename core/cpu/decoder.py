@@ -0,0 +1,200 @@
+import gc
+import hashlib
+import marshal
+import os
+
+
+class UnknownOpcodeError(Exception):
+    pass
+
+
+class StackOverflowError(Exception):
+    pass
+
+
+class Decoder:
+    """
+    Builds a flat decode table indexed by the raw 16 bit opcode.
+
+    Every entry is a (handler, operands) tuple, where the handler is bound to the cpu and the operands were already
+    extracted from the opcode, so the fetch/execute loop only does one list index per instruction.
+
+    Resolving 64K opcodes is the bulk of a cold start, so the unbound result is built once per instructions table
+    signature: the handler name index of every opcode is kept for the process and, when a cache_directory is given,
+    marshalled there for the next ones, through a temporary file so concurrent processes never read a partial one.
+    Operands only depend on the opcode bits and are zipped from precomputed columns, and binding the table to a cpu is
+    a single zip, all with the garbage collector paused while the 64K tuples are allocated.
+    """
+    TABLE_SIZE = 0x10000
+    # Bumped whenever the decoding changes, so stale cached templates are not reused
+    TEMPLATE_VERSION = 1
+    # Directory of the templates below a ROM library cache directory
+    CACHE_SUBDIRECTORY = 'startup'
+    templates = {}
+
+    # Operands each handler receives, keyed by the most significant nibble of the opcode
+    OPERAND_FORMATS = {
+        0x0: (),
+        0x1: ('nnn',),
+        0x2: ('nnn',),
+        0x3: ('x', 'kk'),
+        0x4: ('x', 'kk'),
+        0x5: ('x', 'y'),
+        0x6: ('x', 'kk'),
+        0x7: ('x', 'kk'),
+        0x8: ('x', 'y'),
+        0x9: ('x', 'y'),
+        0xA: ('nnn',),
+        0xB: ('nnn',),
+        0xC: ('x', 'kk'),
+        0xD: ('x', 'y', 'n'),
+        0xE: ('x',),
+        0xF: ('x',),
+    }
+    # Opcodes whose operands differ from the format of their most significant nibble, as (mask, value): operands
+    OPERAND_FORMAT_OVERRIDES = {
+        (0xFFF0, 0x00C0): ('n',),
+    }
+
+    def __init__(self, chip8_cpu, cache_directory=None):
+        self.chip8_cpu = chip8_cpu
+        self.cache_directory = cache_directory
+
+    @staticmethod
+    def extract_operands(opcode):
+        fields = {
+            'x': (opcode & 0x0F00) >> 8,
+            'y': (opcode & 0x00F0) >> 4,
+            'n': opcode & 0x000F,
+            'kk': opcode & 0x00FF,
+            'nnn': opcode & 0x0FFF,
+        }
+        operand_format = Decoder.OPERAND_FORMATS[opcode >> 12]
+        for (mask, value), override_format in Decoder.OPERAND_FORMAT_OVERRIDES.items():
+            if opcode & mask == value:
+                operand_format = override_format
+        return tuple(fields[name] for name in operand_format)
+
+    @staticmethod
+    def lookup_handler(instructions_table, opcode):
+        """
+        Resolves an opcode against the hex-digit keyed instructions table, returning None when it is not mapped
+        """
+        key = f'{opcode:04x}'
+        if key in instructions_table:
+            return instructions_table[key]
+
+        handler = instructions_table.get(key[0])
+        if isinstance(handler, dict):
+            suffix_length = len(next(iter(handler)))
+            handler = handler.get(key[-suffix_length:])
+        return handler
+
+    def signature(self):
+        """
+        Hash of the decoding inputs, the instructions table layout and the operand formats
+        """
+        entries = []
+        for key, entry in self.chip8_cpu.instructions_table.items():
+            if isinstance(entry, dict):
+                entries.extend((key, suffix, handler.__name__) for suffix, handler in entry.items())
+            else:
+                entries.append((key, '', entry.__name__))
+        description = repr((self.TEMPLATE_VERSION, sorted(entries), self.OPERAND_FORMATS,
+                            sorted(self.OPERAND_FORMAT_OVERRIDES.items())))
+        return hashlib.blake2b(description.encode(), digest_size=16).hexdigest()
+
+    def build_template(self):
+        """
+        (handler names, handler name index per opcode), index 0 naming the trap of the unmapped opcodes
+        """
+        instructions_table = self.chip8_cpu.instructions_table
+        names = [self.chip8_cpu.unknown_opcode_trap.__name__]
+        name_indexes = {}
+        indexes = bytearray(self.TABLE_SIZE)
+
+        for opcode in range(self.TABLE_SIZE):
+            handler = self.lookup_handler(instructions_table, opcode)
+            if handler is not None:
+                if handler.__name__ not in name_indexes:
+                    name_indexes[handler.__name__] = len(names)
+                    names.append(handler.__name__)
+                indexes[opcode] = name_indexes[handler.__name__]
+        return names, bytes(indexes)
+
+    @classmethod
+    def build_operands(cls, indexes):
+        """
+        Operands of every opcode, zipped from precomputed field columns over the 12 low bits of each nibble
+        """
+        low_bits = range(0x1000)
+        columns = {
+            'x': [bits >> 8 for bits in low_bits],
+            'y': [(bits >> 4) & 0xF for bits in low_bits],
+            'n': [bits & 0xF for bits in low_bits],
+            'kk': [bits & 0xFF for bits in low_bits],
+            'nnn': list(low_bits),
+        }
+        operands = []
+        for nibble in range(0x10):
+            operand_format = cls.OPERAND_FORMATS[nibble]
+            if operand_format:
+                operands.extend(zip(*(columns[name] for name in operand_format)))
+            else:
+                operands.extend([()] * len(low_bits))
+
+        for mask, value in cls.OPERAND_FORMAT_OVERRIDES:
+            for opcode in [opcode for opcode in range(cls.TABLE_SIZE) if opcode & mask == value]:
+                operands[opcode] = cls.extract_operands(opcode)
+        for opcode in [opcode for opcode, name_index in enumerate(indexes) if not name_index]:
+            operands[opcode] = (opcode,)
+        return operands
+
+    def cached_template(self):
+        """
+        (handler names, handler name indexes, operands) of the cpu's instructions table, from the process cache, or
+        built from the disk cache, if there is one, and stored in the process cache
+        """
+        signature = self.signature()
+        template = self.templates.get(signature)
+        if template is not None:
+            return template
+        if self.cache_directory is None:
+            names, indexes = self.build_template()
+        else:
+            names, indexes = self.disk_cached_template(signature)
+        template = self.templates[signature] = (names, indexes, self.build_operands(indexes))
+        return template
+
+    def disk_cached_template(self, signature):
+        """
+        (handler names, handler name indexes) read from the cache directory, or built and written there
+        """
+        template_path = os.path.join(self.cache_directory, f'decode_table-{signature}.marshal')
+        try:
+            with open(template_path, 'rb') as template_file:
+                names, indexes = marshal.load(template_file)
+            return names, indexes
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+        names, indexes = self.build_template()
+        try:
+            os.makedirs(self.cache_directory, exist_ok=True)
+            temporary_path = f'{template_path}.{os.getpid()}.tmp'
+            with open(temporary_path, 'wb') as template_file:
+                marshal.dump((names, indexes), template_file)
+            os.replace(temporary_path, template_path)
+        except OSError:
+            pass
+        return names, indexes
+
+    def build_decode_table(self):
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            names, indexes, operands = self.cached_template()
+            handlers = [getattr(self.chip8_cpu, name) for name in names]
+            return list(zip(map(handlers.__getitem__, indexes), operands))
+        finally:
+            if gc_enabled:
+                gc.enable()
@@ -0,0 +1,78 @@
+from core.lazy_import import lazy_import
+
+np = lazy_import('numpy')
+
+
+class FrameBuffer:
+    """
+    Bit-packed monochrome display, one Python int per row with the leftmost pixel on the most significant bit.
+
+    A sprite row is drawn with a single shift, wrap and XOR over the whole row, and the collision check is a single
+    AND between the previous row and the sprite bits.
+    """
+
+    def __init__(self, width=64, height=32):
+        self.width = width
+        self.height = height
+        self.row_mask = (1 << width) - 1
+        self.row_bytes = width // 8
+        self.rows = [0] * height
+
+    def clear(self):
+        rows = self.rows
+        for row_index in range(self.height):
+            rows[row_index] = 0
+
+    def draw_sprite(self, x, y, sprite, sprite_width=8):
+        """
+        XORs the sprite rows, sprite_width bits each, on the display starting at (x, y), wrapping around the edges.
+        Returns True if any lit pixel was turned off.
+        """
+        rows = self.rows
+        width = self.width
+        height = self.height
+        row_mask = self.row_mask
+        x %= width
+        collision = 0
+
+        for line, sprite_row in enumerate(sprite):
+            row_index = (y + line) % height
+            shifted = sprite_row << (width - sprite_width)
+            sprite_bits = ((shifted >> x) | (shifted << (width - x))) & row_mask
+            row = rows[row_index]
+            collision |= row & sprite_bits
+            rows[row_index] = row ^ sprite_bits
+        return collision != 0
+
+    def scroll_down(self, num_rows):
+        """
+        Moves the whole display num_rows down, the top rows scrolled in are blank
+        """
+        num_rows = min(num_rows, self.height)
+        self.rows[:] = [0] * num_rows + self.rows[:self.height - num_rows]
+
+    def scroll_right(self, num_pixels):
+        """
+        Moves the whole display num_pixels right with one shift per row, pixels shifted out are dropped
+        """
+        self.rows[:] = [row >> num_pixels for row in self.rows]
+
+    def scroll_left(self, num_pixels):
+        row_mask = self.row_mask
+        self.rows[:] = [(row << num_pixels) & row_mask for row in self.rows]
+
+    def to_bytes(self):
+        row_bytes = self.row_bytes
+        return b''.join(row.to_bytes(row_bytes, 'big') for row in self.rows)
+
+    def load_bytes(self, data):
+        row_bytes = self.row_bytes
+        self.rows[:] = [int.from_bytes(data[start:start + row_bytes], 'big')
+                        for start in range(0, self.height * row_bytes, row_bytes)]
+
+    def to_array(self):
+        """
+        Unpacks the display into a (height, width) uint8 array of 0/1 pixels
+        """
+        packed = np.frombuffer(self.to_bytes(), dtype=np.uint8)
+        return np.unpackbits(packed).reshape(self.height, self.width)
@@ -0,0 +1,89 @@
+from core.cpu.instrumentation import DecodeTableInstrument
+
+
+class CpuIdle(Exception):
+    """
+    Raised by a handler after it executed to tell the engine that nothing can change until the next timer tick or
+    input event, so the rest of the current batch of instructions can be skipped.
+    """
+
+
+class IdleDetector(DecodeTableInstrument):
+    """
+    Recognises idle patterns and stops the running batch on them by raising CpuIdle.
+
+    Detected patterns:
+        - 1nnn jumping to itself
+        - Fx0A waiting while no key is pressed
+        - short backward 1nnn loops (delay timer polling, key polling) whose iteration left the machine state,
+          memory and stack included, unchanged, since the next iteration can only behave differently after a timer
+          tick or an input event
+
+    As a DecodeTableInstrument it works by swapping decode table entries, only for 1nnn and Fx0A, so a detached cpu
+    runs the exact plain dispatch. Random draws count as progress through the random state in the fingerprint. The
+    loop fingerprints are dropped whenever the state is loaded from outside of the handlers.
+    """
+    # Longest backward jump, in bytes, that is fingerprinted as a possible polling loop
+    MAX_LOOP_SIZE = 32
+
+    def __init__(self, chip8_cpu, translator=None):
+        super().__init__(chip8_cpu, translator)
+        self.loop_fingerprints = {}
+
+    def fingerprint(self):
+        chip8_cpu = self.chip8_cpu
+        return (bytes(chip8_cpu.registers), int(chip8_cpu.index), tuple(chip8_cpu.stack), int(chip8_cpu.delay_timer),
+                bytes(chip8_cpu.keypad), tuple(chip8_cpu.frame_buffer.rows), chip8_cpu.random_state,
+                bytes(chip8_cpu.memory))
+
+    def idle_jump(self, handler):
+        chip8_cpu = self.chip8_cpu
+        max_loop_size = self.MAX_LOOP_SIZE
+        loop_fingerprints = self.loop_fingerprints
+
+        def jump_to_location(nnn):
+            jump_address = chip8_cpu.pc - 2
+            handler(nnn)
+            if nnn == jump_address:
+                raise CpuIdle
+            if 0 < jump_address - nnn <= max_loop_size:
+                fingerprint = self.fingerprint()
+                if loop_fingerprints.get(jump_address) == fingerprint:
+                    raise CpuIdle
+                loop_fingerprints[jump_address] = fingerprint
+
+        return jump_to_location
+
+    def idle_key_wait(self, handler):
+        chip8_cpu = self.chip8_cpu
+
+        def wait_for_key_press(x):
+            wait_address = chip8_cpu.pc - 2
+            handler(x)
+            if chip8_cpu.pc == wait_address:
+                raise CpuIdle
+
+        return wait_for_key_press
+
+    def instrument(self, decode_table):
+        instrumented_table = list(decode_table)
+        wrapped_ranges = (
+            (range(0x1000, 0x2000), self.idle_jump),
+            (range(0xF00A, 0x10000, 0x100), self.idle_key_wait),
+        )
+
+        wrappers = {}
+        for opcodes, wrap in wrapped_ranges:
+            for opcode in opcodes:
+                handler, operands = decode_table[opcode]
+                if handler not in wrappers:
+                    wrappers[handler] = wrap(handler)
+                instrumented_table[opcode] = (wrappers[handler], operands)
+        return instrumented_table
+
+    def state_loaded(self):
+        self.loop_fingerprints.clear()
+
+    def detach(self):
+        super().detach()
+        self.loop_fingerprints.clear()
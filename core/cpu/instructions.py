@@ -1,14 +1,65 @@
-import numpy as np
 from core.cpu.registers import Registers
+from core.cpu.native_registers import NativeRegisters
+from core.cpu.decoder import Decoder, StackOverflowError, UnknownOpcodeError
+from core.cpu.idle import CpuIdle
+from core.cpu.framebuffer import FrameBuffer
 from core.cpu.config.memory_config import Config
 
 
 class Cpu(Registers):
+    """
+    CHIP-8 interpreter over the NumPy state backend. Handlers mask their arithmetic explicitly to 8 bits for registers
+    and 12 bits for addresses, so they behave the same on any state backend.
+    """
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, seed=None, decode_cache_directory=None):
+        super().__init__(seed)
         self.instructions_table = {}
+        self.decode_table = []
+        # DecodeTableInstruments attached to this cpu, lowest first
+        self.instruments = []
         self.config_instructions()
+        self.decode_table = Decoder(self, decode_cache_directory).build_decode_table()
+
+    def fetch(self):
+        program_counter = self.pc
+        self.current_opcode = int(self.memory[program_counter]) << 8 | int(self.memory[program_counter + 1])
+        self.pc = program_counter + 2
+        return self.current_opcode
+
+    def execute(self, opcode):
+        handler, operands = self.decode_table[opcode]
+        handler(*operands)
+
+    def run_cycles(self, num_cycles):
+        """
+        Runs num_cycles fetch/execute steps with the decode table and the memory bound to locals, returning how many
+        instructions were executed. Stops early when a handler raises CpuIdle.
+        """
+        memory = self.memory
+        decode_table = self.decode_table
+        executed = 0
+
+        try:
+            for executed in range(1, num_cycles + 1):
+                program_counter = self.pc
+                opcode = int(memory[program_counter]) << 8 | int(memory[program_counter + 1])
+                self.current_opcode = opcode
+                self.pc = program_counter + 2
+                handler, operands = decode_table[opcode]
+                handler(*operands)
+        except CpuIdle:
+            pass
+        return executed
+
+    def tick_timers(self):
+        """
+        Decrements the delay and sound timers when they are above zero, called at 60 Hz
+        """
+        if self.delay_timer > 0:
+            self.delay_timer -= 1
+        if self.sound_timer > 0:
+            self.sound_timer -= 1
 
     def config_instructions(self):
 
@@ -40,6 +91,13 @@ class Cpu(Registers):
             # Digit 0 starters
             '00e0': self.clear_the_display,
             '00ee': self.return_from_subroutine,
+            # SUPER-CHIP digit 0 starters
+            **{f'00c{n:x}': self.scroll_display_down for n in range(16)},
+            '00fb': self.scroll_display_right,
+            '00fc': self.scroll_display_left,
+            '00fd': self.exit_interpreter,
+            '00fe': self.low_resolution_mode,
+            '00ff': self.high_resolution_mode,
             # Digit E start
             'e': {'a1': self.not_skip_instruction_if_key_pressed,
                   '9e': self.skip_instruction_if_key_pressed},
@@ -50,18 +108,30 @@ class Cpu(Registers):
                   '18': self.sound_timer_on_register_x,
                   '1e': self.add_register_x_and_index,
                   '29': self.stores_on_index_hex_sprite,
+                  '30': self.stores_on_index_large_hex_sprite,
                   '33': self.load_bcd_on_memory,
                   '55': self.load_registers_onto_memory,
-                  '65': self.load_memory_onto_register}
+                  '65': self.load_memory_onto_register,
+                  '75': self.store_registers_on_rpl_flags,
+                  '85': self.load_rpl_flags_onto_registers}
             }
 
+    def unknown_opcode_trap(self, opcode):
+        """
+        Trap for every opcode that is not mapped on the instructions table
+
+        OP_CODE: any unmapped opcode
+        OP_description: Raises UnknownOpcodeError with the opcode and the address it was fetched from
+        """
+        raise UnknownOpcodeError(f'Unknown opcode {opcode:#06x} at address {self.pc - 2:#05x}')
+
     def clear_the_display(self):
         """
         Completely set the video display to off, setting the array to False
 
         OP_CODE: 00E0
         """
-        self.video_display = np.zeros((128, 32), dtype=np.uint8)
+        self.frame_buffer.clear()
 
     def return_from_subroutine(self):
         """
@@ -70,9 +140,64 @@ class Cpu(Registers):
         OP_CODE: 00EE
         """
         self.stack_pointer -= 1
-        self.pc = self.stack[self.stack_pointer]
+        self.pc = self.stack.pop()
+
+    def scroll_display_down(self, n):
+        """
+        Scrolls the display down n pixels
+
+        OP_CODE: 00Cn (SUPER-CHIP)
+        OP_WHAT: 00C - Instruction / n - 4 bit number of rows
+        """
+        self.frame_buffer.scroll_down(n)
+
+    def scroll_display_right(self):
+        """
+        Scrolls the display right 4 pixels
 
-    def jump_to_location(self):
+        OP_CODE: 00FB (SUPER-CHIP)
+        """
+        self.frame_buffer.scroll_right(4)
+
+    def scroll_display_left(self):
+        """
+        Scrolls the display left 4 pixels
+
+        OP_CODE: 00FC (SUPER-CHIP)
+        """
+        self.frame_buffer.scroll_left(4)
+
+    def exit_interpreter(self):
+        """
+        Exits the interpreter
+
+        OP_CODE: 00FD (SUPER-CHIP)
+        OP_description: The pc is moved back onto this instruction, so the machine halts here without blocking the
+        caller.
+        """
+        self.pc -= 2
+
+    def low_resolution_mode(self):
+        """
+        Switches the display to 64x32
+
+        OP_CODE: 00FE (SUPER-CHIP)
+        OP_description: Replaces the frame buffer with a blank low resolution one, unless it already is
+        """
+        if (self.frame_buffer.width, self.frame_buffer.height) != Config.LOW_RESOLUTION:
+            self.frame_buffer = FrameBuffer(*Config.LOW_RESOLUTION)
+
+    def high_resolution_mode(self):
+        """
+        Switches the display to 128x64
+
+        OP_CODE: 00FF (SUPER-CHIP)
+        OP_description: Replaces the frame buffer with a blank high resolution one, unless it already is
+        """
+        if (self.frame_buffer.width, self.frame_buffer.height) != Config.HIGH_RESOLUTION:
+            self.frame_buffer = FrameBuffer(*Config.HIGH_RESOLUTION)
+
+    def jump_to_location(self, nnn):
         """
         Jump to a specific config location without saving current status on the stack
 
@@ -80,22 +205,25 @@ class Cpu(Registers):
         OP_WHAT: 1 - Instruction / nnn - 12 bit address
         OP_description: Sets the program counter (pc) to the 12 bit address specified in the nnn.
         """
-        self.pc = self.current_opcode & 0x0FFF
+        self.pc = nnn
 
-    def call_to_location(self):
+    def call_to_location(self, nnn):
         """
         Call to a specific config location saving the current status on the stack
 
         OP_CODE: 2nnn
         OP_WHAT: 2 - Instruction  / nnn - 12 bit address
         OP_description: Saves the current opcode on the stack and sets the program counter (pc) to the 12 bit config
-        address specified in the nnn and
+        address specified in the nnn. The stack holds STACK_SIZE return addresses, calling with a full stack raises
+        StackOverflowError.
         """
+        if self.stack_pointer >= self.STACK_SIZE:
+            raise StackOverflowError(f'Call to {nnn:#05x} at address {self.pc - 2:#05x} with a full stack')
         self.stack_pointer += 1
         self.stack.append(self.pc)
-        self.pc = self.current_opcode & 0x0FFF
+        self.pc = nnn
 
-    def skip_instr_register_x_equals_kk(self):
+    def skip_instr_register_x_equals_kk(self, x, kk):
         """
         Skips the next instructions if the Register[x] is equal to the kk address on the opcode
 
@@ -103,13 +231,10 @@ class Cpu(Registers):
         OP_WHAT: 3 - Instruction / x - 4 bit register address / kk - 8 bit content to compare
         OP_description: Skip the pc if the register[x] is equal to the kk byte content-wise
         """
-        x = self.current_opcode & 0x0F00 >> 8
-        kk = self.current_opcode & 0x00FF
-
         if self.registers[x] == kk:
             self.pc += 2
 
-    def skip_instr_register_x_not_equal_kk(self):
+    def skip_instr_register_x_not_equal_kk(self, x, kk):
         """
         Skips the next instructions if the Register[x] is NOT equal to the kk address on the opcode
 
@@ -117,13 +242,10 @@ class Cpu(Registers):
         OP_WHAT: 4 - Instruction / x - 4 bit register address / kk - 8 bit content to compare
         OP_description: Skip the pc if the register[x] is NOT equal to the kk byte content-wise
         """
-        x = self.current_opcode & 0x0F00 >> 8
-        kk = self.current_opcode & 0x00FF
-
         if self.registers[x] != kk:
             self.pc += 2
 
-    def skip_instr_register_x_equal_y(self):
+    def skip_instr_register_x_equal_y(self, x, y):
         """
         Skips the next instructions if the Register[x] is  equal to the register[y]
 
@@ -131,13 +253,10 @@ class Cpu(Registers):
         OP_WHAT: 5 - Instruction / x - 4 bit register address / 4 - 4 bit register address / 0 - Unused
         OP_description: Skip the pc if the register[x] is equal to the register[y] byte content-wise
         """
-        x = self.current_opcode & 0x0F00 >> 8
-        y = self.current_opcode & 0x00F0 >> 4
-
         if self.registers[x] == self.registers[y]:
             self.pc += 2
 
-    def load_value_into_register(self):
+    def load_value_into_register(self, x, kk):
         """
         Load the value of kk into a register specified in the opcode
 
@@ -145,11 +264,9 @@ class Cpu(Registers):
         OP_WHAT: 6 - Instruction / x - 4 bit register address / kk - 8 bit content to compare
         OP_description: Load the value kk into the register specified by the x
         """
-        x = self.current_opcode & 0x0F00 >> 8
-        kk = self.current_opcode & 0x00FF
         self.registers[x] = kk
 
-    def load_value_into_register_add(self):
+    def load_value_into_register_add(self, x, kk):
         """
         Load the value of (kk + register[x]) into a register specified in the opcode
 
@@ -157,12 +274,9 @@ class Cpu(Registers):
         OP_WHAT: 7 - Instruction / x - 4 bit register address / kk - 8 bit content to compare
         OP_description: Load the value kk + register[x] into the register specified by the x
         """
-        x = self.current_opcode & 0x0F00 >> 8
-        kk = self.current_opcode & 0x00FF
-        xkk = self.registers[x] + kk
-        self.registers[x] = xkk
+        self.registers[x] = (int(self.registers[x]) + kk) & 0xFF
 
-    def load_register_y_into_register_x(self):
+    def load_register_y_into_register_x(self, x, y):
         """
         Stores the value of register[y] into register[x]
 
@@ -170,11 +284,9 @@ class Cpu(Registers):
         OP_WHAT: 8 - Instruction / x - 4 bit register address / y - 4 bit register address / 0 - Instruction
         OP_description: Load the content of register[y] into register[x]
         """
-        x = self.current_opcode & 0x0F00 >> 8
-        y = self.current_opcode & 0x00F0 >> 4
         self.registers[x] = self.registers[y]
 
-    def cmp_or_x_y_into_register_x(self):
+    def cmp_or_x_y_into_register_x(self, x, y):
         """
         Performs a bitwise OR between values of register[x] and register[y]
 
@@ -183,11 +295,9 @@ class Cpu(Registers):
         OP_description: Perfoms a bitwise comparasion OR between the values of register[x] and register[y] and stores the
         result into register[x]
         """
-        x = self.current_opcode & 0x0F00 >> 8
-        y = self.current_opcode & 0x00F0 >> 4
         self.registers[x] = x | y
 
-    def cmp_and_x_y_into_register_x(self):
+    def cmp_and_x_y_into_register_x(self, x, y):
         """
         Performs a bitwise AND between values of register[x] and register[y]
 
@@ -196,11 +306,9 @@ class Cpu(Registers):
         OP_description: Perfoms a bitwise comparasion between AND the values of register[x] and register[y] and stores the
         result into register[x]
         """
-        x = self.current_opcode & 0x0F00 >> 8
-        y = self.current_opcode & 0x00F0 >> 4
         self.registers[x] = x & y
 
-    def cmp_xor_x_y_into_register_x(self):
+    def cmp_xor_x_y_into_register_x(self, x, y):
         """
         Performs a bitwise XOR between values of register[x] and register[y]
 
@@ -209,11 +317,9 @@ class Cpu(Registers):
         OP_description: Perfoms a bitwise comparasion between XOR the values of register[x] and register[y] and stores the
         result into register[x]
         """
-        x = self.current_opcode & 0x0F00 >> 8
-        y = self.current_opcode & 0x00F0 >> 4
         self.registers[x] = x ^ y
 
-    def add_x_y_into_register_x(self):
+    def add_x_y_into_register_x(self, x, y):
         """
         Performs a ADD between the values of register[x] and register[y]
 
@@ -222,8 +328,6 @@ class Cpu(Registers):
         OP_description: Perfoms a ADD between register[x] and register[y] and stores the result value into register[x].
         If the result is greater than 255, than the register[0xF] (int(15)) is set to 1.
         """
-        x = self.current_opcode & 0x0F00 >> 8
-        y = self.current_opcode & 0x00F0 >> 4
         add_x_y = x + y
         self.registers[x] = add_x_y & 0x00FF
         if add_x_y > 255:
@@ -231,7 +335,7 @@ class Cpu(Registers):
         else:
             self.registers[int(0xF)] = 0
 
-    def sub_x_y_into_register_x(self):
+    def sub_x_y_into_register_x(self, x, y):
         """
         Performs a SUB between the values of register[x] and register[y]
 
@@ -240,17 +344,14 @@ class Cpu(Registers):
         OP_description: Perfoms a SUB between register[x] and register[y] and stores the result value into register[x].
         If the register[x] > register[y], than the register[0xF] (int(15)) is set to 1.
         """
-        x = self.current_opcode & 0x0F00 >> 8
-        y = self.current_opcode & 0x00F0 >> 4
-
         if x > y:
             self.registers[int(0xF)] = 1
         else:
             self.registers[int(0xF)] = 0
         sub_x_y = x - y
-        self.registers[x] = sub_x_y
+        self.registers[x] = sub_x_y & 0xFF
 
-    def div_x_into_register_x(self):
+    def div_x_into_register_x(self, x, y):
         """
         Performs a division register[x]
 
@@ -259,16 +360,14 @@ class Cpu(Registers):
         OP_description: Perfoms a DIV of register[x] and stores the result value into register[x].
         If the register[x] least significant bit is 1, than the register[0xF] (int(15)) is set to 1.
         """
-        x = self.current_opcode & 0x0F00 >> 8
-
         if (x & 0x1) == 0x1:
             self.registers[int(0xF)] = 1
         else:
             self.registers[int(0xF)] = 0
-        div_x = x / 2
+        div_x = x >> 1
         self.registers[x] = div_x
 
-    def sub_y_x_into_register_x(self):
+    def sub_y_x_into_register_x(self, x, y):
         """
         Performs a SUB between the values of register[y] and register[x]
 
@@ -277,17 +376,14 @@ class Cpu(Registers):
         OP_description: Perfoms a SUB between register[y] and register[x] and stores the result value into register[x].
         If the register[x] > register[y], than the register[0xF] (int(15)) is set to 1.
         """
-        x = self.current_opcode & 0x0F00 >> 8
-        y = self.current_opcode & 0x00F0 >> 4
-
         if x > y:
             self.registers[int(0xF)] = 1
         else:
             self.registers[int(0xF)] = 0
         sub_y_x = y - x
-        self.registers[x] = sub_y_x
+        self.registers[x] = sub_y_x & 0xFF
 
-    def mul_x_into_register_x(self):
+    def mul_x_into_register_x(self, x, y):
         """
         Performs a multiply register[x]
 
@@ -296,16 +392,14 @@ class Cpu(Registers):
         OP_description: Perfoms a MUL of register[x] and stores the result value into register[x].
         If the register[x] most significant bit is 1, than the register[0xF] (int(15)) is set to 1.
         """
-        x = self.current_opcode & 0x0F00 >> 8
-
         if (x & 0x80 >> 7) == 0x1:
             self.registers[int(0xF)] = 1
         else:
             self.registers[int(0xF)] = 0
-        mul_x = x * 2
-        self.registers[x] = mul_x
+        mul_x = x << 1
+        self.registers[x] = mul_x & 0xFF
 
-    def skip_instr_register_x_not_equal_y(self):
+    def skip_instr_register_x_not_equal_y(self, x, y):
         """
         Skips the next instructions if the Register[x] is  not equal to the register[y]
 
@@ -313,13 +407,10 @@ class Cpu(Registers):
         OP_WHAT: 9 - Instruction / x - 4 bit register address / 4 - 4 bit register address / 0 - Unused
         OP_description: Skip the pc by 2 if the register[x] is not equal to the register[y] byte content-wise
         """
-        x = self.current_opcode & 0x0F00 >> 8
-        y = self.current_opcode & 0x00F0 >> 4
-
         if self.registers[x] != self.registers[y]:
             self.pc += 2
 
-    def store_addr_on_index(self):
+    def store_addr_on_index(self, nnn):
         """
         Set an address on the index register
 
@@ -327,10 +418,9 @@ class Cpu(Registers):
         OP_WHAT: A - Instruction / nnn - 12 bit register address.
         OP_description: Sets the value of the indes register with the 12 bit nnn address on the operand
         """
-        addr = self.current_opcode & 0x0FFF
-        self.index = addr
+        self.index = nnn
 
-    def jump_to_location_nnn_plus_register_zero(self):
+    def jump_to_location_nnn_plus_register_zero(self, nnn):
         """
         Jump to the location specified by the sum of the register 0 and the nnn operand
 
@@ -338,75 +428,65 @@ class Cpu(Registers):
         OP_WHAT: B - Instruction / nnn - 12 bit register address.
         OP_description: Sets the program counter with register[0] + nnn
         """
-        addr = self.current_opcode & 0x0FFF
-        self.pc = addr + self.registers[0]
+        self.pc = (nnn + int(self.registers[0])) & 0x0FFF
 
-    def store_random_number_on_register_x(self):
+    def store_random_number_on_register_x(self, x, kk):
         """
         Generates a random number that is anded with kk abd stored on a register
 
         OP_CODE: Cxkk
         OP_WHAT: C - Instruction / x - 4 bit register address / kk - 8 bit value
         OP_description: Sets the register[x] a random number anded with the kk value
+
+        The number is the top byte of a xorshift32 step over the machine's own random_state, so a seeded machine draws
+        the same sequence on every run and the state is saved along with the rest of the machine.
         """
-        # TODO: Implementation of a random number generation is still in working
+        state = self.random_state
+        state ^= (state << 13) & 0xFFFFFFFF
+        state ^= state >> 17
+        state ^= (state << 5) & 0xFFFFFFFF
+        self.random_state = state
+        self.registers[x] = (state >> 24) & kk
 
-    # TODO: Change the pixels values from raw to a exported attribute
-    def display_bytes_on_screen(self):
+    def display_bytes_on_screen(self, x, y, n):
         """
         Display n-bytes on screen
 
         OP_CODE: Dxyn
         OP_WHAT: D - Instruction / x - 4 bit register address / y - 4 bit register address / n - n bytes value
         OP_description: Change n bytes from position stored on register[x] and register[y]
+        With n == 0 (SUPER-CHIP Dxy0) a 16x16 sprite is drawn from 32 bytes, two per row.
         """
-        x = self.current_opcode & 0x0F00 >> 8
-        y = self.current_opcode & 0x00F0 >> 4
-        num_bytes = self.current_opcode & 0x000F
-        readed_bytes = []
-        self.registers[0xF] = 0
-
-        for i in range(num_bytes):
-            readed_bytes.append([self.memory[self.index + i]])
-
-        readed_array = np.array(readed_bytes, dtype=np.uint8)
-        readed_array = np.unpackbits(readed_array, axis=1)
-
-        for i, line in enumerate(readed_array):
-            for j, element in enumerate(line):
-                x_pos = (j + x) % 64
-                y_pos = (i + y) % 32
-                pixel_bit = self.video_display[x_pos][y_pos]
-                pixel_result = element ^ pixel_bit
-                self.video_display[x_pos][y_pos] = pixel_result
-                if pixel_bit == 1 and pixel_result == 0:
-                    self.registers[0xF] = 1
+        if n == 0:
+            sprite = bytes(self.memory[self.index:self.index + 32])
+            rows = [sprite[byte] << 8 | sprite[byte + 1] for byte in range(0, len(sprite) - 1, 2)]
+            collision = self.frame_buffer.draw_sprite(x, y, rows, 16)
+        else:
+            sprite = bytes(self.memory[self.index:self.index + n])
+            collision = self.frame_buffer.draw_sprite(x, y, sprite)
+        self.registers[0xF] = int(collision)
 
-    def skip_instruction_if_key_pressed(self):
+    def skip_instruction_if_key_pressed(self, x):
         """
         Skips the next instruction if the keys corresponding on the register x value is equal the value of the key
         OP_CODE: Ex9E
         OP_WHAT: E - Instruction / x - 4 bit register address / 9E - 8 bit instruction
         OP_description: If the register[x] is equal to the key number, than pc += 2
         """
-        x = self.current_opcode & 0x0F00 >> 8
-
         if self.keypad[x]:
             self.pc += 2
 
-    def not_skip_instruction_if_key_pressed(self):
+    def not_skip_instruction_if_key_pressed(self, x):
         """
         Not Skips the next instruction if the keys corresponding on the register x value is equal the value of the key
         OP_CODE: ExA1
         OP_WHAT: E - Instruction / x - 4 bit register address / A1 - 8 bit instruction
         OP_description: If the register[x] is equal to the key number, than pc += 2
         """
-        x = self.current_opcode & 0x0F00 >> 8
-
         if not self.keypad[x]:
             self.pc += 2
 
-    def delay_timer_on_register_x(self):
+    def delay_timer_on_register_x(self, x):
         """
         Stores delay timer on register x
 
@@ -414,28 +494,24 @@ class Cpu(Registers):
         OP_WHAT: F - Instruction / x - 4 bit register address / 07 - 8 bit instruction
         OP_description: Stores the value of self.delay_timer on register[x]
         """
-        x = self.current_opcode & 0x0F00 >> 8
-
         self.registers[x] = self.delay_timer
 
-    def wait_for_key_press(self):
+    def wait_for_key_press(self, x):
         """
         Waits for a key to be pressed and stores value on register x
 
         OP_CODE: Fx0A
         OP_WHAT: F - Instruction / x - 4 register address / 0A - 8 bit instruction
-        OP_description: Waits for a key to be pressed, and than stores the value of the key on register[x]
+        OP_description: Waits for a key to be pressed, and than stores the value of the key on register[x].
+        While no key is pressed the pc is moved back onto this instruction, so the wait never blocks the caller.
         """
-        x = self.current_opcode & 0x0F00 >> 8
-        key_press = False
+        for key, pressed in enumerate(self.keypad):
+            if pressed:
+                self.registers[x] = key
+                return
+        self.pc -= 2
 
-        while not key_press:
-            key_pressed = np.where(self.keypad == 1)
-            if key_pressed:
-                self.registers[x] = key_pressed[0]
-                key_press = True
-
-    def register_x_on_delay_timer(self):
+    def register_x_on_delay_timer(self, x):
         """
         Stores register x value on the delay timer
 
@@ -443,23 +519,19 @@ class Cpu(Registers):
         OP_WHAT: F - Instruction / x - 4 bit register address / 15 - 8 bit instruction
         OP_description: Stores the value of register[x] on self.delay_timer
         """
-        x = self.current_opcode & 0x0F00 >> 8
-
-        self.delay_timer = self.registers[x]
+        self.delay_timer = int(self.registers[x])
 
-    def sound_timer_on_register_x(self):
+    def sound_timer_on_register_x(self, x):
         """
-        Stores sound timer on register x
+        Stores register x value on the sound timer
 
         OP_CODE: Fx18
         OP_WHAT: F - Instruction / x - 4 bit register address / 18 - 8 bit instruction
-        OP_description: Stores the value of self.sound_timer on register[x]
+        OP_description: Stores the value of register[x] on self.sound_timer
         """
-        x = self.current_opcode & 0x0F00 >> 8
+        self.sound_timer = int(self.registers[x])
 
-        self.registers[x] = self.sound_timer
-
-    def add_register_x_and_index(self):
+    def add_register_x_and_index(self, x):
         """
         Add values of index and register x and stores on index
 
@@ -467,11 +539,9 @@ class Cpu(Registers):
         OP_WHAT: F - Instruction / x - 4 bit register address / 1E - 8 bit instruction
         OP_description: Add values of self.index and register[x] and stores result on self.index
         """
-        x = self.current_opcode & 0x0F00 >> 8
-
-        self.index = self.registers[x] + self.index
+        self.index = (int(self.registers[x]) + self.index) & 0x0FFF
 
-    def stores_on_index_hex_sprite(self):
+    def stores_on_index_hex_sprite(self, x):
         """
         Stores the config address of sprite with register x value
 
@@ -479,11 +549,18 @@ class Cpu(Registers):
         OP_WHAT: F - Instruction / x - 4 bit register address / 29 - 8 bit instruction
         """
 
-        x = self.current_opcode & 0x0F00 >> 8
+        self.index = Config.FONT_SET_START_ADDRESS + (int(self.registers[x]) * 5)
 
-        self.index = Config.FONT_SET_START_ADDRESS + (self.registers[x] * 5)
+    def stores_on_index_large_hex_sprite(self, x):
+        """
+        Stores the config address of the 8x10 digit sprite with register x value
+
+        OP_CODE: Fx30 (SUPER-CHIP)
+        OP_WHAT: F - Instruction / x - 4 bit register address / 30 - 8 bit instruction
+        """
+        self.index = Config.HIGH_FONT_SET_START_ADDRESS + (int(self.registers[x]) % 10) * 10
 
-    def load_bcd_on_memory(self):
+    def load_bcd_on_memory(self, x):
         """
         Stores the BCD representation of Vx in config on index locations
 
@@ -491,32 +568,54 @@ class Cpu(Registers):
         OP_WHAT:
         """
 
-        x = self.current_opcode & 0x0F00 >> 8
-
         self.memory[self.index] = int(str(self.registers[x])[-3])
         self.memory[self.index + 1] = int(str(self.registers[x])[-2])
         self.memory[self.index + 2] = int(str(self.registers[x])[-1])
 
-    def load_registers_onto_memory(self):
+    def load_registers_onto_memory(self, x):
         """
         Stores the value of a register into the config
         OP_CODE: Fx55
-        OP_WHAT:
+        OP_WHAT: F - Instruction / x - 4 bit register address / 55 - 8 bit instruction
+        OP_description: Stores registers V0 to Vx, inclusive, in memory starting at the index
         """
 
-        x = self.current_opcode & 0x0F00 >> 8
-
-        for i in range(x):
+        for i in range(x + 1):
             self.memory[self.index + i] = self.registers[i]
 
-    def load_memory_onto_register(self):
+    def load_memory_onto_register(self, x):
         """
         Stores the value of a register into the config
         OP_CODE: Fx65
-        OP_WHAT:
+        OP_WHAT: F - Instruction / x - 4 bit register address / 65 - 8 bit instruction
+        OP_description: Loads registers V0 to Vx, inclusive, from memory starting at the index
         """
 
-        x = self.current_opcode & 0x0F00 >> 8
-
-        for i in range(x):
+        for i in range(x + 1):
             self.registers[i] = self.memory[self.index + i]
+
+    def store_registers_on_rpl_flags(self, x):
+        """
+        Stores registers 0 to x on the RPL user flags
+
+        OP_CODE: Fx75 (SUPER-CHIP)
+        OP_WHAT: F - Instruction / x - 4 bit register address, at most 7 / 75 - 8 bit instruction
+        """
+        num_flags = min(x, Config.NUM_RPL_FLAGS - 1) + 1
+        self.rpl_flags[:num_flags] = self.registers[:num_flags]
+
+    def load_rpl_flags_onto_registers(self, x):
+        """
+        Loads registers 0 to x from the RPL user flags
+
+        OP_CODE: Fx85 (SUPER-CHIP)
+        OP_WHAT: F - Instruction / x - 4 bit register address, at most 7 / 85 - 8 bit instruction
+        """
+        num_flags = min(x, Config.NUM_RPL_FLAGS - 1) + 1
+        self.registers[:num_flags] = self.rpl_flags[:num_flags]
+
+
+class NativeCpu(Cpu, NativeRegisters):
+    """
+    CHIP-8 interpreter over the bytearray/Python int state backend
+    """
@@ -0,0 +1,81 @@
+class DecodeTableInstrument:
+    """
+    Base of the instrumentation that works by swapping cpu.decode_table for a copy with some handlers wrapped, so a
+    cpu without instruments runs the exact plain dispatch.
+
+    The instruments attached to a cpu form a stack in cpu.instruments, each one wrapping the table of the one below
+    it, the lowest one the decoded table. Detaching an instrument, or rebuilding its table like the debugger does when
+    its breakpoints change, rebuilds the tables of every instrument above it over the new table below, so instruments
+    can be attached and detached in any order without dropping each other's wrappers.
+
+    Subclasses implement instrument(decode_table), returning their wrapped copy of the table below them, and may
+    implement state_loaded(), called through notify_state_loaded() whenever the machine state is written from outside
+    of the instruction handlers (save state restores, memory and ROM loads, fork switches), to drop whatever they
+    derived from the previous state.
+
+    Translated blocks only set cpu.pc and cpu.current_opcode before their last instruction. Instruments whose
+    wrappers read them set EXACT_PC, and while one is attached the translator sets both before every instruction.
+    """
+    EXACT_PC = False
+
+    def __init__(self, chip8_cpu, translator=None):
+        self.chip8_cpu = chip8_cpu
+        self.translator = translator
+        # Table of the instrument below, or decoded table, and the wrapped copy of it while attached
+        self.base_decode_table = None
+        self.instrumented_table = None
+
+    @property
+    def attached(self):
+        return self in self.chip8_cpu.instruments
+
+    def instrument(self, decode_table):
+        raise NotImplementedError
+
+    def state_loaded(self):
+        pass
+
+    @staticmethod
+    def notify_state_loaded(chip8_cpu, loader=None):
+        """
+        Tells every instrument attached to chip8_cpu but loader that its state was replaced
+        """
+        for instrument in chip8_cpu.instruments:
+            if instrument is not loader:
+                instrument.state_loaded()
+
+    def attach(self):
+        if self.attached:
+            return
+        instruments = self.chip8_cpu.instruments
+        instruments.append(self)
+        self.restack(len(instruments) - 1, self.chip8_cpu.decode_table)
+
+    def detach(self):
+        if not self.attached:
+            return
+        instruments = self.chip8_cpu.instruments
+        position = instruments.index(self)
+        decode_table = self.base_decode_table
+        instruments.remove(self)
+        self.base_decode_table = self.instrumented_table = None
+        self.restack(position, decode_table)
+        if self.translator is not None:
+            self.translator.flush()
+
+    def rebuild(self):
+        """
+        Rebuilds the table of this attached instrument and of the instruments above it
+        """
+        self.restack(self.chip8_cpu.instruments.index(self), self.base_decode_table)
+
+    def restack(self, position, decode_table):
+        translators = set()
+        for instrument in self.chip8_cpu.instruments[position:]:
+            instrument.base_decode_table = decode_table
+            decode_table = instrument.instrumented_table = instrument.instrument(decode_table)
+            if instrument.translator is not None:
+                translators.add(instrument.translator)
+        self.chip8_cpu.decode_table = decode_table
+        for translator in translators:
+            translator.flush()
@@ -0,0 +1,39 @@
+from core.lazy_import import lazy_import
+from core.cpu.registers import Registers
+from core.cpu.config.memory_config import Config
+from core.cpu.framebuffer import FrameBuffer
+
+np = lazy_import('numpy')
+
+
+class NativeRegisters(Registers):
+    """
+    Machine state on plain Python containers: bytearray memory, registers and keypad, and a list stack, so every
+    access in the hot loop returns a Python int instead of a NumPy scalar.
+
+    NumPy views over the same buffers are available on demand, without copies, for rendering and batch tooling.
+    """
+
+    def __init__(self, seed=None):
+        self.registers = bytearray(16)
+        self.memory = bytearray(4096)
+        self.stack = []
+        self.keypad = bytearray(16)
+        self.rpl_flags = bytearray(Config.NUM_RPL_FLAGS)
+        self.frame_buffer = FrameBuffer()
+        self.current_opcode = 0
+        self.index = 0
+        self.pc = Config.MEMORY_START_ADDRESS
+        self.stack_pointer = 0
+        self.delay_timer = 0
+        self.sound_timer = 0
+        self.random_state = self.initial_random_state(seed)
+
+    def memory_array(self):
+        return np.frombuffer(self.memory, dtype=np.uint8)
+
+    def registers_array(self):
+        return np.frombuffer(self.registers, dtype=np.uint8)
+
+    def keypad_array(self):
+        return np.frombuffer(self.keypad, dtype=np.uint8)
@@ -0,0 +1,101 @@
+import json
+import time
+from collections import Counter
+
+from core.cpu.instrumentation import DecodeTableInstrument
+
+
+class Profiler(DecodeTableInstrument):
+    """
+    Runtime-attachable instrumentation over the Cpu dispatch.
+
+    attach() swaps cpu.decode_table for a copy whose handlers are wrapped with counters and timers, detach() puts the
+    table below back, so a detached cpu runs the exact uninstrumented code path.
+
+    Per-PC counts are exact on the interpreter. Translated blocks only update the pc before their last instruction,
+    so pass the translator to have its block cache flushed and prefer the interpreter when the hot-PC map matters.
+    """
+
+    def __init__(self, chip8_cpu, translator=None):
+        super().__init__(chip8_cpu, translator)
+        self.handler_counts = Counter()
+        self.handler_times = Counter()
+        self.pc_counts = Counter()
+        self.collisions = 0
+
+    @property
+    def cycles(self):
+        return sum(self.handler_counts.values())
+
+    @property
+    def draws(self):
+        return self.handler_counts[self.chip8_cpu.display_bytes_on_screen.__name__]
+
+    def instrumented(self, handler):
+        chip8_cpu = self.chip8_cpu
+        handler_name = handler.__name__
+        handler_counts = self.handler_counts
+        handler_times = self.handler_times
+        pc_counts = self.pc_counts
+        clock = time.perf_counter
+        is_draw = handler_name == chip8_cpu.display_bytes_on_screen.__name__
+
+        def instrumented_handler(*operands):
+            pc_counts[chip8_cpu.pc - 2] += 1
+            start = clock()
+            handler(*operands)
+            handler_times[handler_name] += clock() - start
+            handler_counts[handler_name] += 1
+            if is_draw and chip8_cpu.registers[0xF]:
+                self.collisions += 1
+
+        instrumented_handler.__name__ = handler_name
+        return instrumented_handler
+
+    def instrument(self, decode_table):
+        wrappers = {}
+        for handler, _ in decode_table:
+            if handler not in wrappers:
+                wrappers[handler] = self.instrumented(handler)
+        return [(wrappers[handler], operands) for handler, operands in decode_table]
+
+    def reset(self):
+        self.handler_counts.clear()
+        self.handler_times.clear()
+        self.pc_counts.clear()
+        self.collisions = 0
+
+    def report(self, top_pcs=10):
+        cycles = max(self.cycles, 1)
+        lines = [f'cycles: {self.cycles}  draws: {self.draws}  collisions: {self.collisions}', '',
+                 f'{"handler":45} {"count":>10} {"share":>7} {"total ms":>10} {"ns/call":>9}']
+        for handler_name, count in self.handler_counts.most_common():
+            total_time = self.handler_times[handler_name]
+            lines.append(f'{handler_name:45} {count:>10} {count / cycles:>7.1%} {total_time * 1000:>10.2f} '
+                         f'{total_time / count * 1e9:>9.0f}')
+        lines += ['', f'{"pc":>6} {"count":>10}']
+        for pc, count in self.pc_counts.most_common(top_pcs):
+            lines.append(f'{pc:#06x} {count:>10}')
+        return '\n'.join(lines)
+
+    def to_dict(self):
+        return {
+            'cycles': self.cycles,
+            'draws': self.draws,
+            'collisions': self.collisions,
+            'handlers': {handler_name: {'count': count, 'time': self.handler_times[handler_name]}
+                         for handler_name, count in self.handler_counts.items()},
+            'pcs': {f'{pc:#05x}': count for pc, count in sorted(self.pc_counts.items())},
+        }
+
+    def dump_json(self, file_path):
+        with open(file_path, 'w') as dump_file:
+            json.dump(self.to_dict(), dump_file, indent=2)
+
+    def dump_folded(self, file_path):
+        """
+        Folded stacks (chip8;handler count-in-microseconds) readable by flamegraph.pl and speedscope
+        """
+        with open(file_path, 'w') as dump_file:
+            for handler_name, total_time in self.handler_times.most_common():
+                dump_file.write(f'chip8;{handler_name} {max(int(total_time * 1e6), 1)}\n')
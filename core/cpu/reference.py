@@ -0,0 +1,239 @@
+from core.cpu.config.memory_config import Config
+from core.cpu.config.memory_starter import MemoryStarter
+from core.cpu.decoder import UnknownOpcodeError
+
+
+class UndefinedBehavior(Exception):
+    """
+    Raised by the ReferenceCpu on an instruction whose result the engines are free to choose: memory accesses past
+    the end of memory, stack overflow or underflow, keys, digits and RPL flags out of range
+    """
+
+
+class ReferenceCpu:
+    """
+    Straightforward CHIP-8/SUPER-CHIP interpreter used as the oracle of the conformance harness.
+
+    It shares no code with the engines: no decode table, no handlers, no FrameBuffer. Every instruction is decoded
+    from its nibbles by one if chain and sprites are drawn pixel by pixel, so it is slow but easy to check against
+    the specification. It follows the semantics the engines picked where CHIP-8 variants disagree: 8xy6/8xyE shift
+    Vx, Fx55/Fx65 leave the index unchanged, Bnnn adds V0, VF is written after the result, sprites wrap around the
+    edges, Dxy0 draws a 16x16 sprite and the low nibble of 5xy0/9xy0 is ignored. Anything outside of that is raised
+    as UndefinedBehavior instead of guessed.
+    """
+    STACK_SIZE = 16
+    PIXEL_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+
+    def __init__(self):
+        self.memory = bytearray(MemoryStarter.build_startup_image())
+        self.registers = bytearray(16)
+        self.keypad = bytearray(16)
+        self.rpl_flags = bytearray(Config.NUM_RPL_FLAGS)
+        self.stack = []
+        self.pc = Config.MEMORY_START_ADDRESS
+        self.index = 0
+        self.delay_timer = 0
+        self.sound_timer = 0
+        self.random_state = 1
+        self.width, self.height = Config.LOW_RESOLUTION
+        # One byte per pixel, 0 or 1, row after row
+        self.pixels = bytearray(self.width * self.height)
+
+    def read_memory(self, address, length):
+        if address + length > Config.MEMORY_SIZE:
+            raise UndefinedBehavior(f'reading {length} bytes at {address:#05x}')
+        return self.memory[address:address + length]
+
+    def write_memory(self, address, values):
+        if address + len(values) > Config.MEMORY_SIZE:
+            raise UndefinedBehavior(f'writing {len(values)} bytes at {address:#05x}')
+        self.memory[address:address + len(values)] = bytes(values)
+
+    def set_resolution(self, resolution):
+        if (self.width, self.height) != resolution:
+            self.width, self.height = resolution
+            self.pixels = bytearray(self.width * self.height)
+
+    def display_bytes(self):
+        """
+        The display packed eight pixels per byte, leftmost pixel on the most significant bit, row after row
+        """
+        return int(b'1' + self.pixels.translate(self.PIXEL_DIGITS), 2).to_bytes(len(self.pixels) // 8 + 1, 'big')[1:]
+
+    def draw(self, x, y, sprite_rows, sprite_width):
+        """
+        XORs the sprite pixel by pixel starting at (x, y), wrapping around the edges. Returns 1 if any lit pixel was
+        turned off.
+        """
+        collision = 0
+        for line, sprite_row in enumerate(sprite_rows):
+            for column in range(sprite_width):
+                if sprite_row >> (sprite_width - 1 - column) & 1:
+                    pixel = (y + line) % self.height * self.width + (x + column) % self.width
+                    collision |= self.pixels[pixel]
+                    self.pixels[pixel] ^= 1
+        return collision
+
+    def scroll(self, rows_down, pixels_right):
+        """
+        Moves every pixel rows_down rows down and pixels_right pixels right (left when negative), blanking the pixels
+        scrolled in
+        """
+        width = self.width
+        scrolled = bytearray(len(self.pixels))
+        for row in range(self.height - rows_down):
+            line = self.pixels[row * width:(row + 1) * width]
+            if pixels_right >= 0:
+                line = bytes(pixels_right) + line[:width - pixels_right]
+            else:
+                line = line[-pixels_right:] + bytes(-pixels_right)
+            start = (row + rows_down) * width
+            scrolled[start:start + width] = line
+        self.pixels = scrolled
+
+    def step(self):
+        """
+        Fetches and executes one instruction
+        """
+        if self.pc > Config.MEMORY_SIZE - 2:
+            raise UndefinedBehavior(f'fetching at {self.pc:#05x}')
+        opcode = self.memory[self.pc] << 8 | self.memory[self.pc + 1]
+        self.pc += 2
+
+        nibble = opcode >> 12
+        x = opcode >> 8 & 0xF
+        y = opcode >> 4 & 0xF
+        n = opcode & 0xF
+        kk = opcode & 0xFF
+        nnn = opcode & 0xFFF
+        v = self.registers
+
+        if opcode == 0x00E0:
+            self.pixels = bytearray(self.width * self.height)
+        elif opcode == 0x00EE:
+            if not self.stack:
+                raise UndefinedBehavior('return with an empty stack')
+            self.pc = self.stack.pop()
+        elif opcode & 0xFFF0 == 0x00C0:
+            self.scroll(n, 0)
+        elif opcode == 0x00FB:
+            self.scroll(0, 4)
+        elif opcode == 0x00FC:
+            self.scroll(0, -4)
+        elif opcode == 0x00FD:
+            self.pc -= 2
+        elif opcode == 0x00FE:
+            self.set_resolution(Config.LOW_RESOLUTION)
+        elif opcode == 0x00FF:
+            self.set_resolution(Config.HIGH_RESOLUTION)
+        elif nibble == 0x1:
+            self.pc = nnn
+        elif nibble == 0x2:
+            if len(self.stack) == self.STACK_SIZE:
+                raise UndefinedBehavior('call with a full stack')
+            self.stack.append(self.pc)
+            self.pc = nnn
+        elif nibble == 0x3:
+            if v[x] == kk:
+                self.pc += 2
+        elif nibble == 0x4:
+            if v[x] != kk:
+                self.pc += 2
+        elif nibble == 0x5:
+            if v[x] == v[y]:
+                self.pc += 2
+        elif nibble == 0x6:
+            v[x] = kk
+        elif nibble == 0x7:
+            v[x] = (v[x] + kk) % 256
+        elif nibble == 0x8 and n == 0x0:
+            v[x] = v[y]
+        elif nibble == 0x8 and n == 0x1:
+            v[x] = v[x] | v[y]
+        elif nibble == 0x8 and n == 0x2:
+            v[x] = v[x] & v[y]
+        elif nibble == 0x8 and n == 0x3:
+            v[x] = v[x] ^ v[y]
+        elif nibble == 0x8 and n == 0x4:
+            total = v[x] + v[y]
+            v[x] = total % 256
+            v[0xF] = 1 if total > 255 else 0
+        elif nibble == 0x8 and n == 0x5:
+            no_borrow = 1 if v[x] >= v[y] else 0
+            v[x] = (v[x] - v[y]) % 256
+            v[0xF] = no_borrow
+        elif nibble == 0x8 and n == 0x6:
+            shifted_out = v[x] % 2
+            v[x] = v[x] // 2
+            v[0xF] = shifted_out
+        elif nibble == 0x8 and n == 0x7:
+            no_borrow = 1 if v[y] >= v[x] else 0
+            v[x] = (v[y] - v[x]) % 256
+            v[0xF] = no_borrow
+        elif nibble == 0x8 and n == 0xE:
+            shifted_out = v[x] // 128
+            v[x] = v[x] * 2 % 256
+            v[0xF] = shifted_out
+        elif nibble == 0x9:
+            if v[x] != v[y]:
+                self.pc += 2
+        elif nibble == 0xA:
+            self.index = nnn
+        elif nibble == 0xB:
+            self.pc = (nnn + v[0]) % Config.MEMORY_SIZE
+        elif nibble == 0xC:
+            state = self.random_state
+            state ^= (state << 13) % 2 ** 32
+            state ^= state >> 17
+            state ^= (state << 5) % 2 ** 32
+            self.random_state = state
+            v[x] = (state >> 24) & kk
+        elif nibble == 0xD:
+            if n == 0:
+                sprite = self.read_memory(self.index, 32)
+                sprite_rows = [sprite[line * 2] << 8 | sprite[line * 2 + 1] for line in range(16)]
+                v[0xF] = self.draw(v[x], v[y], sprite_rows, 16)
+            else:
+                v[0xF] = self.draw(v[x], v[y], self.read_memory(self.index, n), 8)
+        elif nibble == 0xE and kk in (0x9E, 0xA1):
+            if v[x] > 0xF:
+                raise UndefinedBehavior(f'key {v[x]:#04x}')
+            if bool(self.keypad[v[x]]) == (kk == 0x9E):
+                self.pc += 2
+        elif nibble == 0xF and kk == 0x07:
+            v[x] = self.delay_timer
+        elif nibble == 0xF and kk == 0x0A:
+            pressed = [key for key in range(16) if self.keypad[key]]
+            if pressed:
+                v[x] = pressed[0]
+            else:
+                self.pc -= 2
+        elif nibble == 0xF and kk == 0x15:
+            self.delay_timer = v[x]
+        elif nibble == 0xF and kk == 0x18:
+            self.sound_timer = v[x]
+        elif nibble == 0xF and kk == 0x1E:
+            self.index = (self.index + v[x]) % Config.MEMORY_SIZE
+        elif nibble == 0xF and kk == 0x29:
+            if v[x] > 0xF:
+                raise UndefinedBehavior(f'font digit {v[x]:#04x}')
+            self.index = Config.FONT_SET_START_ADDRESS + v[x] * 5
+        elif nibble == 0xF and kk == 0x30:
+            if v[x] > 9:
+                raise UndefinedBehavior(f'large font digit {v[x]:#04x}')
+            self.index = Config.HIGH_FONT_SET_START_ADDRESS + v[x] * 10
+        elif nibble == 0xF and kk == 0x33:
+            self.write_memory(self.index, (v[x] // 100, v[x] // 10 % 10, v[x] % 10))
+        elif nibble == 0xF and kk == 0x55:
+            self.write_memory(self.index, v[:x + 1])
+        elif nibble == 0xF and kk == 0x65:
+            v[:x + 1] = self.read_memory(self.index, x + 1)
+        elif nibble == 0xF and kk in (0x75, 0x85):
+            if x >= Config.NUM_RPL_FLAGS:
+                raise UndefinedBehavior(f'RPL flag {x}')
+            if kk == 0x75:
+                self.rpl_flags[:x + 1] = v[:x + 1]
+            else:
+                v[:x + 1] = self.rpl_flags[:x + 1]
+        else:
+            raise UnknownOpcodeError(f'Unknown opcode {opcode:#06x} at address {self.pc - 2:#05x}')
@@ -1,18 +1,48 @@
+import random
 from collections import deque
-import numpy as np
+from core.lazy_import import lazy_import
 from core.cpu.config.memory_config import Config
+from core.cpu.framebuffer import FrameBuffer
+
+np = lazy_import('numpy')
 
 
 class Registers:
-    def __init__(self):
+    STACK_SIZE = 16
+
+    def __init__(self, seed=None):
         self.registers = np.zeros(16, dtype=np.uint8)
         self.memory = np.zeros(4096, dtype=np.uint8)
         self.stack = deque()
         self.keypad = np.zeros(16, dtype=np.uint8)
-        self.video_display = np.zeros((128, 32), dtype=np.uint8)
+        self.rpl_flags = np.zeros(Config.NUM_RPL_FLAGS, dtype=np.uint8)
+        self.frame_buffer = FrameBuffer()
         self.current_opcode = 0
         self.index = 0
         self.pc = Config.MEMORY_START_ADDRESS
         self.stack_pointer = 0
         self.delay_timer = 0
         self.sound_timer = 0
+        self.random_state = self.initial_random_state(seed)
+
+    @staticmethod
+    def initial_random_state(seed=None):
+        """
+        Nonzero 32 bit xorshift state derived from the seed, or from the process wide generator when seed is None
+        """
+        if seed is None:
+            seed = random.getrandbits(32)
+        return (seed * 0x9E3779B9 + 1) & 0xFFFFFFFF or 1
+
+    @property
+    def video_display(self):
+        """
+        Unpacked (width, height) copy of the packed frame buffer, indexed as video_display[x][y]: (64, 32), or
+        (128, 64) in SUPER-CHIP high resolution, where it used to be a (128, 32) array drawn into directly.
+
+        The copy is read-only so stale code writing pixels through it fails loudly instead of being silently lost.
+        Drawing goes through frame_buffer.
+        """
+        video_display = self.frame_buffer.to_array().T
+        video_display.setflags(write=False)
+        return video_display
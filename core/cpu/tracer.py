@@ -0,0 +1,207 @@
+import argparse
+import queue
+import re
+import struct
+import threading
+import zlib
+
+from core.cpu.instrumentation import DecodeTableInstrument
+
+
+class Tracer(DecodeTableInstrument):
+    """
+    Binary execution trace, attached as a DecodeTableInstrument, so a detached cpu pays nothing.
+
+    Every traced instruction is packed as one fixed-size RECORD (cycle, pc, opcode, I, delay and sound timers, the
+    registers after it and their XOR against the registers before it) into a preallocated ring of segments. Full
+    segments are handed to a writer thread that optionally zlib-compresses them and appends them to the file as
+    CHUNK headers plus payloads, while the emulation keeps filling the next free segment.
+
+    Filters: only handlers whose name is in handler_names are traced, the others only count cycles, and only
+    instructions with pc_range[0] <= pc < pc_range[1] are recorded. The tracer sets EXACT_PC, so pc and opcode are
+    exact in translated blocks too.
+    """
+    MAGIC = b'CH8T'
+    VERSION = 1
+    FILE_HEADER = struct.Struct('<4sBBH')
+    RECORD = struct.Struct('<QHHHBB16s16s')
+    CHUNK = struct.Struct('<II')
+    EXACT_PC = True
+
+    def __init__(self, chip8_cpu, file_path, translator=None, segment_records=16384, num_segments=4, compress=True,
+                 pc_range=None, handler_names=None):
+        super().__init__(chip8_cpu, translator)
+        self.file_path = file_path
+        self.segment_records = segment_records
+        self.num_segments = num_segments
+        self.compress = compress
+        self.pc_range = pc_range if pc_range is not None else (0, 0x10000)
+        self.handler_names = None if handler_names is None else frozenset(handler_names)
+
+        self.segment_size = segment_records * self.RECORD.size
+        self.ring = memoryview(bytearray(self.segment_size * num_segments))
+        self.free_segments = threading.Semaphore(num_segments - 1)
+        self.full_segments = queue.SimpleQueue()
+        self.segment = 0
+        self.position = 0
+        self.cycle = 0
+        self.records_written = 0
+        self.stalls = 0
+
+        self.trace_file = open(file_path, 'wb')
+        self.trace_file.write(self.FILE_HEADER.pack(self.MAGIC, self.VERSION, int(compress), self.RECORD.size))
+        self.writer = threading.Thread(target=self.write_segments, name='trace-writer', daemon=True)
+        self.writer.start()
+
+    def write_segments(self):
+        while True:
+            item = self.full_segments.get()
+            if item is None:
+                break
+            segment, length = item
+            start = segment * self.segment_size
+            payload = self.ring[start:start + length].tobytes()
+            self.free_segments.release()
+            if self.compress:
+                payload = zlib.compress(payload, 1)
+            self.trace_file.write(self.CHUNK.pack(len(payload), length // self.RECORD.size))
+            self.trace_file.write(payload)
+        self.trace_file.close()
+
+    def next_segment(self):
+        self.full_segments.put((self.segment, self.position))
+        if not self.free_segments.acquire(blocking=False):
+            self.stalls += 1
+            self.free_segments.acquire()
+        self.segment = (self.segment + 1) % self.num_segments
+        self.position = 0
+
+    def counted(self, handler):
+        def counted_handler(*operands):
+            self.cycle += 1
+            handler(*operands)
+
+        counted_handler.__name__ = handler.__name__
+        return counted_handler
+
+    def traced(self, handler):
+        chip8_cpu = self.chip8_cpu
+        pack_into = self.RECORD.pack_into
+        record_size = self.RECORD.size
+        segment_size = self.segment_size
+        ring = self.ring
+        start_pc, end_pc = self.pc_range
+
+        def traced_handler(*operands):
+            pc = chip8_cpu.pc - 2
+            opcode = chip8_cpu.current_opcode
+            before = bytes(chip8_cpu.registers)
+            self.cycle += 1
+            try:
+                handler(*operands)
+            finally:
+                if start_pc <= pc < end_pc:
+                    after = bytes(chip8_cpu.registers)
+                    changed = int.from_bytes(before, 'little') ^ int.from_bytes(after, 'little')
+                    pack_into(ring, self.segment * segment_size + self.position, self.cycle, pc, opcode,
+                              int(chip8_cpu.index), int(chip8_cpu.delay_timer), int(chip8_cpu.sound_timer), after,
+                              changed.to_bytes(16, 'little'))
+                    self.records_written += 1
+                    self.position += record_size
+                    if self.position == segment_size:
+                        self.next_segment()
+
+        traced_handler.__name__ = handler.__name__
+        return traced_handler
+
+    def instrument(self, decode_table):
+        wrappers = {}
+        for handler, _ in decode_table:
+            if handler not in wrappers:
+                is_traced = self.handler_names is None or handler.__name__ in self.handler_names
+                wrappers[handler] = self.traced(handler) if is_traced else self.counted(handler)
+        return [(wrappers[handler], operands) for handler, operands in decode_table]
+
+    def close(self):
+        """
+        Detaches, writes the partially filled segment and waits for the writer to finish the file
+        """
+        self.detach()
+        if self.writer.is_alive():
+            if self.position:
+                self.full_segments.put((self.segment, self.position))
+            self.full_segments.put(None)
+            self.writer.join()
+
+
+class TraceReader:
+    """
+    Offline decoder of Tracer files, yielding records as dicts with the registers changed by each instruction
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+
+    def __iter__(self):
+        with open(self.file_path, 'rb') as trace_file:
+            magic, version, compressed, record_size = Tracer.FILE_HEADER.unpack(
+                trace_file.read(Tracer.FILE_HEADER.size))
+            if magic != Tracer.MAGIC or version != Tracer.VERSION or record_size != Tracer.RECORD.size:
+                raise ValueError(f'{self.file_path} is not a version {Tracer.VERSION} execution trace')
+
+            while True:
+                chunk_header = trace_file.read(Tracer.CHUNK.size)
+                if len(chunk_header) < Tracer.CHUNK.size:
+                    return
+                length, num_records = Tracer.CHUNK.unpack(chunk_header)
+                payload = trace_file.read(length)
+                if compressed:
+                    payload = zlib.decompress(payload)
+                for cycle, pc, opcode, index, delay_timer, sound_timer, registers, changed in \
+                        Tracer.RECORD.iter_unpack(payload):
+                    yield {
+                        'cycle': cycle,
+                        'pc': pc,
+                        'opcode': opcode,
+                        'index': index,
+                        'delay_timer': delay_timer,
+                        'sound_timer': sound_timer,
+                        'registers': registers,
+                        'changed': {register: (registers[register] ^ changed[register], registers[register])
+                                    for register in range(16) if changed[register]},
+                    }
+
+    @staticmethod
+    def format(record, disassembler):
+        changes = ' '.join(f'V{register:X}:{before:02x}->{after:02x}'
+                           for register, (before, after) in record['changed'].items())
+        return (f'{record["cycle"]:>10} {record["pc"]:#05x} {record["opcode"]:04x} '
+                f'{disassembler.mnemonic(record["opcode"]):22} I={record["index"]:03x} {changes}')
+
+
+if __name__ == '__main__':
+    from core.analysis.disassembler import Disassembler
+
+    parser = argparse.ArgumentParser(prog='python -m core.cpu.tracer', description='Pretty-print an execution trace')
+    parser.add_argument('trace')
+    parser.add_argument('--pc', help='only addresses in START-END, hexadecimal')
+    parser.add_argument('--grep', help='only lines matching this regular expression')
+    parser.add_argument('--limit', type=int, help='stop after this many lines')
+    arguments = parser.parse_args()
+
+    pc_start, pc_end = 0, 0x10000
+    if arguments.pc is not None:
+        pc_start, pc_end = (int(address, 16) for address in arguments.pc.split('-'))
+    pattern = re.compile(arguments.grep) if arguments.grep is not None else None
+    trace_disassembler = Disassembler()
+    num_lines = 0
+    for trace_record in TraceReader(arguments.trace):
+        if not pc_start <= trace_record['pc'] < pc_end:
+            continue
+        line = TraceReader.format(trace_record, trace_disassembler)
+        if pattern is not None and not pattern.search(line):
+            continue
+        print(line)
+        num_lines += 1
+        if arguments.limit is not None and num_lines >= arguments.limit:
+            break
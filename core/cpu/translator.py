@@ -0,0 +1,161 @@
+from core.cpu.idle import CpuIdle
+
+
+class BlockTranslator:
+    """
+    Translates basic blocks of CHIP-8 code into compiled Python functions cached by their start address.
+
+    A block runs from its start address up to the next instruction that changes the control flow (jump, call,
+    return, skip, exit), draws (Dxyn), waits for a key (Fx0A) or writes to memory through the index (Fx33/Fx55). Each
+    block is generated as source calling the decoded handlers with their operands as constants, so executing it skips
+    the fetch and decode of every instruction inside it. Only the last instruction of a block sets the pc and current
+    opcode first, unless an attached instrument has EXACT_PC, in which case every instruction does.
+    """
+    MAX_BLOCK_LENGTH = 64
+
+    # Most significant nibbles whose instructions always end a block
+    TERMINATOR_NIBBLES = frozenset((0x1, 0x2, 0x3, 0x4, 0x5, 0x9, 0xB, 0xD, 0xE))
+    TERMINATOR_OPCODES = frozenset((0x00EE, 0x00FD))
+    TERMINATOR_F_BYTES = frozenset((0x0A, 0x33, 0x55))
+
+    def __init__(self, chip8_cpu):
+        self.chip8_cpu = chip8_cpu
+        self.block_cache = {}
+        self.address_blocks = {}
+
+    def is_terminator(self, opcode):
+        nibble = opcode >> 12
+        if nibble in self.TERMINATOR_NIBBLES or opcode in self.TERMINATOR_OPCODES:
+            return True
+        if nibble == 0xF and opcode & 0x00FF in self.TERMINATOR_F_BYTES:
+            return True
+        return self.chip8_cpu.decode_table[opcode][0] == self.chip8_cpu.unknown_opcode_trap
+
+    @staticmethod
+    def memory_write_length(opcode):
+        """
+        Number of bytes written starting at the index register by the opcode, 0 when it does not write to memory
+        """
+        if opcode & 0xF0FF == 0xF033:
+            return 3
+        if opcode & 0xF0FF == 0xF055:
+            return ((opcode & 0x0F00) >> 8) + 1
+        return 0
+
+    def translate(self, start_address):
+        memory = self.chip8_cpu.memory
+        decode_table = self.chip8_cpu.decode_table
+        last_address = len(memory) - 2
+        namespace = {'cpu': self.chip8_cpu, 'invalidate': self.invalidate}
+        exact_pc = any(instrument.EXACT_PC for instrument in self.chip8_cpu.instruments)
+        source = [f'def translated_block_{start_address:03x}():']
+
+        address = start_address
+        num_instructions = 0
+        while True:
+            opcode = int(memory[address]) << 8 | int(memory[address + 1])
+            handler, operands = decode_table[opcode]
+            handler_name = f'handler_{num_instructions}'
+            namespace[handler_name] = handler
+            call = f'    {handler_name}({", ".join(str(operand) for operand in operands)})'
+            num_instructions += 1
+
+            if self.is_terminator(opcode) or num_instructions == self.MAX_BLOCK_LENGTH or address >= last_address:
+                write_length = self.memory_write_length(opcode)
+                source.append(f'    cpu.pc = {address + 2}')
+                source.append(f'    cpu.current_opcode = {opcode}')
+                if write_length:
+                    source.append('    index = cpu.index')
+                source.append(call)
+                if write_length:
+                    source.append(f'    invalidate(index, {write_length})')
+                break
+
+            if exact_pc:
+                source.append(f'    cpu.pc = {address + 2}')
+                source.append(f'    cpu.current_opcode = {opcode}')
+            source.append(call)
+            address += 2
+
+        source.append(f'    return {num_instructions}')
+        exec(compile('\n'.join(source), f'<block {start_address:#05x}>', 'exec'), namespace)
+        block = namespace[f'translated_block_{start_address:03x}']
+        block.num_instructions = num_instructions
+
+        self.block_cache[start_address] = block
+        for translated_address in range(start_address, address + 2):
+            self.address_blocks.setdefault(translated_address, set()).add(start_address)
+        return block
+
+    def prewarm(self, start_addresses):
+        """
+        Translates the blocks starting at the given addresses ahead of time, skipping the ones already cached.
+        Returns the number of blocks translated.
+        """
+        translated = 0
+        for start_address in start_addresses:
+            if start_address not in self.block_cache:
+                self.translate(start_address)
+                translated += 1
+        return translated
+
+    def invalidate(self, start_address, length):
+        """
+        Drops every cached block that covers any byte of [start_address, start_address + length)
+        """
+        for address in range(int(start_address), int(start_address) + length):
+            for block_address in self.address_blocks.pop(address, ()):
+                self.block_cache.pop(block_address, None)
+
+    def flush(self):
+        """
+        Drops every cached block, needed after memory or the decode table are changed outside of Fx33/Fx55
+        """
+        self.block_cache.clear()
+        self.address_blocks.clear()
+
+    def run_cycles(self, num_cycles):
+        """
+        Runs whole blocks while they fit in the num_cycles instructions left, then the rest one at a time through the
+        decode table, so every call stops on the same instruction as the interpreter and timer ticks and frames land
+        at the same points of the program. Returns how many instructions were executed, fewer than num_cycles when a
+        handler raises CpuIdle, which can only be the last instruction of a block.
+        """
+        chip8_cpu = self.chip8_cpu
+        block_cache = self.block_cache
+        executed = 0
+        block = None
+
+        try:
+            while executed < num_cycles:
+                block = block_cache.get(chip8_cpu.pc)
+                if block is None:
+                    block = self.translate(chip8_cpu.pc)
+                if block.num_instructions > num_cycles - executed:
+                    break
+                executed += block()
+        except CpuIdle:
+            return executed + block.num_instructions
+        if executed == num_cycles:
+            return executed
+
+        memory = chip8_cpu.memory
+        decode_table = chip8_cpu.decode_table
+        try:
+            while executed < num_cycles:
+                program_counter = chip8_cpu.pc
+                opcode = int(memory[program_counter]) << 8 | int(memory[program_counter + 1])
+                chip8_cpu.current_opcode = opcode
+                chip8_cpu.pc = program_counter + 2
+                handler, operands = decode_table[opcode]
+                executed += 1
+                write_length = self.memory_write_length(opcode)
+                if write_length:
+                    index = chip8_cpu.index
+                    handler(*operands)
+                    self.invalidate(index, write_length)
+                else:
+                    handler(*operands)
+        except CpuIdle:
+            pass
+        return executed
@@ -0,0 +1,458 @@
+import numpy as np
+from core.cpu.config.memory_config import Config
+from core.cpu.registers import Registers
+
+
+class VectorizedCpu:
+    """
+    Runs num_machines CHIP-8 instances in lockstep as NumPy struct-of-arrays.
+
+    Every step fetches the opcode of all machines at once, classifies them with a precomputed 64K-entry class table
+    and applies each opcode class present on that step to all the machines that fetched it in one vectorized
+    operation, so the Python-level cost per step depends on how many classes were fetched, not on num_machines.
+    """
+    DISPLAY_WIDTH = 64
+    DISPLAY_HEIGHT = 32
+    STACK_SIZE = 16
+    MAX_SPRITE_HEIGHT = 15
+
+    def __init__(self, num_machines, seed=None):
+        self.num_machines = num_machines
+        self.registers = np.zeros((num_machines, 16), dtype=np.uint8)
+        self.memory = np.zeros((num_machines, 4096), dtype=np.uint8)
+        self.stack = np.zeros((num_machines, self.STACK_SIZE), dtype=np.uint16)
+        self.keypad = np.zeros((num_machines, 16), dtype=np.uint8)
+        self.video_display = np.zeros((num_machines, self.DISPLAY_HEIGHT, self.DISPLAY_WIDTH), dtype=np.uint8)
+        self.pc = np.full(num_machines, Config.MEMORY_START_ADDRESS, dtype=np.uint16)
+        self.index = np.zeros(num_machines, dtype=np.uint16)
+        self.stack_pointer = np.zeros(num_machines, dtype=np.uint8)
+        self.delay_timer = np.zeros(num_machines, dtype=np.uint8)
+        self.sound_timer = np.zeros(num_machines, dtype=np.uint8)
+        self.random_state = np.array(
+            [Registers.initial_random_state(None if seed is None else seed + machine)
+             for machine in range(num_machines)], dtype=np.uint32)
+        self.machines = np.arange(num_machines)
+
+        self.handlers = []
+        self.class_table = np.zeros(0x10000, dtype=np.uint8)
+        self.config_instructions()
+
+        self.cycles = 0
+        self.class_executions = np.zeros(len(self.handlers), dtype=np.int64)
+        self.classes_per_step = np.zeros(len(self.handlers) + 1, dtype=np.int64)
+        self.divergent_steps = np.zeros(num_machines, dtype=np.int64)
+        self.trapped = np.zeros(num_machines, dtype=bool)
+
+        self.memory[:, Config.FONT_SET_START_ADDRESS:Config.FONT_SET_START_ADDRESS + len(Config.FONT_SET)] = \
+            np.frombuffer(Config.FONT_SET, dtype=np.uint8)
+
+    def config_instructions(self):
+        """
+        Builds the opcode class table, mapping every 16 bit opcode to the index of its handler on self.handlers
+        """
+        opcodes = np.arange(0x10000, dtype=np.uint32)
+        nibble = opcodes >> 12
+        low_nibble = opcodes & 0x000F
+        low_byte = opcodes & 0x00FF
+
+        classes = [
+            (opcodes == 0x00E0, self.clear_the_display),
+            (opcodes == 0x00EE, self.return_from_subroutine),
+            (nibble == 0x1, self.jump_to_location),
+            (nibble == 0x2, self.call_to_location),
+            (nibble == 0x3, self.skip_instr_register_x_equals_kk),
+            (nibble == 0x4, self.skip_instr_register_x_not_equal_kk),
+            (nibble == 0x5, self.skip_instr_register_x_equal_y),
+            (nibble == 0x6, self.load_value_into_register),
+            (nibble == 0x7, self.load_value_into_register_add),
+            ((nibble == 0x8) & (low_nibble == 0x0), self.load_register_y_into_register_x),
+            ((nibble == 0x8) & (low_nibble == 0x1), self.cmp_or_x_y_into_register_x),
+            ((nibble == 0x8) & (low_nibble == 0x2), self.cmp_and_x_y_into_register_x),
+            ((nibble == 0x8) & (low_nibble == 0x3), self.cmp_xor_x_y_into_register_x),
+            ((nibble == 0x8) & (low_nibble == 0x4), self.add_x_y_into_register_x),
+            ((nibble == 0x8) & (low_nibble == 0x5), self.sub_x_y_into_register_x),
+            ((nibble == 0x8) & (low_nibble == 0x6), self.div_x_into_register_x),
+            ((nibble == 0x8) & (low_nibble == 0x7), self.sub_y_x_into_register_x),
+            ((nibble == 0x8) & (low_nibble == 0xE), self.mul_x_into_register_x),
+            (nibble == 0x9, self.skip_instr_register_x_not_equal_y),
+            (nibble == 0xA, self.store_addr_on_index),
+            (nibble == 0xB, self.jump_to_location_nnn_plus_register_zero),
+            (nibble == 0xC, self.store_random_number_on_register_x),
+            (nibble == 0xD, self.display_bytes_on_screen),
+            ((nibble == 0xE) & (low_byte == 0x9E), self.skip_instruction_if_key_pressed),
+            ((nibble == 0xE) & (low_byte == 0xA1), self.not_skip_instruction_if_key_pressed),
+            ((nibble == 0xF) & (low_byte == 0x07), self.delay_timer_on_register_x),
+            ((nibble == 0xF) & (low_byte == 0x0A), self.wait_for_key_press),
+            ((nibble == 0xF) & (low_byte == 0x15), self.register_x_on_delay_timer),
+            ((nibble == 0xF) & (low_byte == 0x18), self.sound_timer_on_register_x),
+            ((nibble == 0xF) & (low_byte == 0x1E), self.add_register_x_and_index),
+            ((nibble == 0xF) & (low_byte == 0x29), self.stores_on_index_hex_sprite),
+            ((nibble == 0xF) & (low_byte == 0x33), self.load_bcd_on_memory),
+            ((nibble == 0xF) & (low_byte == 0x55), self.load_registers_onto_memory),
+            ((nibble == 0xF) & (low_byte == 0x65), self.load_memory_onto_register),
+        ]
+
+        self.handlers = [self.unknown_opcode_trap]
+        self.class_table[:] = 0
+        for mask, handler in classes:
+            self.class_table[mask] = len(self.handlers)
+            self.handlers.append(handler)
+
+    def load_into_memory(self, list_values, starting_address):
+        ending_address = len(list_values) + starting_address
+        self.memory[:, starting_address:ending_address] = list_values
+
+    def step(self, num_cycles=1):
+        """
+        Runs num_cycles fetch/execute steps on every machine
+        """
+        machines = self.machines
+        memory = self.memory
+        class_table = self.class_table
+        handlers = self.handlers
+
+        for _ in range(num_cycles):
+            program_counter = self.pc
+            opcodes = memory[machines, program_counter].astype(np.uint16) << 8 | \
+                memory[machines, (program_counter + 1) & 0x0FFF]
+            self.pc = (program_counter + 2) & 0x0FFF
+            opcode_classes = class_table[opcodes]
+
+            class_counts = np.bincount(opcode_classes, minlength=len(handlers))
+            present_classes = np.flatnonzero(class_counts)
+            self.class_executions += class_counts
+            self.classes_per_step[len(present_classes)] += 1
+            if len(present_classes) > 1:
+                self.divergent_steps += opcode_classes != np.argmax(class_counts)
+
+            for opcode_class in present_classes:
+                if len(present_classes) == 1:
+                    selected = machines
+                else:
+                    selected = np.flatnonzero(opcode_classes == opcode_class)
+                selected_opcodes = opcodes[selected]
+                handlers[opcode_class](selected, selected_opcodes)
+        self.cycles += num_cycles
+
+    def tick_timers(self):
+        """
+        Decrements the delay and sound timers of every machine that has them above zero, called at 60 Hz
+        """
+        self.delay_timer -= self.delay_timer > 0
+        self.sound_timer -= self.sound_timer > 0
+
+    def divergence_statistics(self):
+        """
+        Summary of how far the machines drifted apart: how many opcode classes had to be dispatched per step and how
+        many steps each machine spent off the majority class
+        """
+        steps = max(int(self.classes_per_step.sum()), 1)
+        class_counts = np.arange(len(self.classes_per_step))
+        return {
+            'cycles': self.cycles,
+            'mean_classes_per_step': float((self.classes_per_step * class_counts).sum() / steps),
+            'lockstep_ratio': float(self.classes_per_step[1] / steps),
+            'classes_per_step_histogram': self.classes_per_step.tolist(),
+            'divergent_steps': self.divergent_steps,
+            'trapped_machines': int(self.trapped.sum()),
+        }
+
+    def unknown_opcode_trap(self, machines, opcodes):
+        """
+        Halts the machines on the unmapped opcode, keeping their pc on it and flagging them as trapped
+        """
+        self.pc[machines] = (self.pc[machines] - 2) & 0x0FFF
+        self.trapped[machines] = True
+
+    def clear_the_display(self, machines, opcodes):
+        """
+        OP_CODE: 00E0
+        """
+        self.video_display[machines] = 0
+
+    def return_from_subroutine(self, machines, opcodes):
+        """
+        OP_CODE: 00EE
+
+        The stack pointer counts up to STACK_SIZE, so a full stack is told apart from an empty one, and only the slot
+        it addresses wraps around
+        """
+        stack_pointer = self.stack_pointer[machines] - 1
+        self.stack_pointer[machines] = stack_pointer
+        self.pc[machines] = self.stack[machines, stack_pointer % self.STACK_SIZE]
+
+    def jump_to_location(self, machines, opcodes):
+        """
+        OP_CODE: 1nnn
+        """
+        self.pc[machines] = opcodes & 0x0FFF
+
+    def call_to_location(self, machines, opcodes):
+        """
+        OP_CODE: 2nnn
+        """
+        stack_pointer = self.stack_pointer[machines]
+        self.stack[machines, stack_pointer % self.STACK_SIZE] = self.pc[machines]
+        self.stack_pointer[machines] = stack_pointer + 1
+        self.pc[machines] = opcodes & 0x0FFF
+
+    def skip_if(self, machines, condition):
+        self.pc[machines] = (self.pc[machines] + 2 * condition) & 0x0FFF
+
+    def skip_instr_register_x_equals_kk(self, machines, opcodes):
+        """
+        OP_CODE: 3xkk
+        """
+        self.skip_if(machines, self.registers[machines, (opcodes >> 8) & 0xF] == (opcodes & 0xFF))
+
+    def skip_instr_register_x_not_equal_kk(self, machines, opcodes):
+        """
+        OP_CODE: 4xkk
+        """
+        self.skip_if(machines, self.registers[machines, (opcodes >> 8) & 0xF] != (opcodes & 0xFF))
+
+    def skip_instr_register_x_equal_y(self, machines, opcodes):
+        """
+        OP_CODE: 5xy0
+        """
+        registers = self.registers[machines]
+        rows = np.arange(len(machines))
+        self.skip_if(machines, registers[rows, (opcodes >> 8) & 0xF] == registers[rows, (opcodes >> 4) & 0xF])
+
+    def skip_instr_register_x_not_equal_y(self, machines, opcodes):
+        """
+        OP_CODE: 9xy0
+        """
+        registers = self.registers[machines]
+        rows = np.arange(len(machines))
+        self.skip_if(machines, registers[rows, (opcodes >> 8) & 0xF] != registers[rows, (opcodes >> 4) & 0xF])
+
+    def load_value_into_register(self, machines, opcodes):
+        """
+        OP_CODE: 6xkk
+        """
+        self.registers[machines, (opcodes >> 8) & 0xF] = opcodes & 0xFF
+
+    def load_value_into_register_add(self, machines, opcodes):
+        """
+        OP_CODE: 7xkk
+        """
+        x = (opcodes >> 8) & 0xF
+        self.registers[machines, x] = (self.registers[machines, x] + (opcodes & 0xFF)) & 0xFF
+
+    def arithmetic_operands(self, machines, opcodes):
+        x = (opcodes >> 8) & 0xF
+        y = (opcodes >> 4) & 0xF
+        return x, self.registers[machines, x].astype(np.int16), self.registers[machines, y].astype(np.int16)
+
+    def store_arithmetic_result(self, machines, x, result, flag=None):
+        self.registers[machines, x] = result & 0xFF
+        if flag is not None:
+            self.registers[machines, 0xF] = flag
+
+    def load_register_y_into_register_x(self, machines, opcodes):
+        """
+        OP_CODE: 8xy0
+        """
+        x, value_x, value_y = self.arithmetic_operands(machines, opcodes)
+        self.store_arithmetic_result(machines, x, value_y)
+
+    def cmp_or_x_y_into_register_x(self, machines, opcodes):
+        """
+        OP_CODE: 8xy1
+        """
+        x, value_x, value_y = self.arithmetic_operands(machines, opcodes)
+        self.store_arithmetic_result(machines, x, value_x | value_y)
+
+    def cmp_and_x_y_into_register_x(self, machines, opcodes):
+        """
+        OP_CODE: 8xy2
+        """
+        x, value_x, value_y = self.arithmetic_operands(machines, opcodes)
+        self.store_arithmetic_result(machines, x, value_x & value_y)
+
+    def cmp_xor_x_y_into_register_x(self, machines, opcodes):
+        """
+        OP_CODE: 8xy3
+        """
+        x, value_x, value_y = self.arithmetic_operands(machines, opcodes)
+        self.store_arithmetic_result(machines, x, value_x ^ value_y)
+
+    def add_x_y_into_register_x(self, machines, opcodes):
+        """
+        OP_CODE: 8xy4
+        """
+        x, value_x, value_y = self.arithmetic_operands(machines, opcodes)
+        result = value_x + value_y
+        self.store_arithmetic_result(machines, x, result, result > 0xFF)
+
+    def sub_x_y_into_register_x(self, machines, opcodes):
+        """
+        OP_CODE: 8xy5
+        """
+        x, value_x, value_y = self.arithmetic_operands(machines, opcodes)
+        self.store_arithmetic_result(machines, x, value_x - value_y, value_x >= value_y)
+
+    def div_x_into_register_x(self, machines, opcodes):
+        """
+        OP_CODE: 8xy6
+        """
+        x, value_x, value_y = self.arithmetic_operands(machines, opcodes)
+        self.store_arithmetic_result(machines, x, value_x >> 1, value_x & 0x1)
+
+    def sub_y_x_into_register_x(self, machines, opcodes):
+        """
+        OP_CODE: 8xy7
+        """
+        x, value_x, value_y = self.arithmetic_operands(machines, opcodes)
+        self.store_arithmetic_result(machines, x, value_y - value_x, value_y >= value_x)
+
+    def mul_x_into_register_x(self, machines, opcodes):
+        """
+        OP_CODE: 8xyE
+        """
+        x, value_x, value_y = self.arithmetic_operands(machines, opcodes)
+        self.store_arithmetic_result(machines, x, value_x << 1, value_x >> 7)
+
+    def store_addr_on_index(self, machines, opcodes):
+        """
+        OP_CODE: Annn
+        """
+        self.index[machines] = opcodes & 0x0FFF
+
+    def jump_to_location_nnn_plus_register_zero(self, machines, opcodes):
+        """
+        OP_CODE: Bnnn
+        """
+        self.pc[machines] = ((opcodes & 0x0FFF) + self.registers[machines, 0]) & 0x0FFF
+
+    def store_random_number_on_register_x(self, machines, opcodes):
+        """
+        OP_CODE: Cxkk
+
+        Same xorshift32 as the scalar Cpu, machine i seeded with seed + i
+        """
+        state = self.random_state[machines]
+        state ^= state << 13
+        state ^= state >> 17
+        state ^= state << 5
+        self.random_state[machines] = state
+        self.registers[machines, (opcodes >> 8) & 0xF] = (state >> 24) & (opcodes & 0xFF)
+
+    def display_bytes_on_screen(self, machines, opcodes):
+        """
+        OP_CODE: Dxyn
+
+        Every selected machine draws its sprite in the same fancy-indexed XOR, sprite rows past n are zero so they
+        leave the display untouched
+        """
+        sprite_rows = np.arange(self.MAX_SPRITE_HEIGHT)
+        sprite_columns = np.arange(8)
+        positions_x = self.registers[machines, (opcodes >> 8) & 0xF].astype(np.intp)
+        positions_y = self.registers[machines, (opcodes >> 4) & 0xF].astype(np.intp)
+        heights = (opcodes & 0xF)[:, None]
+
+        addresses = (self.index[machines, None] + sprite_rows) & 0x0FFF
+        sprite_bytes = self.memory[machines[:, None], addresses] * (sprite_rows < heights)
+        sprite_bits = np.unpackbits(sprite_bytes[:, :, None], axis=2)
+
+        rows = ((positions_y[:, None] + sprite_rows) % self.DISPLAY_HEIGHT)[:, :, None]
+        columns = ((positions_x[:, None] + sprite_columns) % self.DISPLAY_WIDTH)[:, None, :]
+        selected = machines[:, None, None]
+
+        pixels = self.video_display[selected, rows, columns]
+        self.video_display[selected, rows, columns] = pixels ^ sprite_bits
+        self.registers[machines, 0xF] = (pixels & sprite_bits).any(axis=(1, 2))
+
+    def skip_instruction_if_key_pressed(self, machines, opcodes):
+        """
+        OP_CODE: Ex9E
+        """
+        keys = self.registers[machines, (opcodes >> 8) & 0xF] & 0xF
+        self.skip_if(machines, self.keypad[machines, keys] != 0)
+
+    def not_skip_instruction_if_key_pressed(self, machines, opcodes):
+        """
+        OP_CODE: ExA1
+        """
+        keys = self.registers[machines, (opcodes >> 8) & 0xF] & 0xF
+        self.skip_if(machines, self.keypad[machines, keys] == 0)
+
+    def delay_timer_on_register_x(self, machines, opcodes):
+        """
+        OP_CODE: Fx07
+        """
+        self.registers[machines, (opcodes >> 8) & 0xF] = self.delay_timer[machines]
+
+    def wait_for_key_press(self, machines, opcodes):
+        """
+        OP_CODE: Fx0A
+
+        Machines without a pressed key rewind their pc to execute Fx0A again on the next step
+        """
+        pressed = self.keypad[machines] != 0
+        any_pressed = pressed.any(axis=1)
+        waiting = machines[~any_pressed]
+        self.pc[waiting] = (self.pc[waiting] - 2) & 0x0FFF
+        self.registers[machines[any_pressed], ((opcodes[any_pressed]) >> 8) & 0xF] = \
+            np.argmax(pressed[any_pressed], axis=1)
+
+    def register_x_on_delay_timer(self, machines, opcodes):
+        """
+        OP_CODE: Fx15
+        """
+        self.delay_timer[machines] = self.registers[machines, (opcodes >> 8) & 0xF]
+
+    def sound_timer_on_register_x(self, machines, opcodes):
+        """
+        OP_CODE: Fx18
+        """
+        self.sound_timer[machines] = self.registers[machines, (opcodes >> 8) & 0xF]
+
+    def add_register_x_and_index(self, machines, opcodes):
+        """
+        OP_CODE: Fx1E
+        """
+        self.index[machines] = (self.index[machines] + self.registers[machines, (opcodes >> 8) & 0xF]) & 0x0FFF
+
+    def stores_on_index_hex_sprite(self, machines, opcodes):
+        """
+        OP_CODE: Fx29
+        """
+        digits = self.registers[machines, (opcodes >> 8) & 0xF] & 0xF
+        self.index[machines] = Config.FONT_SET_START_ADDRESS + digits.astype(np.uint16) * 5
+
+    def load_bcd_on_memory(self, machines, opcodes):
+        """
+        OP_CODE: Fx33
+        """
+        value = self.registers[machines, (opcodes >> 8) & 0xF]
+        index = self.index[machines]
+        self.memory[machines, index & 0x0FFF] = value // 100
+        self.memory[machines, (index + 1) & 0x0FFF] = value // 10 % 10
+        self.memory[machines, (index + 2) & 0x0FFF] = value % 10
+
+    def register_range(self, machines, opcodes):
+        """
+        Machine, memory address and register of every Fx55/Fx65 transfer, registers 0 up to x inclusive
+        """
+        offsets = np.arange(16)
+        selected = offsets <= ((opcodes >> 8) & 0xF)[:, None]
+        addresses = (self.index[machines, None] + offsets) & 0x0FFF
+        rows = np.broadcast_to(machines[:, None], selected.shape)
+        registers = np.broadcast_to(offsets, selected.shape)
+        return rows[selected], addresses[selected], registers[selected]
+
+    def load_registers_onto_memory(self, machines, opcodes):
+        """
+        OP_CODE: Fx55
+        """
+        rows, addresses, registers = self.register_range(machines, opcodes)
+        self.memory[rows, addresses] = self.registers[rows, registers]
+
+    def load_memory_onto_register(self, machines, opcodes):
+        """
+        OP_CODE: Fx65
+        """
+        rows, addresses, registers = self.register_range(machines, opcodes)
+        self.registers[rows, registers] = self.memory[rows, addresses]
@@ -0,0 +1,165 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class CursesKeySource:
+    """
+    Drains the pending curses key presses without blocking. Curses is not thread safe, so every read is done holding
+    the lock the renderer draws under.
+    """
+
+    def __init__(self, stdscr, lock):
+        self.stdscr = stdscr
+        self.lock = lock
+        stdscr.nodelay(True)
+
+    def poll(self):
+        characters = []
+        with self.lock:
+            key_code = self.stdscr.getch()
+            while key_code != -1:
+                if key_code < 0x100:
+                    characters.append(chr(key_code).lower())
+                key_code = self.stdscr.getch()
+        return characters
+
+
+class ScriptedKeySource:
+    """
+    Replays (seconds since start, character) presses at their time, for input tests without a terminal
+    """
+
+    def __init__(self, script):
+        self.script = sorted(script)
+        self.next_press = 0
+        self.start_time = None
+
+    def poll(self):
+        now = time.perf_counter()
+        if self.start_time is None:
+            self.start_time = now
+        characters = []
+        while self.next_press < len(self.script) and self.script[self.next_press][0] <= now - self.start_time:
+            characters.append(self.script[self.next_press][1])
+            self.next_press += 1
+        return characters
+
+    @property
+    def finished(self):
+        return self.next_press == len(self.script)
+
+
+class KeypadInput:
+    """
+    Polls a key source on its own thread and publishes the keypad state as an immutable (mask, press time) snapshot.
+
+    The emulation thread reads the snapshot once per tick as a Scheduler poll_input hook: replacing a tuple attribute
+    is atomic, so neither side ever waits for the other. Terminals only report presses, so a key is held for
+    release_delay seconds after its last press, autorepeat extending it while the key is held down.
+
+    Wrapping the present_frame hook with timed_present() records the input-to-frame latency: the time from the
+    press being read to the first frame presented after the emulation saw it.
+    """
+    # 1 2 3 4 / q w e r / a s d f / z x c v over the COSMAC VIP 1 2 3 C / 4 5 6 D / 7 8 9 E / A 0 B F keypad
+    DEFAULT_KEY_MAP = {
+        '1': 0x1, '2': 0x2, '3': 0x3, '4': 0xC,
+        'q': 0x4, 'w': 0x5, 'e': 0x6, 'r': 0xD,
+        'a': 0x7, 's': 0x8, 'd': 0x9, 'f': 0xE,
+        'z': 0xA, 'x': 0x0, 'c': 0xB, 'v': 0xF,
+    }
+    QUIT_CHARACTERS = frozenset(('\x1b',))
+    LATENCY_SAMPLES = 1024
+
+    def __init__(self, source, key_map=None, poll_interval=0.002, release_delay=0.1):
+        self.source = source
+        self.key_map = key_map if key_map is not None else self.DEFAULT_KEY_MAP
+        self.poll_interval = poll_interval
+        self.release_delay = release_delay
+        self.snapshot = (0, 0.0)
+        self.quit_requested = False
+
+        self.released_at = [0.0] * 16
+        self.thread = None
+        self.stop_event = threading.Event()
+
+        self.applied_mask = 0
+        self.pending_press_time = None
+        self.latencies = deque(maxlen=self.LATENCY_SAMPLES)
+        self.polls = 0
+        self.unmapped_presses = 0
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.poll_source, name='keypad-input', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def poll_source(self):
+        released_at = self.released_at
+        while not self.stop_event.is_set():
+            characters = self.source.poll()
+            now = time.perf_counter()
+            press_time = self.snapshot[1]
+            for character in characters:
+                if character in self.QUIT_CHARACTERS:
+                    self.quit_requested = True
+                key = self.key_map.get(character)
+                if key is None:
+                    self.unmapped_presses += 1
+                    continue
+                if released_at[key] <= now:
+                    press_time = now
+                released_at[key] = now + self.release_delay
+
+            mask = 0
+            for key, release_time in enumerate(released_at):
+                if release_time > now:
+                    mask |= 1 << key
+            if mask != self.snapshot[0] or press_time != self.snapshot[1]:
+                self.snapshot = (mask, press_time)
+            self.polls += 1
+            self.stop_event.wait(self.poll_interval)
+
+    def __call__(self, chip8_cpu, tick):
+        mask, press_time = self.snapshot
+        if mask == self.applied_mask:
+            return
+        keypad = memoryview(chip8_cpu.keypad)
+        for key in range(len(keypad)):
+            keypad[key] = mask >> key & 1
+        if mask & ~self.applied_mask:
+            self.pending_press_time = press_time
+        self.applied_mask = mask
+
+    def timed_present(self, present_frame):
+        def present(chip8_cpu):
+            result = present_frame(chip8_cpu)
+            if self.pending_press_time is not None:
+                self.latencies.append(time.perf_counter() - self.pending_press_time)
+                self.pending_press_time = None
+            return result
+
+        return present
+
+    def latency_statistics(self):
+        latencies = np.array(self.latencies)
+        if len(latencies) == 0:
+            return {'samples': 0, 'polls': self.polls, 'unmapped_presses': self.unmapped_presses}
+        return {
+            'samples': len(latencies),
+            'mean': float(latencies.mean()),
+            'p50': float(np.percentile(latencies, 50)),
+            'p95': float(np.percentile(latencies, 95)),
+            'max': float(latencies.max()),
+            'polls': self.polls,
+            'unmapped_presses': self.unmapped_presses,
+        }
@@ -0,0 +1,107 @@
+import struct
+import zlib
+
+
+class InputMovie:
+    """
+    Keypad recording of a session, replayable bit for bit.
+
+    The state of the 16 keys is stored as a bitmask (bit k set while key k is pressed), only on the timer ticks where
+    it changed. Together with the ROM hash, the Cxkk seed and the clock rate this is everything a run depends on.
+
+    File layout: MAGIC, VERSION, then zlib-compressed HEADER (ROM hash, seed, instructions per second, number of ticks,
+    number of records) followed by one RECORD (tick, keypad mask) per change.
+    """
+    MAGIC = b'CH8M'
+    VERSION = 1
+    FILE_HEADER = struct.Struct('<4sB')
+    HEADER = struct.Struct('<16sIIII')
+    RECORD = struct.Struct('<IH')
+
+    def __init__(self, rom_hash, seed, instructions_per_second=700, events=None, num_ticks=0):
+        self.rom_hash = rom_hash
+        self.seed = seed
+        self.instructions_per_second = instructions_per_second
+        self.events = events if events is not None else []
+        self.num_ticks = num_ticks
+
+    @classmethod
+    def from_input_script(cls, input_script, rom_hash=None, seed=0, instructions_per_second=700, num_ticks=0):
+        """
+        Movie from a list of [tick, keys] entries, each one setting the keys pressed from that tick on
+        """
+        movie = cls(rom_hash, seed, instructions_per_second, num_ticks=num_ticks)
+        for tick, keys in sorted(input_script, key=lambda entry: entry[0]):
+            movie.add_event(tick, sum(1 << key for key in set(keys)))
+        return movie
+
+    @staticmethod
+    def keypad_mask(keypad):
+        mask = 0
+        for key, pressed in enumerate(keypad):
+            if pressed:
+                mask |= 1 << key
+        return mask
+
+    def add_event(self, tick, mask):
+        if self.events and self.events[-1][0] == tick:
+            self.events.pop()
+        if self.events and self.events[-1][1] == mask or not self.events and mask == 0:
+            return
+        self.events.append((tick, mask))
+
+    def record(self, tick, keypad):
+        self.add_event(tick, self.keypad_mask(keypad))
+        self.num_ticks = max(self.num_ticks, tick + 1)
+
+    def save(self, file_path):
+        body = [self.HEADER.pack(bytes.fromhex(self.rom_hash), self.seed, self.instructions_per_second,
+                                 self.num_ticks, len(self.events))]
+        body.extend(self.RECORD.pack(tick, mask) for tick, mask in self.events)
+        with open(file_path, 'wb') as movie_file:
+            movie_file.write(self.FILE_HEADER.pack(self.MAGIC, self.VERSION))
+            movie_file.write(zlib.compress(b''.join(body)))
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path, 'rb') as movie_file:
+            magic, version = cls.FILE_HEADER.unpack(movie_file.read(cls.FILE_HEADER.size))
+            if magic != cls.MAGIC or version != cls.VERSION:
+                raise ValueError(f'{file_path} is not a version {cls.VERSION} input movie')
+            body = zlib.decompress(movie_file.read())
+
+        rom_hash, seed, instructions_per_second, num_ticks, num_records = cls.HEADER.unpack_from(body)
+        events = [cls.RECORD.unpack_from(body, cls.HEADER.size + record * cls.RECORD.size)
+                  for record in range(num_records)]
+        return cls(rom_hash.hex(), seed, instructions_per_second, events, num_ticks)
+
+
+class MovieRecorder:
+    """
+    Scheduler input hook recording the keypad state at the start of every tick
+    """
+
+    def __init__(self, movie):
+        self.movie = movie
+
+    def __call__(self, chip8_cpu, tick):
+        self.movie.record(tick, chip8_cpu.keypad)
+
+
+class MoviePlayer:
+    """
+    Scheduler input hook writing the recorded keypad state at the start of every tick
+    """
+
+    def __init__(self, movie):
+        self.movie = movie
+        self.next_event = 0
+
+    def __call__(self, chip8_cpu, tick):
+        events = self.movie.events
+        while self.next_event < len(events) and events[self.next_event][0] <= tick:
+            mask = events[self.next_event][1]
+            keypad = memoryview(chip8_cpu.keypad)
+            for key in range(len(keypad)):
+                keypad[key] = mask >> key & 1
+            self.next_event += 1
@@ -0,0 +1,19 @@
+import importlib.util
+import sys
+
+
+def lazy_import(module_name):
+    """
+    Module whose import is deferred until one of its attributes is first accessed, so modules only needed by some
+    paths (like NumPy on a headless native backend run) don't slow down every start. Returns the module itself when it
+    was already imported.
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.find_spec(module_name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    loader.exec_module(module)
+    return module
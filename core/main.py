@@ -1,25 +1,130 @@
-from core.cpu.instructions import Cpu
+import os
+
+from core.analysis.disassembler import Disassembler
+from core.analysis.rom_analyzer import RomAnalyzer
+from core.audio.sound import SoundTimerAudio
+from core.cpu.decoder import Decoder
+from core.cpu.instructions import Cpu, NativeCpu
+from core.cpu.translator import BlockTranslator
+from core.cpu.debugger import Debugger
+from core.cpu.idle import IdleDetector
+from core.cpu.instrumentation import DecodeTableInstrument
+from core.cpu.tracer import Tracer
 from core.cpu.config.memory_starter import MemoryStarter
 from core.cpu.config.memory_config import Config
 from core.reader.file_reader import FileReader
+from core.reader.rom_library import RomLibrary
+from core.scheduler.scheduler import Scheduler
+from core.state.fork import ForkingMachine
+from core.state.save_state import SaveState
 
 
 class Main:
+    INTERPRETER_MODE = 'interpreter'
+    TRANSLATOR_MODE = 'translator'
+    MODES = (INTERPRETER_MODE, TRANSLATOR_MODE)
+    NUMPY_BACKEND = 'numpy'
+    NATIVE_BACKEND = 'native'
+    BACKENDS = {NUMPY_BACKEND: Cpu, NATIVE_BACKEND: NativeCpu}
 
-    def __init__(self):
-        self.chip8_cpu = Cpu()
+    def __init__(self, mode=INTERPRETER_MODE, scheduler_mode=Scheduler.REAL_TIME_MODE, instructions_per_second=700,
+                 speed_multiplier=1.0, present_frame=None, rom_path='roms/Tetris.ch8', idle_detection=False,
+                 backend=NUMPY_BACKEND, prewarm=False, seed=None, poll_input=None, trace_path=None, audio_path=None,
+                 audio_sink=None, cache_directory=None):
+        if mode not in self.MODES:
+            raise ValueError(f'Unknown execution mode {mode!r}, expected one of {self.MODES}')
+        if backend not in self.BACKENDS:
+            raise ValueError(f'Unknown state backend {backend!r}, expected one of {tuple(self.BACKENDS)}')
+        self.mode = mode
+        self.backend = backend
+        self.rom_path = rom_path
+        self.prewarm = prewarm
+        # ROM library cache directory, also holding the decode table template when given
+        self.cache_directory = cache_directory
+        decode_cache_directory = None
+        if cache_directory is not None:
+            decode_cache_directory = os.path.join(cache_directory, Decoder.CACHE_SUBDIRECTORY)
+        self.chip8_cpu = self.BACKENDS[backend](seed, decode_cache_directory)
         self.memory_management = MemoryStarter(self.chip8_cpu)
+        self.engine = self.chip8_cpu
+        if mode == self.TRANSLATOR_MODE:
+            self.engine = BlockTranslator(self.chip8_cpu)
+        self.idle_detector = None
+        if idle_detection:
+            self.idle_detector = IdleDetector(self.chip8_cpu, self.translator)
+            self.idle_detector.attach()
+        self.tracer = None
+        if trace_path is not None:
+            self.tracer = Tracer(self.chip8_cpu, trace_path, self.translator)
+            self.tracer.attach()
+        self.audio = None
+        if audio_path is not None or audio_sink is not None:
+            self.audio = SoundTimerAudio(audio_path, audio_sink)
+        self.scheduler = Scheduler(self.engine, self.chip8_cpu, instructions_per_second=instructions_per_second,
+                                   mode=scheduler_mode, speed_multiplier=speed_multiplier,
+                                   present_frame=present_frame, poll_input=poll_input, play_audio=self.audio)
+
+    def load(self):
+        self.memory_management.load_startup_image()
+        FileReader.load_rom_into_memory(self.rom_path, self.chip8_cpu.memory)
+        DecodeTableInstrument.notify_state_loaded(self.chip8_cpu)
+        if self.prewarm and self.translator is not None:
+            self.prewarm_translator()
+
+    def prewarm_translator(self):
+        """
+        Translates every basic block found by the static analysis of the ROM before the first frame runs
+        """
+        rom_library = RomLibrary(self.cache_directory) if self.cache_directory is not None else None
+        analysis = RomAnalyzer(Disassembler(self.chip8_cpu), rom_library).cached_analysis(
+            FileReader.file_reader(self.rom_path))
+        return self.translator.prewarm(block['start'] for block in analysis['blocks'])
 
-    def run(self):
-        binary_file = FileReader.file_reader()
-        file_buffer_list = FileReader.load_binary_to_buffer(binary_file)
-        self.memory_management.load_into_memory(file_buffer_list, Config.MEMORY_START_ADDRESS)
-        self.memory_management.load_into_memory(Config.FONT_SET, Config.FONT_SET_START_ADDRESS)
-        self.cycle()
+    def run(self, num_ticks=None):
+        self.load()
+        try:
+            self.scheduler.run(num_ticks)
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        Finishes the execution trace and the audio, if they are being written
+        """
+        if self.tracer is not None:
+            self.tracer.close()
+        if self.audio is not None:
+            self.audio.close()
 
     def cycle(self):
-        program_counter = self.chip8_cpu.pc
-        self.chip8_cpu.current_opcode = self.chip8_cpu.memory[program_counter] << 8 | \
-                                        self.chip8_cpu.memory[program_counter + 1]
-        self.chip8_cpu.pc += 2
-        print(hex(self.chip8_cpu.current_opcode))
+        if self.mode == self.TRANSLATOR_MODE:
+            self.engine.run_cycles(1)
+            return
+        self.chip8_cpu.execute(self.chip8_cpu.fetch())
+
+    def run_cycles(self, num_cycles):
+        return self.engine.run_cycles(num_cycles)
+
+    def debugger(self):
+        """
+        Debugger driving this runner's cpu through its scheduler, with the ROM already loaded
+        """
+        return Debugger(self.chip8_cpu, self.scheduler, self.translator)
+
+    def forking_machine(self):
+        """
+        Copy-on-write forking of this runner's cpu, restoring the scheduler budgets along with the machine state
+        """
+        return ForkingMachine(self.chip8_cpu, self.scheduler, self.translator)
+
+    def save_state(self):
+        return SaveState.capture(self.chip8_cpu)
+
+    def load_state(self, save_state):
+        save_state.restore(self.chip8_cpu)
+        if self.translator is not None:
+            self.translator.flush()
+
+    @property
+    def translator(self):
+        return self.engine if self.mode == self.TRANSLATOR_MODE else None
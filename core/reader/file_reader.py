@@ -1,16 +1,44 @@
-import numpy as np
+import os
+
+from core.lazy_import import lazy_import
+from core.cpu.config.memory_config import Config
+
+np = lazy_import('numpy')
+
+
+class InvalidRomError(ValueError):
+    pass
 
 
 class FileReader:
+    MAX_ROM_SIZE = 0x1000 - Config.MEMORY_START_ADDRESS
 
     @staticmethod
     def file_reader(file_path='roms/Tetris.ch8'):
-        opened_file = open(file_path, "rb").read()
-        return opened_file
+        with open(file_path, 'rb') as rom_file:
+            return rom_file.read()
 
     @staticmethod
     def load_binary_to_buffer(binary_file):
-        buffer = np.zeros(len(binary_file), dtype=np.uint8)
-        for index, value in enumerate(binary_file):
-            buffer[index] = value
-        return buffer
+        return np.frombuffer(binary_file, dtype=np.uint8)
+
+    @staticmethod
+    def validate_rom_size(rom_size, file_path=''):
+        if rom_size == 0:
+            raise InvalidRomError(f'ROM {file_path} is empty')
+        if rom_size > FileReader.MAX_ROM_SIZE:
+            raise InvalidRomError(f'ROM {file_path} has {rom_size} bytes, it does not fit the 0x200-0xFFF window '
+                                  f'of {FileReader.MAX_ROM_SIZE} bytes')
+
+    @staticmethod
+    def load_rom_into_memory(file_path, memory, starting_address=Config.MEMORY_START_ADDRESS):
+        """
+        Reads the ROM file straight into the cpu memory with a single readinto, returning the ROM size
+        """
+        with open(file_path, 'rb') as rom_file:
+            rom_size = os.fstat(rom_file.fileno()).st_size
+            FileReader.validate_rom_size(rom_size, file_path)
+            memory_window = memoryview(memory)[starting_address:starting_address + rom_size]
+            if rom_file.readinto(memory_window) != rom_size:
+                raise InvalidRomError(f'ROM {file_path} was truncated while reading')
+        return rom_size
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import sys
+
+from core.reader.file_reader import FileReader, InvalidRomError
+
+
+class RomLibrary:
+    """
+    Content-hash index of a ROM collection plus an on-disk cache of per-ROM precomputed artifacts.
+
+    The index is keyed by path, every entry holding the name, size, modification time and content hash of the file.
+    Scanning only re-reads files whose size or modification time changed since the last scan, including files that
+    are not valid ROMs, which are kept with a None hash, and drops the paths below the scanned directory that no
+    longer exist. Artifacts are stored under the ROM hash, so the same ROM under another path or name reuses them.
+    """
+    INDEX_FILE = 'index.json'
+    INDEX_VERSION = 2
+    ARTIFACTS_DIRECTORY = 'artifacts'
+    ROM_EXTENSIONS = ('.ch8', '.c8', '.sc8')
+    DEFAULT_CACHE_DIRECTORY = '.rom_cache'
+
+    def __init__(self, cache_directory=DEFAULT_CACHE_DIRECTORY):
+        self.cache_directory = cache_directory
+        self.index_path = os.path.join(cache_directory, self.INDEX_FILE)
+        self.entries = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as index_file:
+                index = json.load(index_file)
+            if index.get('version') == self.INDEX_VERSION:
+                self.entries = index['entries']
+
+    @staticmethod
+    def rom_hash(rom_bytes):
+        return hashlib.blake2b(rom_bytes, digest_size=16).hexdigest()
+
+    def save_index(self):
+        os.makedirs(self.cache_directory, exist_ok=True)
+        temporary_path = f'{self.index_path}.tmp'
+        with open(temporary_path, 'w') as index_file:
+            json.dump({'version': self.INDEX_VERSION, 'entries': self.entries}, index_file, indent=2, sort_keys=True)
+        os.replace(temporary_path, self.index_path)
+
+    def scan(self, directory):
+        """
+        Indexes every ROM below directory, returning the entries of the valid ROMs found keyed by path
+        """
+        scanned = {}
+
+        for root, _, file_names in os.walk(directory):
+            for file_name in sorted(file_names):
+                if not file_name.lower().endswith(self.ROM_EXTENSIONS):
+                    continue
+                path = os.path.join(root, file_name)
+                status = os.stat(path)
+                entry = self.entries.get(path)
+
+                if entry is None or entry['size'] != status.st_size or entry['mtime'] != status.st_mtime:
+                    rom_bytes = FileReader.file_reader(path)
+                    try:
+                        FileReader.validate_rom_size(len(rom_bytes), path)
+                        rom_hash = self.rom_hash(rom_bytes)
+                    except InvalidRomError:
+                        rom_hash = None
+                    entry = {
+                        'name': os.path.splitext(file_name)[0],
+                        'size': status.st_size,
+                        'mtime': status.st_mtime,
+                        'hash': rom_hash,
+                    }
+                scanned[path] = entry
+
+        prefix = os.path.join(directory, '')
+        for path in [path for path in self.entries if path.startswith(prefix) and path not in scanned]:
+            del self.entries[path]
+        self.entries.update(scanned)
+        self.save_index()
+        return {path: entry for path, entry in scanned.items() if entry['hash'] is not None}
+
+    def lookup(self, rom_hash):
+        """
+        Entries of every indexed path with this content hash, keyed by path
+        """
+        return {path: entry for path, entry in self.entries.items() if entry['hash'] == rom_hash}
+
+    def find_by_name(self, name):
+        return [dict(entry, path=path) for path, entry in self.entries.items()
+                if entry['name'] == name and entry['hash'] is not None]
+
+    def artifact_path(self, rom_hash, artifact_name):
+        return os.path.join(self.cache_directory, self.ARTIFACTS_DIRECTORY, rom_hash, artifact_name)
+
+    def load_artifact(self, rom_hash, artifact_name):
+        try:
+            with open(self.artifact_path(rom_hash, artifact_name), 'rb') as artifact_file:
+                return artifact_file.read()
+        except FileNotFoundError:
+            return None
+
+    def store_artifact(self, rom_hash, artifact_name, data):
+        artifact_path = self.artifact_path(rom_hash, artifact_name)
+        os.makedirs(os.path.dirname(artifact_path), exist_ok=True)
+        temporary_path = f'{artifact_path}.tmp'
+        with open(temporary_path, 'wb') as artifact_file:
+            artifact_file.write(data)
+        os.replace(temporary_path, artifact_path)
+
+    def cached_artifact(self, rom_hash, artifact_name, build):
+        """
+        Returns the cached artifact, calling build() and storing its bytes only when it is not cached yet
+        """
+        data = self.load_artifact(rom_hash, artifact_name)
+        if data is None:
+            data = build()
+            self.store_artifact(rom_hash, artifact_name, data)
+        return data
+
+
+if __name__ == '__main__':
+    library = RomLibrary()
+    for scanned_path, scanned_entry in library.scan(sys.argv[1] if len(sys.argv) > 1 else 'roms').items():
+        print(f'{scanned_entry["hash"]}  {scanned_entry["size"]:>5}  {scanned_path}')
@@ -0,0 +1,160 @@
+import time
+
+
+class Scheduler:
+    """
+    Drives an engine in 60 Hz timer ticks, decoupling the CPU clock from the timers and from frame presentation.
+
+    Every tick polls the input, runs the batch of instructions due at the configured instructions-per-second rate,
+    hands the sound timer state to the play_audio hook, decrements the timers once and presents a frame when one is
+    due at the display rate. Pacing is only done between ticks, never per instruction.
+    """
+    REAL_TIME_MODE = 'real-time'
+    FAST_FORWARD_MODE = 'fast-forward'
+    HEADLESS_MODE = 'headless'
+    MODES = (REAL_TIME_MODE, FAST_FORWARD_MODE, HEADLESS_MODE)
+
+    TIMER_FREQUENCY = 60
+    # Falling further behind than this drops the backlog instead of running it back-to-back
+    MAX_CATCH_UP = 0.25
+
+    def __init__(self, engine, chip8_cpu, instructions_per_second=700, frame_rate=60, mode=REAL_TIME_MODE,
+                 speed_multiplier=1.0, present_frame=None, poll_input=None, play_audio=None):
+        if mode not in self.MODES:
+            raise ValueError(f'Unknown scheduler mode {mode!r}, expected one of {self.MODES}')
+        if speed_multiplier <= 0:
+            raise ValueError('speed_multiplier must be positive')
+
+        self.engine = engine
+        self.chip8_cpu = chip8_cpu
+        self.instructions_per_second = instructions_per_second
+        self.frame_rate = frame_rate
+        self.mode = mode
+        self.speed_multiplier = speed_multiplier if mode == self.FAST_FORWARD_MODE else 1.0
+        self.present_frame = present_frame
+        self.poll_input = poll_input
+        self.play_audio = play_audio
+
+        self.instructions_per_tick = instructions_per_second / self.TIMER_FREQUENCY
+        self.frames_per_tick = frame_rate / self.TIMER_FREQUENCY
+        self.instruction_budget = 0.0
+        self.frame_budget = 0.0
+        self.running = False
+
+        self.ticks = 0
+        self.instructions_executed = 0
+        self.instructions_skipped = 0
+        self.idle_ticks = 0
+        self.frames = 0
+        self.frames_presented = 0
+        self.elapsed = 0.0
+        self.last_drift = 0.0
+        self.max_drift = 0.0
+        self.late_ticks = 0
+        self.resyncs = 0
+
+    def tick(self):
+        """
+        Emulates one 1/60 s period: the input update, the due instructions, one timer decrement and at most one frame
+        """
+        num_cycles = self.start_tick()
+        if num_cycles > 0:
+            self.account_instructions(self.engine.run_cycles(num_cycles), num_cycles)
+        self.finish_tick()
+
+    def start_tick(self):
+        """
+        Polls the input and returns the number of instructions due in this tick
+        """
+        if self.poll_input is not None:
+            self.poll_input(self.chip8_cpu, self.ticks)
+        self.instruction_budget += self.instructions_per_tick
+        return int(self.instruction_budget)
+
+    def account_instructions(self, executed, num_cycles):
+        self.instructions_executed += executed
+        if executed < num_cycles:
+            # The engine went idle, the rest of the batch is accounted as emulated without running it
+            self.instructions_skipped += num_cycles - executed
+            self.idle_ticks += 1
+            executed = num_cycles
+        self.instruction_budget -= executed
+
+    def finish_tick(self):
+        """
+        Plays the tick's audio, decrements the timers and presents a frame when one is due
+        """
+        if self.play_audio is not None:
+            self.play_audio(self.chip8_cpu)
+        self.chip8_cpu.tick_timers()
+        self.ticks += 1
+
+        self.frame_budget += self.frames_per_tick
+        if self.frame_budget >= 1:
+            self.frame_budget -= int(self.frame_budget)
+            self.frames += 1
+            if self.present_frame is not None:
+                self.present_frame(self.chip8_cpu)
+                self.frames_presented += 1
+
+    def run(self, num_ticks=None):
+        """
+        Runs until stop() is called or num_ticks ticks were emulated
+        """
+        throttled = self.mode != self.HEADLESS_MODE
+        tick_period = 1 / (self.TIMER_FREQUENCY * self.speed_multiplier)
+        clock = time.perf_counter
+        self.running = True
+
+        start = clock()
+        base_time = start
+        base_tick = self.ticks
+        last_tick = None if num_ticks is None else self.ticks + num_ticks
+
+        while self.running and (last_tick is None or self.ticks < last_tick):
+            self.tick()
+            if not throttled:
+                continue
+
+            deadline = base_time + (self.ticks - base_tick) * tick_period
+            drift = clock() - deadline
+            self.last_drift = drift
+            if drift < 0:
+                time.sleep(-drift)
+                continue
+
+            self.max_drift = max(self.max_drift, drift)
+            if drift > tick_period:
+                self.late_ticks += 1
+            if drift > self.MAX_CATCH_UP:
+                base_time = clock()
+                base_tick = self.ticks
+                self.resyncs += 1
+
+        self.running = False
+        self.elapsed += clock() - start
+
+    def stop(self):
+        self.running = False
+
+    def statistics(self):
+        elapsed = max(self.elapsed, 1e-9)
+        target_ips = None
+        if self.mode != self.HEADLESS_MODE:
+            target_ips = self.instructions_per_second * self.speed_multiplier
+        return {
+            'mode': self.mode,
+            'ticks': self.ticks,
+            'instructions_executed': self.instructions_executed,
+            'instructions_skipped': self.instructions_skipped,
+            'idle_ticks': self.idle_ticks,
+            'frames_presented': self.frames_presented,
+            'elapsed': self.elapsed,
+            'emulated_time': self.ticks / self.TIMER_FREQUENCY,
+            'target_ips': target_ips,
+            'achieved_ips': (self.instructions_executed + self.instructions_skipped) / elapsed,
+            'last_drift': self.last_drift,
+            'max_drift': self.max_drift,
+            'late_ticks': self.late_ticks,
+            'resyncs': self.resyncs,
+        }
@@ -1,22 +1,87 @@
 import curses
+import threading
 import numpy as np
 import time
 
 
 class ScreenHandler:
-    def __init__(self):
-        self.stdscr = curses.initscr()
+    """
+    Incremental curses renderer: every frame is diffed against the last presented one and only the changed runs of
+    cells are written, followed by a single refresh.
+
+    Drawing is done holding lock, which any other thread using the curses screen (like the keypad input) must hold too.
+    Pixels are two cells wide, or one cell wide on displays wider than MAX_WIDE_PIXEL_WIDTH like the SUPER-CHIP 128x64
+    mode, so both resolutions take the same terminal width.
+    """
+    OFF_PIXEL = f'{chr(9619)}' * 2
+    ON_PIXEL = '  '
+    MAX_WIDE_PIXEL_WIDTH = 64
+
+    def __init__(self, stdscr=None):
+        self.stdscr = stdscr if stdscr is not None else curses.initscr()
+        self.lock = threading.Lock()
+        self.last_frame = None
+        self.frames_presented = 0
+        self.frames_skipped = 0
+        self.last_render_time = 0.0
+        self.last_bytes_written = 0
+        self.total_render_time = 0.0
+        self.total_bytes_written = 0
+
+    @staticmethod
+    def changed_spans(changed_row):
+        """
+        Start and end (exclusive) columns of every run of changed cells in a row
+        """
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], changed_row.view(np.int8), [0]))))
+        return zip(edges[::2], edges[1::2])
 
     def update_window(self, video_display):
-        stringfill = f'{chr(9619)}'
-        for index, x in np.ndenumerate(video_display):
-            if int(x) == 0:
-                if index[0] % 2 == 0:
-                    self.stdscr.addstr(int(index[1]), int(index[0]), stringfill)
-                    self.stdscr.addstr(int(index[1]), int(index[0] + 1), stringfill)
-                    self.stdscr.refresh()
-            else:
-                if index[0] % 2 == 0:
-                    self.stdscr.addstr(int(index[1]), int(index[0]), ' ')
-                    self.stdscr.addstr(int(index[1]), int(index[0] + 1), ' ')
-                    self.stdscr.refresh()
\ No newline at end of file
+        """
+        Presents a (width, height) video_display, indexed as video_display[x][y], returning True if anything changed
+        """
+        start = time.perf_counter()
+        frame = np.ascontiguousarray(video_display.T, dtype=np.uint8)
+
+        if self.last_frame is None or self.last_frame.shape != frame.shape:
+            changed = np.ones(frame.shape, dtype=bool)
+        else:
+            changed = frame != self.last_frame
+
+        cell_width = 2 if frame.shape[1] <= self.MAX_WIDE_PIXEL_WIDTH else 1
+        on_pixel = self.ON_PIXEL[:cell_width]
+        off_pixel = self.OFF_PIXEL[:cell_width]
+        dirty_rows = np.flatnonzero(changed.any(axis=1))
+        if len(dirty_rows) == 0:
+            self.frames_skipped += 1
+            self.last_render_time = time.perf_counter() - start
+            self.last_bytes_written = 0
+            return False
+
+        bytes_written = 0
+        with self.lock:
+            for row in dirty_rows:
+                pixels = frame[row]
+                for span_start, span_end in self.changed_spans(changed[row]):
+                    text = ''.join(on_pixel if pixel else off_pixel for pixel in pixels[span_start:span_end])
+                    self.stdscr.addstr(int(row), int(span_start) * cell_width, text)
+                    bytes_written += len(text.encode())
+            self.stdscr.refresh()
+
+        self.last_frame = frame
+        self.frames_presented += 1
+        self.last_render_time = time.perf_counter() - start
+        self.last_bytes_written = bytes_written
+        self.total_render_time += self.last_render_time
+        self.total_bytes_written += bytes_written
+        return True
+
+    def render_statistics(self):
+        return {
+            'frames_presented': self.frames_presented,
+            'frames_skipped': self.frames_skipped,
+            'last_render_time': self.last_render_time,
+            'last_bytes_written': self.last_bytes_written,
+            'mean_render_time': self.total_render_time / max(self.frames_presented, 1),
+            'mean_bytes_written': self.total_bytes_written / max(self.frames_presented, 1),
+        }
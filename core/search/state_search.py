@@ -0,0 +1,132 @@
+import argparse
+import heapq
+import time
+
+
+class StateSearch:
+    """
+    Explores the input branches of a program from its current state, breadth-first or as a beam search.
+
+    Every step forks each frontier state once per input mask, holds the mask for ticks_per_step timer ticks and keeps
+    the children never seen before. Snapshots compare by content, so the set of seen states deduplicates branches
+    converging on the same machine state, and with beam_width only the beam_width best children by score are expanded
+    at the next depth. All branches run on the one cpu of the ForkingMachine, switched between snapshots.
+    """
+    # No key, then every single key held
+    DEFAULT_INPUTS = (0,) + tuple(1 << key for key in range(16))
+
+    def __init__(self, forking_machine, inputs=DEFAULT_INPUTS, ticks_per_step=6, beam_width=None, score=None):
+        if forking_machine.scheduler is None:
+            raise ValueError('StateSearch needs a ForkingMachine with a scheduler to run the branches')
+        self.forking_machine = forking_machine
+        self.inputs = tuple(inputs)
+        self.ticks_per_step = ticks_per_step
+        self.beam_width = beam_width
+        self.score = score if score is not None else self.lit_pixels
+        self.parents = {}
+        self.duplicates = 0
+
+    @staticmethod
+    def lit_pixels(snapshot):
+        return sum(row.bit_count() for row in snapshot.rows)
+
+    def expand(self, snapshot, mask):
+        forking_machine = self.forking_machine
+        forking_machine.switch_to(snapshot)
+        keypad = memoryview(forking_machine.chip8_cpu.keypad)
+        for key in range(len(keypad)):
+            keypad[key] = mask >> key & 1
+        for _ in range(self.ticks_per_step):
+            forking_machine.scheduler.tick()
+        return forking_machine.fork()
+
+    def run(self, depth, max_states=None):
+        """
+        Searches depth steps deep, or until max_states unique states were found, returning the search statistics
+        """
+        forking_machine = self.forking_machine
+        forks_before = forking_machine.forks
+        start = time.perf_counter()
+        root = forking_machine.fork()
+        self.parents = {root: None}
+        self.duplicates = 0
+        frontier = [root]
+        max_frontier = 1
+        reached_depth = 0
+
+        for reached_depth in range(1, depth + 1):
+            children = []
+            for snapshot in frontier:
+                for mask in self.inputs:
+                    child = self.expand(snapshot, mask)
+                    if child in self.parents:
+                        self.duplicates += 1
+                        continue
+                    self.parents[child] = (snapshot, mask)
+                    children.append(child)
+                    if max_states is not None and len(self.parents) >= max_states:
+                        break
+                else:
+                    continue
+                break
+
+            if self.beam_width is not None and len(children) > self.beam_width:
+                children = heapq.nlargest(self.beam_width, children, key=self.score)
+            frontier = children
+            max_frontier = max(max_frontier, len(frontier))
+            if not frontier or (max_states is not None and len(self.parents) >= max_states):
+                break
+
+        forking_machine.switch_to(root)
+        elapsed = time.perf_counter() - start
+        forks = forking_machine.forks - forks_before
+        return {
+            'depth': reached_depth,
+            'unique_states': len(self.parents),
+            'duplicates': self.duplicates,
+            'forks': forks,
+            'forks_per_second': forks / elapsed if elapsed else 0.0,
+            'elapsed': elapsed,
+            'max_frontier': max_frontier,
+            'pages_copied': forking_machine.pages_copied,
+            'pages_written': forking_machine.pages_written,
+            'best': max(frontier or [root], key=self.score),
+        }
+
+    def path(self, snapshot):
+        """
+        Input masks leading from the root to snapshot, one per step
+        """
+        masks = []
+        while self.parents[snapshot] is not None:
+            snapshot, mask = self.parents[snapshot]
+            masks.append(mask)
+        return masks[::-1]
+
+
+if __name__ == '__main__':
+    from core.main import Main
+    from core.scheduler.scheduler import Scheduler
+
+    parser = argparse.ArgumentParser(prog='python -m core.search.state_search',
+                                     description='Explore the input branches of a ROM')
+    parser.add_argument('rom', nargs='?', default='roms/Tetris.ch8')
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--beam', type=int, help='keep only the BEAM states with most lit pixels per depth')
+    parser.add_argument('--ticks', type=int, default=6, help='timer ticks each input is held')
+    parser.add_argument('--warmup', type=int, default=60, help='timer ticks run before searching')
+    parser.add_argument('--max-states', type=int)
+    parser.add_argument('--mode', choices=Main.MODES, default=Main.INTERPRETER_MODE)
+    parser.add_argument('--backend', choices=tuple(Main.BACKENDS), default=Main.NUMPY_BACKEND)
+    arguments = parser.parse_args()
+
+    runner = Main(mode=arguments.mode, scheduler_mode=Scheduler.HEADLESS_MODE, rom_path=arguments.rom,
+                  backend=arguments.backend, seed=0)
+    runner.load()
+    runner.scheduler.run(arguments.warmup)
+    search = StateSearch(runner.forking_machine(), ticks_per_step=arguments.ticks, beam_width=arguments.beam)
+    report = search.run(arguments.depth, arguments.max_states)
+    best_path = ' '.join(f'{mask:04x}' for mask in search.path(report.pop('best')))
+    for name, value in report.items():
+        print(f'{name}: {value:.1f}' if isinstance(value, float) else f'{name}: {value}')
+    print(f'best path: {best_path}')
@@ -0,0 +1,48 @@
+import struct
+
+from core.lazy_import import lazy_import
+
+np = lazy_import('numpy')
+
+
+class DeltaCodec:
+    """
+    XOR/RLE delta encoding between two equally sized byte buffers.
+
+    The XOR of both buffers is mostly zeros, so it is stored as (offset, length) records followed by the XORed
+    bytes of each run. Runs separated by fewer than MERGE_GAP zero bytes are merged into one record.
+    """
+    RECORD = struct.Struct('<II')
+    MERGE_GAP = 4
+
+    @staticmethod
+    def xor(data, reference):
+        return np.bitwise_xor(np.frombuffer(data, dtype=np.uint8), np.frombuffer(reference, dtype=np.uint8))
+
+    @classmethod
+    def encode(cls, data, reference):
+        difference = cls.xor(data, reference)
+        changed = np.flatnonzero(difference)
+        if len(changed) == 0:
+            return b''
+
+        breaks = np.flatnonzero(np.diff(changed) > cls.MERGE_GAP)
+        starts = changed[np.concatenate(([0], breaks + 1))]
+        ends = changed[np.concatenate((breaks, [len(changed) - 1]))] + 1
+
+        records = []
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            records.append(cls.RECORD.pack(start, end - start))
+            records.append(difference[start:end].tobytes())
+        return b''.join(records)
+
+    @classmethod
+    def decode(cls, delta, reference):
+        data = np.frombuffer(reference, dtype=np.uint8).copy()
+        position = 0
+        while position < len(delta):
+            start, length = cls.RECORD.unpack_from(delta, position)
+            position += cls.RECORD.size
+            data[start:start + length] ^= np.frombuffer(delta, dtype=np.uint8, count=length, offset=position)
+            position += length
+        return data.tobytes()
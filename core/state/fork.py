@@ -0,0 +1,174 @@
+from core.cpu.framebuffer import FrameBuffer
+from core.cpu.instrumentation import DecodeTableInstrument
+
+
+class MachineSnapshot:
+    """
+    Immutable machine state whose memory is a tuple of PAGE_SIZE byte pages shared with the snapshots it was forked
+    from or into. Snapshots are hashable and compare by content, so they deduplicate directly in sets and dicts; the
+    hash of a shared page is computed once and cached by bytes.
+    """
+    __slots__ = ('pages', 'registers', 'keypad', 'rpl_flags', 'stack', 'rows', 'width', 'height', 'pc', 'index',
+                 'current_opcode', 'delay_timer', 'sound_timer', 'random_state', 'instruction_budget', 'frame_budget',
+                 'key')
+
+    def __init__(self, pages, registers, keypad, rpl_flags, stack, rows, width, height, pc, index, current_opcode,
+                 delay_timer, sound_timer, random_state, instruction_budget, frame_budget):
+        self.pages = pages
+        self.registers = registers
+        self.keypad = keypad
+        self.rpl_flags = rpl_flags
+        self.stack = stack
+        self.rows = rows
+        self.width = width
+        self.height = height
+        self.pc = pc
+        self.index = index
+        self.current_opcode = current_opcode
+        self.delay_timer = delay_timer
+        self.sound_timer = sound_timer
+        self.random_state = random_state
+        self.instruction_budget = instruction_budget
+        self.frame_budget = frame_budget
+        self.key = (pages, registers, keypad, rpl_flags, stack, rows, pc, index, delay_timer, sound_timer, random_state)
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        return isinstance(other, MachineSnapshot) and self.key == other.key
+
+
+class ForkingMachine(DecodeTableInstrument):
+    """
+    Copy-on-write forking of a running cpu.
+
+    fork() returns a MachineSnapshot sharing every memory page that was not written since the previous fork or
+    switch, and switch_to() loads a snapshot back rewriting only the pages that are not the very same objects as the
+    loaded ones, so sibling branches cost a few small copies instead of the whole 4 KB memory. Memory is only written
+    by Fx33 and Fx55 during execution, which is what the dirty page tracking wraps in the decode table as a
+    DecodeTableInstrument. Writes from outside of the handlers (save state restores, memory and ROM loads) mark every
+    page dirty, so the next fork compares them all with the pages it shares.
+    """
+    PAGE_SIZE = 256
+    MEMORY_WRITES = {
+        'load_registers_onto_memory': lambda x: x + 1,
+        'load_bcd_on_memory': lambda x: 3,
+    }
+
+    def __init__(self, chip8_cpu, scheduler=None, translator=None):
+        super().__init__(chip8_cpu, translator)
+        self.scheduler = scheduler
+        self.dirty_pages = set()
+        self.loaded_pages = None
+        self.forks = 0
+        self.pages_copied = 0
+        self.pages_written = 0
+
+    def tracked(self, handler, write_length):
+        chip8_cpu = self.chip8_cpu
+        dirty_pages = self.dirty_pages
+        page_size = self.PAGE_SIZE
+        last_page = len(chip8_cpu.memory) // page_size - 1
+
+        def tracked_handler(x):
+            start = int(chip8_cpu.index)
+            handler(x)
+            for page in range(start // page_size, min((start + write_length(x) - 1) // page_size, last_page) + 1):
+                dirty_pages.add(page)
+
+        tracked_handler.__name__ = handler.__name__
+        return tracked_handler
+
+    def instrument(self, decode_table):
+        tracked_table = list(decode_table)
+        wrappers = {}
+        for opcode, (handler, operands) in enumerate(decode_table):
+            write_length = self.MEMORY_WRITES.get(handler.__name__)
+            if write_length is not None:
+                if handler not in wrappers:
+                    wrappers[handler] = self.tracked(handler, write_length)
+                tracked_table[opcode] = (wrappers[handler], operands)
+        return tracked_table
+
+    def attach(self):
+        if self.attached:
+            return
+        super().attach()
+        self.state_loaded()
+        self.loaded_pages = [None] * len(self.dirty_pages)
+
+    def state_loaded(self):
+        self.dirty_pages.update(range(len(self.chip8_cpu.memory) // self.PAGE_SIZE))
+
+    def detach(self):
+        super().detach()
+        self.loaded_pages = None
+
+    def fork(self):
+        """
+        Snapshot of the cpu sharing its unchanged pages with the previous snapshots
+        """
+        if not self.attached:
+            self.attach()
+        chip8_cpu = self.chip8_cpu
+        memory = chip8_cpu.memory
+        page_size = self.PAGE_SIZE
+        loaded_pages = self.loaded_pages
+
+        for page in self.dirty_pages:
+            page_bytes = bytes(memory[page * page_size:(page + 1) * page_size])
+            if page_bytes != loaded_pages[page]:
+                loaded_pages[page] = page_bytes
+                self.pages_copied += 1
+        self.dirty_pages.clear()
+        self.forks += 1
+
+        scheduler = self.scheduler
+        frame_buffer = chip8_cpu.frame_buffer
+        return MachineSnapshot(
+            tuple(loaded_pages), bytes(chip8_cpu.registers), bytes(chip8_cpu.keypad), bytes(chip8_cpu.rpl_flags),
+            tuple(chip8_cpu.stack), tuple(frame_buffer.rows), frame_buffer.width, frame_buffer.height,
+            int(chip8_cpu.pc), int(chip8_cpu.index), int(chip8_cpu.current_opcode), int(chip8_cpu.delay_timer),
+            int(chip8_cpu.sound_timer), chip8_cpu.random_state,
+            None if scheduler is None else scheduler.instruction_budget,
+            None if scheduler is None else scheduler.frame_budget)
+
+    def switch_to(self, snapshot):
+        """
+        Makes the cpu continue from snapshot
+        """
+        if not self.attached:
+            self.attach()
+        chip8_cpu = self.chip8_cpu
+        memory = memoryview(chip8_cpu.memory)
+        page_size = self.PAGE_SIZE
+        loaded_pages = self.loaded_pages
+
+        for page, page_bytes in enumerate(snapshot.pages):
+            if page_bytes is not loaded_pages[page] or page in self.dirty_pages:
+                memory[page * page_size:(page + 1) * page_size] = page_bytes
+                loaded_pages[page] = page_bytes
+                self.pages_written += 1
+                if self.translator is not None:
+                    self.translator.invalidate(page * page_size, page_size)
+        self.dirty_pages.clear()
+
+        memoryview(chip8_cpu.registers)[:] = snapshot.registers
+        memoryview(chip8_cpu.keypad)[:] = snapshot.keypad
+        memoryview(chip8_cpu.rpl_flags)[:] = snapshot.rpl_flags
+        chip8_cpu.stack = type(chip8_cpu.stack)(snapshot.stack)
+        if (chip8_cpu.frame_buffer.width, chip8_cpu.frame_buffer.height) != (snapshot.width, snapshot.height):
+            chip8_cpu.frame_buffer = FrameBuffer(snapshot.width, snapshot.height)
+        chip8_cpu.frame_buffer.rows[:] = snapshot.rows
+        chip8_cpu.pc = snapshot.pc
+        chip8_cpu.index = snapshot.index
+        chip8_cpu.current_opcode = snapshot.current_opcode
+        chip8_cpu.stack_pointer = len(snapshot.stack)
+        chip8_cpu.delay_timer = snapshot.delay_timer
+        chip8_cpu.sound_timer = snapshot.sound_timer
+        chip8_cpu.random_state = snapshot.random_state
+        DecodeTableInstrument.notify_state_loaded(chip8_cpu, loader=self)
+        if self.scheduler is not None and snapshot.instruction_budget is not None:
+            self.scheduler.instruction_budget = snapshot.instruction_budget
+            self.scheduler.frame_budget = snapshot.frame_budget
@@ -0,0 +1,159 @@
+import struct
+import zlib
+from collections import deque
+
+from core.cpu.framebuffer import FrameBuffer
+from core.cpu.instrumentation import DecodeTableInstrument
+from core.lazy_import import lazy_import
+from core.state.delta_codec import DeltaCodec
+
+np = lazy_import('numpy')
+
+
+class SaveState:
+    """
+    Snapshot of the whole machine state as one flat byte string.
+
+    Layout: header (ending with the Cxkk random state), memory, registers, keypad, SUPER-CHIP RPL flags, stack (fixed
+    16 entries of uint16) and the packed frame buffer rows.
+    Every snapshot of the same display resolution has the same size, so two snapshots can be XOR-diffed directly.
+    """
+    MAGIC = b'CH8S'
+    VERSION = 3
+    FILE_HEADER = struct.Struct('<4sB')
+    HEADER = struct.Struct('<HHHBBBBHHI')
+    MEMORY_SIZE = 4096
+    NUM_REGISTERS = 16
+    NUM_RPL_FLAGS = 8
+    STACK_SIZE = 16
+
+    def __init__(self, data):
+        self.data = data
+
+    @classmethod
+    def capture(cls, chip8_cpu):
+        """
+        Joins zero-copy buffer views of the state arrays, so the state is copied exactly once
+        """
+        frame_buffer = chip8_cpu.frame_buffer
+        stack = np.zeros(cls.STACK_SIZE, dtype='<u2')
+        stack[:len(chip8_cpu.stack)] = chip8_cpu.stack
+        header = cls.HEADER.pack(int(chip8_cpu.pc), int(chip8_cpu.index), int(chip8_cpu.current_opcode),
+                                 int(chip8_cpu.stack_pointer), int(chip8_cpu.delay_timer), int(chip8_cpu.sound_timer),
+                                 len(chip8_cpu.stack), frame_buffer.width, frame_buffer.height,
+                                 chip8_cpu.random_state)
+        return cls(b''.join((header, memoryview(chip8_cpu.memory), memoryview(chip8_cpu.registers),
+                             memoryview(chip8_cpu.keypad), memoryview(chip8_cpu.rpl_flags), memoryview(stack),
+                             frame_buffer.to_bytes())))
+
+    def restore(self, chip8_cpu):
+        """
+        Writes the snapshot back in place, so views of the cpu arrays held by engines stay valid
+        """
+        data = memoryview(self.data)
+        (pc, index, current_opcode, stack_pointer, delay_timer, sound_timer, stack_depth, width, height,
+         random_state) = self.HEADER.unpack_from(data)
+        position = self.HEADER.size
+
+        memoryview(chip8_cpu.memory)[:] = data[position:position + self.MEMORY_SIZE]
+        position += self.MEMORY_SIZE
+        memoryview(chip8_cpu.registers)[:] = data[position:position + self.NUM_REGISTERS]
+        position += self.NUM_REGISTERS
+        memoryview(chip8_cpu.keypad)[:] = data[position:position + self.NUM_REGISTERS]
+        position += self.NUM_REGISTERS
+        memoryview(chip8_cpu.rpl_flags)[:] = data[position:position + self.NUM_RPL_FLAGS]
+        position += self.NUM_RPL_FLAGS
+        stack = np.frombuffer(data, dtype='<u2', count=self.STACK_SIZE, offset=position)
+        position += self.STACK_SIZE * 2
+
+        chip8_cpu.stack = type(chip8_cpu.stack)(stack[:stack_depth].tolist())
+        if (chip8_cpu.frame_buffer.width, chip8_cpu.frame_buffer.height) != (width, height):
+            chip8_cpu.frame_buffer = FrameBuffer(width, height)
+        chip8_cpu.frame_buffer.load_bytes(data[position:])
+
+        chip8_cpu.pc = pc
+        chip8_cpu.index = index
+        chip8_cpu.current_opcode = current_opcode
+        chip8_cpu.stack_pointer = stack_pointer
+        chip8_cpu.delay_timer = delay_timer
+        chip8_cpu.sound_timer = sound_timer
+        chip8_cpu.random_state = random_state
+        DecodeTableInstrument.notify_state_loaded(chip8_cpu)
+
+    def save(self, file_path):
+        with open(file_path, 'wb') as state_file:
+            state_file.write(self.FILE_HEADER.pack(self.MAGIC, self.VERSION))
+            state_file.write(zlib.compress(self.data))
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path, 'rb') as state_file:
+            magic, version = cls.FILE_HEADER.unpack(state_file.read(cls.FILE_HEADER.size))
+            if magic != cls.MAGIC or version != cls.VERSION:
+                raise ValueError(f'{file_path} is not a version {cls.VERSION} save state')
+            return cls(zlib.decompress(state_file.read()))
+
+
+class RewindBuffer:
+    """
+    Bounded ring of per-frame snapshots for rewinding.
+
+    Snapshots are grouped behind a zlib-compressed keyframe taken every keyframe_interval frames, every other frame is
+    stored as a XOR/RLE delta against its group keyframe. When memory_limit is exceeded the oldest groups are evicted.
+    """
+
+    def __init__(self, keyframe_interval=60, memory_limit=4 * 1024 * 1024):
+        self.keyframe_interval = keyframe_interval
+        self.memory_limit = memory_limit
+        self.groups = deque()
+        self.keyframe_data = None
+        self.memory_used = 0
+        self.num_frames = 0
+
+    def push(self, chip8_cpu):
+        data = SaveState.capture(chip8_cpu).data
+
+        if not self.groups or len(self.groups[-1]['deltas']) + 1 >= self.keyframe_interval or \
+                len(self.keyframe_data) != len(data):
+            keyframe = zlib.compress(data, 1)
+            self.groups.append({'keyframe': keyframe, 'deltas': [], 'size': len(keyframe)})
+            self.keyframe_data = data
+            self.memory_used += len(keyframe)
+        else:
+            delta = DeltaCodec.encode(data, self.keyframe_data)
+            self.groups[-1]['deltas'].append(delta)
+            self.groups[-1]['size'] += len(delta)
+            self.memory_used += len(delta)
+        self.num_frames += 1
+        self.evict()
+
+    def evict(self):
+        while self.memory_used > self.memory_limit and len(self.groups) > 1:
+            evicted_group = self.groups.popleft()
+            self.memory_used -= evicted_group['size']
+            self.num_frames -= len(evicted_group['deltas']) + 1
+
+    def rewind(self, num_frames=1):
+        """
+        Drops the num_frames newest snapshots and returns the SaveState that is now the newest one,
+        or None when the buffer does not reach that far back
+        """
+        if num_frames >= self.num_frames:
+            return None
+
+        for _ in range(num_frames):
+            group = self.groups[-1]
+            if group['deltas']:
+                dropped_size = len(group['deltas'].pop())
+                group['size'] -= dropped_size
+            else:
+                self.groups.pop()
+                dropped_size = group['size']
+                self.keyframe_data = zlib.decompress(self.groups[-1]['keyframe'])
+            self.memory_used -= dropped_size
+            self.num_frames -= 1
+
+        group = self.groups[-1]
+        if not group['deltas']:
+            return SaveState(self.keyframe_data)
+        return SaveState(DeltaCodec.decode(group['deltas'][-1], self.keyframe_data))
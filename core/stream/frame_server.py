@@ -0,0 +1,222 @@
+import asyncio
+import os
+import struct
+import threading
+
+
+class Spectator:
+    """
+    A connected client: the last frame it was sent and the event waking its writer task when a newer one is published
+    """
+    __slots__ = ('frame', 'wake')
+
+    def __init__(self):
+        self.frame = None
+        self.wake = asyncio.Event()
+
+
+class FrameServer:
+    """
+    Publishes the presented frames to spectators over a Unix socket or localhost TCP, usable as a Scheduler
+    present_frame hook.
+
+    The server runs an asyncio loop on its own thread. The emulation thread only compares the frame buffer rows with
+    the last published ones and hands changed frames to the loop, it never encodes, writes nor waits. Every client
+    has a writer task sending the newest frame as a delta of the rows that changed since the frame that client last
+    received; while a slow client is still draining, newer frames replace the pending one, so it skips intermediate
+    frames instead of stalling anyone. Packets are cached by the frame they are relative to, so all the clients that
+    are up to date share one encoded packet and an extra viewer costs one write per frame.
+
+    Packet layout: HEADER (payload length, kind, frame number, width, height, number of rows) then, per row, ROW (row
+    index) and the packed row bytes. A KEYFRAME holds every row, a DELTA only the changed ones.
+    """
+    HEADER = struct.Struct('<IBIHHH')
+    ROW = struct.Struct('<H')
+    KEYFRAME = 0
+    DELTA = 1
+
+    def __init__(self, unix_path=None, port=None, host='127.0.0.1'):
+        if (unix_path is None) == (port is None):
+            raise ValueError('FrameServer needs either a unix_path or a port')
+        self.unix_path = unix_path
+        self.host = host
+        self.port = port
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.started = threading.Event()
+        self.start_error = None
+
+        self.last_rows = None
+        self.frame_number = 0
+        # (frame number, width, height, row bytes, rows) of every frame whose packets may still be requested, by frame
+        # number
+        self.frames = {}
+        self.latest = None
+        self.packets = {}
+        self.clients = set()
+
+        self.frames_published = 0
+        self.packets_encoded = 0
+        self.packets_sent = 0
+        self.bytes_sent = 0
+        self.frames_dropped = 0
+        self.clients_served = 0
+
+    @classmethod
+    def from_address(cls, address):
+        """
+        Server for 'unix:PATH' or 'tcp:PORT'
+        """
+        kind, _, location = address.partition(':')
+        if kind == 'unix':
+            return cls(unix_path=location)
+        if kind == 'tcp':
+            return cls(port=int(location))
+        raise ValueError(f'Unknown spectator address {address!r}, expected unix:PATH or tcp:PORT')
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run_loop, name='frame-server', daemon=True)
+        self.thread.start()
+        self.started.wait()
+        if self.start_error is not None:
+            self.thread.join()
+            self.thread = None
+            raise self.start_error
+        return self
+
+    def run_loop(self):
+        self.loop = asyncio.new_event_loop()
+        try:
+            if self.unix_path is not None:
+                if os.path.exists(self.unix_path):
+                    os.unlink(self.unix_path)
+                self.server = self.loop.run_until_complete(asyncio.start_unix_server(self.serve_client,
+                                                                                     self.unix_path))
+            else:
+                self.server = self.loop.run_until_complete(asyncio.start_server(self.serve_client, self.host,
+                                                                                self.port))
+                self.port = self.server.sockets[0].getsockname()[1]
+        except Exception as exception:
+            # Handed to start() to raise on the calling thread
+            self.start_error = exception
+            self.loop.close()
+            self.started.set()
+            return
+        self.started.set()
+        self.loop.run_forever()
+        self.loop.close()
+
+    def __call__(self, chip8_cpu):
+        frame_buffer = chip8_cpu.frame_buffer
+        rows = tuple(frame_buffer.rows)
+        if rows == self.last_rows:
+            return
+        self.last_rows = rows
+        self.frame_number += 1
+        self.loop.call_soon_threadsafe(self.publish, (self.frame_number, frame_buffer.width, frame_buffer.height,
+                                                      frame_buffer.row_bytes, rows))
+
+    def publish(self, frame):
+        self.frames_published += 1
+        self.latest = frame
+        self.frames[frame[0]] = frame
+        self.packets.clear()
+        referenced = {client.frame for client in self.clients}
+        for frame_number in [number for number in self.frames if number != frame[0] and number not in referenced]:
+            del self.frames[frame_number]
+        for client in self.clients:
+            client.wake.set()
+
+    def packet(self, reference_number):
+        """
+        Packet bringing a client from the frame reference_number (None for a new client) to the latest frame
+        """
+        packet = self.packets.get(reference_number)
+        if packet is not None:
+            return packet
+        frame_number, width, height, row_bytes, rows = self.latest
+        reference = self.frames.get(reference_number)
+        if reference is None or reference[1:3] != (width, height):
+            kind, changed = self.KEYFRAME, range(len(rows))
+        else:
+            reference_rows = reference[4]
+            kind, changed = self.DELTA, [index for index, row in enumerate(rows) if row != reference_rows[index]]
+
+        parts = []
+        for index in changed:
+            parts.append(self.ROW.pack(index))
+            parts.append(rows[index].to_bytes(row_bytes, 'big'))
+        payload = b''.join(parts)
+        packet = self.HEADER.pack(self.HEADER.size - 4 + len(payload), kind, frame_number, width, height,
+                                  len(changed)) + payload
+        self.packets[reference_number] = packet
+        self.packets_encoded += 1
+        return packet
+
+    async def serve_client(self, reader, writer):
+        client = Spectator()
+        self.clients.add(client)
+        self.clients_served += 1
+        if self.latest is not None:
+            client.wake.set()
+        try:
+            while True:
+                await client.wake.wait()
+                client.wake.clear()
+                frame_number = self.latest[0]
+                if frame_number == client.frame:
+                    continue
+                packet = self.packet(client.frame)
+                writer.write(packet)
+                if client.frame is not None:
+                    self.frames_dropped += frame_number - client.frame - 1
+                client.frame = frame_number
+                self.packets_sent += 1
+                self.bytes_sent += len(packet)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.clients.discard(client)
+            writer.close()
+
+    async def shutdown(self, timeout):
+        """
+        Gives the clients up to timeout seconds to receive the latest frame, then closes every connection
+        """
+        self.server.close()
+        deadline = self.loop.time() + timeout
+        while self.latest is not None and any(client.frame != self.latest[0] for client in self.clients) and \
+                self.loop.time() < deadline:
+            await asyncio.sleep(0.01)
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def close(self, timeout=1.0):
+        if self.thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.shutdown(timeout), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.thread = None
+        if self.unix_path is not None and os.path.exists(self.unix_path):
+            os.unlink(self.unix_path)
+
+    def statistics(self):
+        return {
+            'frames_published': self.frames_published,
+            'packets_encoded': self.packets_encoded,
+            'packets_sent': self.packets_sent,
+            'bytes_sent': self.bytes_sent,
+            'frames_dropped': self.frames_dropped,
+            'clients_served': self.clients_served,
+        }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exception_info):
+        self.close()
@@ -0,0 +1,94 @@
+import argparse
+import asyncio
+import sys
+
+from core.stream.frame_server import FrameServer
+
+
+class SpectatorClient:
+    """
+    Reference client of the FrameServer, rebuilding the frames from the keyframe and delta packets. on_frame is called
+    with the client after every packet, frame_number being the server frame shown and frames_skipped the frames the
+    server dropped because this client was behind.
+    """
+
+    def __init__(self, on_frame=None):
+        self.on_frame = on_frame
+        self.width = 0
+        self.height = 0
+        self.rows = []
+        self.frame_number = 0
+        self.packets = 0
+        self.frames_skipped = 0
+        self.bytes_received = 0
+
+    async def connect(self, address):
+        kind, _, location = address.partition(':')
+        if kind == 'unix':
+            return await asyncio.open_unix_connection(location)
+        if kind == 'tcp':
+            return await asyncio.open_connection('127.0.0.1', int(location))
+        raise ValueError(f'Unknown spectator address {address!r}, expected unix:PATH or tcp:PORT')
+
+    async def watch(self, address, max_packets=None):
+        reader, writer = await self.connect(address)
+        try:
+            while max_packets is None or self.packets < max_packets:
+                try:
+                    length_bytes = await reader.readexactly(4)
+                    payload = await reader.readexactly(int.from_bytes(length_bytes, 'little'))
+                except asyncio.IncompleteReadError:
+                    break
+                self.apply(length_bytes + payload)
+                if self.on_frame is not None:
+                    self.on_frame(self)
+        finally:
+            writer.close()
+
+    def apply(self, packet):
+        _, kind, frame_number, width, height, num_rows = FrameServer.HEADER.unpack_from(packet)
+        if kind == FrameServer.KEYFRAME:
+            self.width, self.height = width, height
+            self.rows = [0] * height
+        elif self.frame_number:
+            self.frames_skipped += frame_number - self.frame_number - 1
+        row_bytes = width // 8
+        offset = FrameServer.HEADER.size
+        for _ in range(num_rows):
+            index, = FrameServer.ROW.unpack_from(packet, offset)
+            offset += FrameServer.ROW.size
+            self.rows[index] = int.from_bytes(packet[offset:offset + row_bytes], 'big')
+            offset += row_bytes
+        self.frame_number = frame_number
+        self.packets += 1
+        self.bytes_received += len(packet)
+
+    def render(self):
+        return '\n'.join(''.join('#' if row >> (self.width - 1 - x) & 1 else ' ' for x in range(self.width))
+                         for row in self.rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Watch a CHIP-8 session published by a FrameServer')
+    parser.add_argument('address', help='unix:PATH or tcp:PORT')
+    parser.add_argument('--packets', type=int, help='stop after this many packets')
+    parser.add_argument('--quiet', action='store_true', help='only print the statistics at the end')
+    arguments = parser.parse_args()
+
+    def draw(client):
+        sys.stdout.write(f'\x1b[H\x1b[2J{client.render()}\nframe {client.frame_number}, '
+                         f'{client.frames_skipped} skipped\n')
+        sys.stdout.flush()
+
+    client = SpectatorClient(on_frame=None if arguments.quiet else draw)
+    try:
+        asyncio.run(client.watch(arguments.address, arguments.packets))
+    except KeyboardInterrupt:
+        pass
+    print(f'{client.packets} packets, {client.bytes_received} bytes, last frame {client.frame_number}, '
+          f'{client.frames_skipped} frames skipped')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,186 @@
+import time
+
+STARTED = time.perf_counter()
+
+import argparse
+import json
+import random
+import sys
+import types
+
 from core.main import Main
+from core.scheduler.scheduler import Scheduler
+
+IMPORTED = time.perf_counter()
+
+
+def start(stdscr, arguments):
+    # Every mode only imports what it uses, so short headless runs don't pay for the terminal front end
+    from core.input.keypad_input import CursesKeySource, KeypadInput
+    from core.input.movie import InputMovie, MovieRecorder
+    from core.reader.file_reader import FileReader
+    from core.reader.rom_library import RomLibrary
+    from core.screen.screen import ScreenHandler
+
+    screen_handler = ScreenHandler(stdscr)
+    keypad_input = KeypadInput(CursesKeySource(stdscr, screen_handler.lock)).start()
+    input_hooks = [keypad_input]
+    seed = arguments.seed
+    movie = None
+    if arguments.record is not None:
+        seed = random.getrandbits(32) if seed is None else seed
+        movie = InputMovie(RomLibrary.rom_hash(FileReader.file_reader(arguments.rom)), seed)
+        input_hooks.append(MovieRecorder(movie))
+
+    def poll_input(chip8_cpu, tick):
+        for input_hook in input_hooks:
+            input_hook(chip8_cpu, tick)
+        if keypad_input.quit_requested:
+            runner.scheduler.stop()
+
+    frame_server = None
+
+    def present_frame(chip8_cpu):
+        screen_handler.update_window(chip8_cpu.video_display)
+        if frame_server is not None:
+            frame_server(chip8_cpu)
+
+    try:
+        if arguments.serve is not None:
+            from core.stream.frame_server import FrameServer
+            frame_server = FrameServer.from_address(arguments.serve).start()
+        runner = Main(arguments.mode, idle_detection=True, rom_path=arguments.rom, backend=arguments.backend, seed=seed,
+                      poll_input=poll_input, trace_path=arguments.trace, audio_path=arguments.audio,
+                      cache_directory=RomLibrary.DEFAULT_CACHE_DIRECTORY,
+                      present_frame=keypad_input.timed_present(present_frame))
+        runner.run()
+    finally:
+        keypad_input.stop()
+        if frame_server is not None:
+            frame_server.close()
+        if movie is not None:
+            movie.save(arguments.record)
+    return keypad_input.latency_statistics()
+
+
+def replay(arguments):
+    from core.batch.batch_runner import BatchJob
+    result = BatchJob(arguments.rom, movie_path=arguments.replay, mode=arguments.mode, backend=arguments.backend,
+                      timeout=arguments.timeout, capture_path=arguments.capture, trace_path=arguments.trace,
+                      audio_path=arguments.audio, serve_address=arguments.serve).run()
+    if result['status'] != 'ok':
+        print(f'{result["status"]}: {result["error"]}')
+        return 1
+    print(f'{result["ticks"]} ticks, {result["cycles"]} cycles in {result["elapsed"]:.2f}s '
+          f'({result["ips"]:,.0f} instructions/s)')
+    print(f'state {result["state_hash"]}  frames {result["frames_hash"]}')
+    if 'audio' in result:
+        audio = result['audio']
+        print(f'audio {audio["audio_hash"]}  {audio["tone_ticks"]} beeping ticks, {audio["overruns"]} overruns')
+    if 'stream' in result:
+        stream = result['stream']
+        print(f'stream {stream["frames_published"]} frames to {stream["clients_served"]} spectators, '
+              f'{stream["packets_sent"]} packets, {stream["frames_dropped"]} frames dropped')
+    return 0
+
+
+def run_batch(arguments):
+    from core.batch.batch_runner import BatchRunner
+    input_script = None
+    if arguments.input_script is not None:
+        with open(arguments.input_script) as script_file:
+            input_script = json.load(script_file)
+    batch_runner = BatchRunner.from_path(arguments.batch, num_workers=arguments.workers, num_cycles=arguments.cycles,
+                                         input_script=input_script, seed=arguments.seed or 0, mode=arguments.mode,
+                                         backend=arguments.backend, timeout=arguments.timeout)
+    report = batch_runner.run()
+
+    for result in report['results']:
+        if result['status'] == 'ok':
+            print(f'{result["path"]:40} ok       {result["cycles"]:>10} cycles  {result["ips"]:>12,.0f} ips  '
+                  f'{result["state_hash"]}')
+        else:
+            print(f'{result["path"]:40} {result["status"]:8} {result["error"]}')
+    print(f'{len(report["results"])} ROMs on {report["workers"]} workers in {report["elapsed"]:.2f}s, '
+          f'{report["aggregate_ips"]:,.0f} instructions/s')
+    if arguments.output is not None:
+        with open(arguments.output, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+    return 0 if all(result['status'] == 'ok' for result in report['results']) else 1
+
+
+def measure_startup(arguments):
+    """
+    Breaks down the time to the first instruction of a headless run of the ROM
+    """
+    from core.reader.rom_library import RomLibrary
+    phases = {'imports': IMPORTED - STARTED}
+    start = time.perf_counter()
+    runner = Main(arguments.mode, scheduler_mode=Scheduler.HEADLESS_MODE, rom_path=arguments.rom,
+                  backend=arguments.backend, seed=arguments.seed or 0,
+                  cache_directory=RomLibrary.DEFAULT_CACHE_DIRECTORY)
+    phases['machine'] = time.perf_counter() - start
+    start = time.perf_counter()
+    runner.load()
+    phases['load'] = time.perf_counter() - start
+    start = time.perf_counter()
+    runner.run_cycles(1)
+    phases['first instruction'] = time.perf_counter() - start
+
+    for phase, elapsed in phases.items():
+        print(f'{phase:20} {elapsed * 1000:8.2f} ms')
+    print(f'{"total":20} {sum(phases.values()) * 1000:8.2f} ms')
+    # A lazily imported module turns into a plain module once it is actually loaded
+    numpy_loaded = type(sys.modules.get('numpy')) is types.ModuleType
+    print(f'numpy loaded: {numpy_loaded}, curses loaded: {"curses" in sys.modules}')
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CHIP-8 emulator')
+    parser.add_argument('--rom', default='roms/Tetris.ch8')
+    parser.add_argument('--record', metavar='MOVIE', help='record the keypad of the session as an input movie')
+    parser.add_argument('--replay', metavar='MOVIE', help='replay an input movie headless at full speed')
+    parser.add_argument('--capture', metavar='FILE', help='stream the frames of the replay to a capture file')
+    parser.add_argument('--trace', metavar='FILE', help='write a binary execution trace of the session or replay')
+    parser.add_argument('--audio', metavar='FILE', help='write the sound of the session or replay as a WAV file')
+    parser.add_argument('--serve', metavar='ADDRESS',
+                        help='publish the frames to spectators on unix:PATH or tcp:PORT')
+    parser.add_argument('--batch', metavar='PATH',
+                        help='run every ROM of a directory or JSON manifest headless instead of playing')
+    parser.add_argument('--cycles', type=int, default=100000, help='instructions per ROM (default: %(default)s)')
+    parser.add_argument('--input-script', help='JSON list of [tick, [keys]] keypad changes')
+    parser.add_argument('--seed', type=int, help='Cxkk random seed (default: random, 0 for batches)')
+    parser.add_argument('--timeout', type=float, default=30.0,
+                        help='seconds per ROM or replay (default: %(default)s)')
+    parser.add_argument('--workers', type=int, help='worker processes (default: one per core)')
+    parser.add_argument('--mode', choices=Main.MODES, default=Main.INTERPRETER_MODE)
+    parser.add_argument('--backend', choices=tuple(Main.BACKENDS), default=Main.NUMPY_BACKEND)
+    parser.add_argument('--output', help='write the batch report as JSON')
+    parser.add_argument('--measure-startup', action='store_true',
+                        help='report the time to the first instruction of a headless run and exit')
+    arguments = parser.parse_args()
+
+    if arguments.measure_startup:
+        return measure_startup(arguments)
+    if arguments.batch is not None:
+        single_run_options = [option for option, value in (('--capture', arguments.capture),
+                                                            ('--trace', arguments.trace),
+                                                            ('--audio', arguments.audio),
+                                                            ('--serve', arguments.serve)) if value is not None]
+        if single_run_options:
+            parser.error(f'{", ".join(single_run_options)} can\'t be used with --batch, set capture_path, trace_path, '
+                         f'audio_path or serve_address on manifest entries instead')
+        return run_batch(arguments)
+    if arguments.replay is not None:
+        return replay(arguments)
+    import curses
+    latency = curses.wrapper(start, arguments)
+    if latency['samples']:
+        print(f'input to frame latency over {latency["samples"]} presses: mean {latency["mean"] * 1000:.1f} ms, '
+              f'p95 {latency["p95"] * 1000:.1f} ms, max {latency["max"] * 1000:.1f} ms')
+    return 0
+
 
 if __name__ == '__main__':
-    runner = Main()
-    runner.run()
+    sys.exit(main())